@@ -1,5 +1,19 @@
+import cocotb
 import cocotb.triggers as triggers
 import cocotb.handle as handle
+import os
+from . import logger
+from . import profiling
+
+
+# Tee the simulation's logs to the file requested by runner.run, but never from the processes spawned by the simulation,
+# e.g. the workers of a PooledScoreboard, which inherit its environment and would otherwise truncate the file.
+if logger.LOG_FILE_ENV in os.environ and cocotb.SIM_NAME is not None:
+    logger.setup(os.environ[logger.LOG_FILE_ENV])
+
+# Profile the simulation, as requested by runner.run or the test tasks, but never the process launching it.
+if os.environ.get(profiling.PROFILE_ENV, "") and cocotb.SIM_NAME is not None:
+    profiling.setup(os.environ[profiling.PROFILE_ENV], float(os.environ.get(profiling.INTERVAL_ENV, 0.001)))
 
 
 async def reset(clk: handle.SimHandleBase, rst: handle.SimHandleBase, cycles: int=4) -> None:
@@ -8,4 +22,4 @@ async def reset(clk: handle.SimHandleBase, rst: handle.SimHandleBase, cycles: in
     rst.value = 1
     for _ in range(cycles):
         await triggers.RisingEdge(clk)
-    rst.value = 0
\ No newline at end of file
+    rst.value = 0
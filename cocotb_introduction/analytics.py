@@ -0,0 +1,249 @@
+"""
+Contains the StreamAnalyzer, which measures the performance of a DUT from the monitors on its input and output sides.
+
+The StreamAnalyzer consumes the messages of an input monitor and an output monitor,
+or the beats a write driver publishes into a BeatBuffer instead of the input monitor, and assumes the DUT is in-order, like the fifo, bfifo, and back_adder, i.e. the n-th output beat corresponds to the n-th input beat.
+From the sim time of the messages, it derives
+    - the latency of each transaction in cycles,
+    - the sustained throughput of each side in beats per cycle,
+    - the occupancy of the DUT over time, i.e. the number of beats that went in but haven't come out yet, and
+    - the ratio of cycles during which each of the specified stall conditions holds, such as backpressure.
+
+Latency and occupancy are accumulated in streaming histograms with bounded memory,
+so the analyzer can run for arbitrarily long tests. The summary can be exported to a yaml in the working directory,
+and collect gathers the summaries of every sweep point, e.g. to compare the fifo and bfifo across DEPTH and ALMOST_FULL_DEPTH.
+"""
+import cocotb
+import cocotb.handle as handle
+import cocotb.triggers as triggers
+import cocotb.utils as utils
+import collections
+import os
+import pathlib
+import typing
+import yaml
+from .valid import ValidMonitor
+from .validready import ValidReadyMonitor
+from .stream import BeatReader
+
+
+Monitor = typing.Union[ValidMonitor, ValidReadyMonitor]
+PERFORMANCE_FILE = "performance.yaml"
+
+
+class HistogramDict(typing.TypedDict):
+    """Represents the summary of a Histogram."""
+    count: int
+    min: typing.Optional[int]
+    max: typing.Optional[int]
+    mean: typing.Optional[float]
+    p50: typing.Optional[int]
+    p99: typing.Optional[int]
+    bins: typing.Dict[int, int]
+
+
+class SummaryDict(typing.TypedDict):
+    """Represents the summary of a StreamAnalyzer."""
+    cycles: int
+    input_beats: int
+    output_beats: int
+    input_throughput: float
+    output_throughput: float
+    latency: HistogramDict
+    occupancy: HistogramDict
+    stalls: typing.Dict[str, float]
+
+
+class Histogram:
+    """Streaming histogram of non-negative integers with bounded memory.
+
+    Values below linear are counted in bins one value wide,
+    whereas larger values are counted in bins bounded by powers of two, the first of which starts at linear,
+    so the number of bins grows only logarithmically with the largest value.
+    Each bin is keyed by the smallest value it counts."""
+
+    def __init__(self, linear: int = 128) -> None:
+        super().__init__()
+        assert linear > 0
+        self._linear = linear
+        self._bins: typing.Dict[int, int] = collections.defaultdict(int)
+        self._count = 0
+        self._total = 0
+        self._min: typing.Optional[int] = None
+        self._max: typing.Optional[int] = None
+
+    @property
+    def count(self) -> int:
+        """The total weight added to the histogram."""
+        return self._count
+
+    @property
+    def mean(self) -> typing.Optional[float]:
+        """The weighted mean of the values. None if empty."""
+        return self._total / self._count if self._count else None
+
+    def add(self, value: int, weight: int = 1) -> None:
+        """Adds value to the histogram weight times."""
+        assert value >= 0
+        if weight <= 0:
+            return
+        if value < self._linear:
+            key = value
+        else:
+            key = max(self._linear, 1 << (value.bit_length() - 1))
+        self._bins[key] += weight
+        self._count += weight
+        self._total += value * weight
+        self._min = value if self._min is None else min(self._min, value)
+        self._max = value if self._max is None else max(self._max, value)
+
+    def quantile(self, q: float) -> typing.Optional[int]:
+        """The smallest bin that accounts for at least the q fraction of the weight. None if empty."""
+        assert 0.0 <= q <= 1.0
+        if not self._count:
+            return None
+        threshold = q * self._count
+        accumulated = 0
+        for key in sorted(self._bins):
+            accumulated += self._bins[key]
+            if accumulated >= threshold:
+                return key
+        return self._max
+
+    def summary(self) -> HistogramDict:
+        """Summarizes the histogram."""
+        return HistogramDict(
+            count=self._count,
+            min=self._min,
+            max=self._max,
+            mean=self.mean,
+            p50=self.quantile(0.5),
+            p99=self.quantile(0.99),
+            bins=dict(sorted(self._bins.items())))
+
+
+class StreamAnalyzer:
+    """Measures the latency, throughput, occupancy, and stalls of an in-order DUT.
+
+    input and output are the monitors on the input and output sides of the DUT.
+    input can also be a reader of the beats published by the write driver on the input side, see cocotb_introduction.stream.
+    period and units specify the period of the clock.
+    stalls maps the name of each stall condition to the signals it depends on and a predicate over their integer values,
+    e.g. {"backpressure": ((top.valid, top.ready), lambda valid, ready: valid == 1 and ready == 0)}.
+    Undefined values are treated as 0."""
+
+    def __init__(
+        self,
+        input: typing.Union[Monitor, BeatReader],
+        output: Monitor,
+        period: int = 10,
+        units: str = "ns",
+        stalls: typing.Mapping[str, typing.Tuple[typing.Sequence[handle.SimHandleBase], typing.Callable[..., bool]]] = {}
+    ) -> None:
+        super().__init__()
+        self._period = utils.get_sim_steps(period, units)
+        self._start = utils.get_sim_time()
+        self._inputs: typing.Deque[int] = collections.deque()
+        self._input_beats = 0
+        self._output_beats = 0
+        self._first: typing.Optional[int] = None
+        self._last: typing.Optional[int] = None
+        self._latency = Histogram()
+        self._occupancy = Histogram()
+        self._occupancy_time = self._start
+        self._stalled: typing.Dict[str, int] = {name: 0 for name in stalls}
+
+        def add_input(time: int) -> None:
+            self._update_occupancy(time)
+            self._inputs.append(time)
+            self._input_beats += 1
+            if self._first is None:
+                self._first = time
+
+        async def observe_input() -> None:
+            while True:
+                if isinstance(input, BeatReader):
+                    add_input((await input.pop_wait()).time)
+                else:
+                    await input.event
+                    add_input(input.message.time)
+
+        async def observe_output() -> None:
+            while True:
+                await output.event
+                msg = output.message
+                self._update_occupancy(msg.time)
+                assert self._inputs, "Output beat observed without a corresponding input beat."
+                self._latency.add((msg.time - self._inputs.popleft()) // self._period)
+                self._output_beats += 1
+                self._last = msg.time
+
+        async def observe_stall(name: str, signals: typing.Sequence[handle.SimHandleBase], predicate: typing.Callable[..., bool]) -> None:
+            edges = triggers.First(*(triggers.Edge(signal) for signal in signals))
+            stamp = utils.get_sim_time()
+            stalled = False
+            while True:
+                values = []
+                for signal in signals:
+                    try:
+                        values.append(signal.value.integer)
+                    except ValueError:
+                        values.append(0)
+                now = utils.get_sim_time()
+                if stalled:
+                    self._stalled[name] += now - stamp
+                stamp = now
+                stalled = bool(predicate(*values))
+                await edges
+
+        cocotb.start_soon(observe_input())
+        cocotb.start_soon(observe_output())
+        for name, (signals, predicate) in stalls.items():
+            cocotb.start_soon(observe_stall(name, signals, predicate))
+
+    @property
+    def latency(self) -> Histogram:
+        """Histogram of the latencies of the transactions in cycles."""
+        return self._latency
+
+    @property
+    def occupancy(self) -> Histogram:
+        """Histogram of the number of cycles spent at each occupancy."""
+        return self._occupancy
+
+    def summary(self) -> SummaryDict:
+        """Summarizes the measurements up to the current sim time."""
+        now = utils.get_sim_time()
+        cycles = max((now - self._start) // self._period, 1)
+        active = 1
+        if self._first is not None and self._last is not None:
+            active = max((self._last - self._first) // self._period + 1, 1)
+        return SummaryDict(
+            cycles=cycles,
+            input_beats=self._input_beats,
+            output_beats=self._output_beats,
+            input_throughput=self._input_beats / active,
+            output_throughput=self._output_beats / active,
+            latency=self._latency.summary(),
+            occupancy=self._occupancy.summary(),
+            stalls={name: (stalled // self._period) / cycles for name, stalled in self._stalled.items()})
+
+    def export(self, path: os.PathLike | str = PERFORMANCE_FILE) -> None:
+        """Writes the summary to a yaml file."""
+        with open(path, "w") as file:
+            yaml.safe_dump(dict(self.summary()), file, sort_keys=False)
+
+    def _update_occupancy(self, time: int) -> None:
+        """Accounts the cycles spent at the current occupancy up to time."""
+        self._occupancy.add(len(self._inputs), (time - self._occupancy_time) // self._period)
+        self._occupancy_time = max(self._occupancy_time, time)
+
+
+def collect(root: os.PathLike | str = ".", name: str = PERFORMANCE_FILE) -> typing.Dict[str, SummaryDict]:
+    """Gathers the summaries exported to the working directories under root, keyed by the working directory.
+    runner.run names each working directory after its sweep point, so the result compares the sweep points."""
+    summaries = {}
+    for path in sorted(pathlib.Path(root).glob(f"*.work/{name}")):
+        with open(path, "r") as file:
+            summaries[path.parent.name.removesuffix(".work")] = typing.cast(SummaryDict, yaml.safe_load(file))
+    return summaries
@@ -0,0 +1,185 @@
+"""
+Contains the generator of clocked wrappers and the Clock that controls them.
+
+cocotb.clock.Clock toggles the clock from a coroutine, so Python is re-entered twice per period for the whole simulation,
+even while the testbench is idle, e.g. awaiting a Timer. cocotb 1.9 has no clock implemented within the GPI,
+so the clock is instead generated within the simulator, by a process of a wrapper around the design.
+Python is then only re-entered when a coroutine actually awaits an edge of the clock.
+
+The wrapper instantiates the design with the same generics and ports, other than the clock,
+which the wrapper drives out of its own clk port, so the design and the testbench see the very same clock signal.
+The wrapper also has the following input ports, which the Clock drives:
+    - clk_en enables the clock. While disabled, the clock is held low.
+    - clk_period is the period of the clock, in picoseconds.
+    - clk_phase is the time, in picoseconds, between enabling the clock and its first rising edge.
+The changes of the period take effect at the next period, and disabling the clock takes effect at the end of the current period.
+
+The wrapper is generated into a VHDL source, which is passed to runner.run along with the top level of the wrapper.
+"""
+from .harness import Port, FIFO_PORTS
+import cocotb.handle as handle
+import os
+import pathlib
+import typing
+
+
+SUFFIX = "_clocked"
+"""Appended to the name of the design to name its wrapper."""
+
+
+PICOSECONDS: typing.Mapping[str, int] = {"ps": 1, "ns": 1000, "us": 1000 ** 2, "ms": 1000 ** 3}
+"""The number of picoseconds in each of the units supported by the Clock."""
+
+
+SIMPLE_ADDER_PORTS: typing.Mapping[str, Port] = {
+    "aData": ("in", "WIDTH"),
+    "bData": ("in", "WIDTH"),
+    "abValid": ("in", None),
+    "rData": ("out", "WIDTH"),
+    "rValid": ("out", None)}
+"""The ports of the simple_adder, other than the clock and reset."""
+
+
+BACK_ADDER_PORTS: typing.Mapping[str, Port] = {
+    "a_data": ("in", "WIDTH"),
+    "b_data": ("in", "WIDTH"),
+    "ab_valid": ("in", None),
+    "ab_ready": ("out", None),
+    "r_data": ("out", "WIDTH"),
+    "r_valid": ("out", None),
+    "r_ready": ("in", None)}
+"""The ports of the back_adder, other than the clock and reset."""
+
+
+ADDER_GENERICS: typing.Mapping[str, int] = {"WIDTH": 32}
+"""The generics of the simple_adder and the back_adder, and the defaults their wrappers give them."""
+
+
+FIFO_GENERICS: typing.Mapping[str, int] = {"DEPTH": 16, "ALMOST_FULL_DEPTH": 10, "WIDTH": 32}
+"""The generics of the fifo and the bfifo, and the defaults their wrappers give them."""
+
+
+def toplevel(entity: str) -> str:
+    """The name of the wrapper of entity."""
+    return f"{entity}{SUFFIX}"
+
+
+def generate(entity: str, generics: typing.Mapping[str, int], ports: typing.Mapping[str, Port]) -> str:
+    """Generates the VHDL of the wrapper of entity. generics maps the name of each generic of entity to its default value,
+    all of which are natural. The wrapper's generics are passed through to entity, so they can still be set by runner.run."""
+    wrapper = toplevel(entity)
+
+    def port_type(width: typing.Optional[str]) -> str:
+        if width is None:
+            return "std_logic"
+        return f"std_logic_vector({width}-1 downto 0)"
+
+    declarations = [
+        "        clk : buffer std_logic",
+        "        rst : in std_logic",
+        "        clk_en : in std_logic := '0'",
+        "        clk_period : in natural := 10000",
+        "        clk_phase : in natural := 0"]
+    declarations += [f"        {port} : {direction} {port_type(width)}" for port, (direction, width) in ports.items()]
+    generic_declarations = ";\n".join(f"        {generic} : natural := {value}" for generic, value in generics.items())
+    generic_mappings = ",\n".join(f"            {generic} => {generic}" for generic in generics)
+    port_mappings = ",\n".join(
+        ["            clk => clk", "            rst => rst"] +
+        [f"            {port} => {port}" for port in ports])
+
+    return (
+        "-- Generated by cocotb_introduction.clocking. Do not edit.\n"
+        "library ieee;\n"
+        "use ieee.std_logic_1164.all;\n"
+        "\n"
+        f"entity {wrapper} is\n" +
+        (f"    generic (\n{generic_declarations});\n" if generics else "") +
+        "    port (\n" +
+        ";\n".join(declarations) + ");\n" +
+        f"end entity {wrapper};\n"
+        "\n"
+        f"architecture rtl of {wrapper} is\n"
+        "begin\n"
+        "\n"
+        "    clock_gen : process\n"
+        "    begin\n"
+        "        clk <= '0';\n"
+        "        loop\n"
+        "            if clk_en /= '1' then\n"
+        "                clk <= '0';\n"
+        "                wait until clk_en = '1';\n"
+        "                if clk_phase > 0 then\n"
+        "                    wait for clk_phase * 1 ps;\n"
+        "                end if;\n"
+        "            end if;\n"
+        "            assert clk_period > 1 report \"clk_period must be at least 2 ps.\" severity failure;\n"
+        "            clk <= '1';\n"
+        "            wait for (clk_period / 2) * 1 ps;\n"
+        "            clk <= '0';\n"
+        "            wait for (clk_period - clk_period / 2) * 1 ps;\n"
+        "        end loop;\n"
+        "    end process;\n"
+        "\n"
+        f"    {entity}_inst : entity work.{entity}\n" +
+        (f"        generic map (\n{generic_mappings})\n" if generics else "") +
+        f"        port map (\n{port_mappings});\n"
+        "\n"
+        "end architecture rtl;\n")
+
+
+def write(
+    directory: os.PathLike | str,
+    entity: str,
+    generics: typing.Mapping[str, int],
+    ports: typing.Mapping[str, Port] = FIFO_PORTS
+) -> pathlib.Path:
+    """Generates the wrapper of entity into the VHDL source <entity>_clocked.vhd of directory, returning the path of the source.
+    The source is only rewritten, atomically, if its contents changed, so unchanged wrappers don't look changed to cocotb_introduction.depends."""
+    path = pathlib.Path(directory) / f"{toplevel(entity)}.vhd"
+    path.parent.mkdir(parents=True, exist_ok=True)
+    text = generate(entity, generics, ports)
+    if not path.exists() or path.read_text() != text:
+        # Written aside and renamed into place, since concurrent workers may generate and compile the same source.
+        staging = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+        staging.write_text(text)
+        os.replace(staging, path)
+    return path
+
+
+class Clock:
+    """Controls the clock generated by the wrapper top, i.e. a top level generated by this module.
+    Like cocotb.clock.Clock, the clock has a 50:50 duty cycle, but it starts and stops through plain method calls,
+    since no coroutine is needed to toggle it. phase is the delay, in units, between starting the clock and its first rising edge."""
+
+    def __init__(self, top: handle.SimHandleBase, period: float = 10, units: str = "ns", phase: float = 0) -> None:
+        super().__init__()
+        assert units in PICOSECONDS, f"Units must be one of {tuple(PICOSECONDS)}."
+        self._top = top
+        self._units = units
+        self._period = self._picoseconds(period)
+        self._phase = self._picoseconds(phase)
+        assert self._period > 1
+
+    def _picoseconds(self, time: float) -> int:
+        return round(time * PICOSECONDS[self._units])
+
+    @property
+    def period(self) -> float:
+        """The period of the clock, in units. Changing it while the clock runs takes effect at the next period."""
+        return self._period / PICOSECONDS[self._units]
+
+    @period.setter
+    def period(self, period: float) -> None:
+        self._period = self._picoseconds(period)
+        assert self._period > 1
+        self._top.clk_period.value = self._period
+
+    def start(self) -> None:
+        """Starts the clock. The first rising edge occurs after the phase."""
+        self._top.clk_period.value = self._period
+        self._top.clk_phase.value = self._phase
+        self._top.clk_en.value = 1
+
+    def stop(self) -> None:
+        """Stops the clock at the end of the current period, holding it low."""
+        self._top.clk_en.value = 0
@@ -0,0 +1,58 @@
+"""
+Contains the Closure, which drives random tests by functional coverage instead of a fixed amount of stimulus.
+
+A random test with a fixed amount of stimulus either wastes cycles on configurations that close their coverage early,
+or stops before configurations that need more stimulus close theirs.
+A closure-driven test instead keeps generating stimulus until the cover items of cocotb_coverage reach a target,
+or until a budget of cycles runs out, e.g. by passing Closure.done as the until argument of stimulus.blocks.
+"""
+import cocotb.utils as utils
+import cocotb_coverage.coverage as coverage
+import typing
+
+
+class Closure:
+    """Tracks whether the cover items, named as in cocotb_coverage's coverage_db, reached the target percentage of coverage,
+    or whether budget cycles of the clock, specified by period and units, elapsed since the Closure was created."""
+
+    def __init__(
+        self,
+        items: typing.Sequence[str],
+        target: float = 100.0,
+        budget: typing.Optional[int] = None,
+        period: int = 10,
+        units: str = "ns"
+    ) -> None:
+        super().__init__()
+        assert items
+        assert 0.0 <= target <= 100.0
+        assert budget is None or budget > 0
+        self._items = list(items)
+        self._target = target
+        self._budget = budget
+        self._period = utils.get_sim_steps(period, units)
+        self._start = utils.get_sim_time()
+
+    @property
+    def cycles(self) -> int:
+        """Number of cycles elapsed since the Closure was created."""
+        return (utils.get_sim_time() - self._start) // self._period
+
+    @property
+    def coverage(self) -> typing.Dict[str, float]:
+        """The current percentage of coverage of each cover item."""
+        return {item: coverage.coverage_db[item].cover_percentage for item in self._items}
+
+    @property
+    def covered(self) -> bool:
+        """Indicates every cover item reached the target."""
+        return all(percentage >= self._target for percentage in self.coverage.values())
+
+    @property
+    def expired(self) -> bool:
+        """Indicates the budget of cycles ran out."""
+        return self._budget is not None and self.cycles >= self._budget
+
+    def done(self) -> bool:
+        """Indicates the stimulus should stop, since either the coverage closed or the budget ran out."""
+        return self.covered or self.expired
@@ -10,10 +10,24 @@ class RunnerDict(typing.TypedDict):
     vhdl_sources: typing.Sequence[str]
 
 
+class ProfileDict(typing.TypedDict):
+    """Represents a named set of simulator options, selected per run.
+    build_args are global simulator options, applied to both the analysis and the elaboration of the design.
+    test_args are runtime options, applied when the simulation is run.
+    waves dumps the waveform of the simulation into the working directory, and log_enable, if set, overrides the log_enable of the yaml."""
+    build_args: typing.Sequence[str]
+    test_args: typing.Sequence[str]
+    waves: bool
+    log_enable: typing.NotRequired[bool]
+
+
 class ConfigDict(typing.TypedDict):
-    """Represents the configurations for the repo stored as a yaml."""
+    """Represents the configurations for the repo stored as a yaml.
+    profile is the name of the profile selected when neither a run nor the environment selects one."""
     runner: RunnerDict
     log_enable: bool
+    profile: typing.NotRequired[str]
+    profiles: typing.NotRequired[typing.Mapping[str, ProfileDict]]
 
 
 CONFIG_PATH = pathlib.Path(__file__).resolve().parent.parent / "config.yaml"
@@ -0,0 +1,98 @@
+"""
+Contains the Index, which knows which HDL sources each top level depends on.
+
+The Index scans the VHDL sources for the entities and packages they declare, and for the entities and packages
+they instantiate or use from the work library, e.g. "entity work.fifo" or "use work.types.all".
+From that, it resolves the transitive sources of a top level, in the order they must be analyzed,
+so only the sources a top level actually needs are compiled.
+
+The same information drives test-impact selection. The digest of a run hashes the transitive HDL sources of its top level,
+its Python test module, and the cocotb_introduction package. A run whose digest matches the digest recorded by its last passing run
+hasn't changed and can be skipped.
+"""
+import hashlib
+import importlib.util
+import os
+import pathlib
+import re
+import typing
+
+
+DECLARATION = re.compile(r"^\s*(?:entity|package)\s+(\w+)\s+is\b", re.IGNORECASE | re.MULTILINE)
+REFERENCE = re.compile(r"\b(?:entity\s+work\.(\w+)|use\s+work\.(\w+))", re.IGNORECASE)
+COMMENT = re.compile(r"--.*$", re.MULTILINE)
+DIGEST_FILE = "impact.sha256"
+PACKAGE_PATH = pathlib.Path(__file__).resolve().parent
+
+
+class UnknownUnit(BaseException):
+    """Indicates a design unit isn't declared by any of the indexed sources."""
+    pass
+
+
+class Index:
+    """Indexes the design units declared and referenced by each of the sources."""
+
+    def __init__(self, sources: typing.Iterable[os.PathLike | str]) -> None:
+        super().__init__()
+        self._sources: typing.List[pathlib.Path] = []
+        self._declared: typing.Dict[str, pathlib.Path] = {}
+        self._references: typing.Dict[pathlib.Path, typing.Set[str]] = {}
+        for source in sources:
+            path = pathlib.Path(source)
+            text = COMMENT.sub("", path.read_text())
+            self._sources.append(path)
+            for unit in DECLARATION.findall(text):
+                self._declared[unit.lower()] = path
+            self._references[path] = {(entity or package).lower() for entity, package in REFERENCE.findall(text)}
+
+    def declares(self, unit: str) -> bool:
+        """Indicates one of the sources declares unit."""
+        return unit.lower() in self._declared
+
+    def dependencies(self, source: os.PathLike | str) -> typing.List[pathlib.Path]:
+        """The sources declaring the units that source references directly. Units outside of the sources are ignored."""
+        path = pathlib.Path(source)
+        return sorted({self._declared[unit] for unit in self._references[path] if unit in self._declared} - {path})
+
+    def sources(self, toplevel: str) -> typing.List[pathlib.Path]:
+        """The transitive sources of toplevel, ordered such that every source comes after its dependencies."""
+        if not self.declares(toplevel):
+            raise UnknownUnit(toplevel)
+        ordered: typing.List[pathlib.Path] = []
+        visited: typing.Set[pathlib.Path] = set()
+
+        def visit(path: pathlib.Path) -> None:
+            if path in visited:
+                return
+            visited.add(path)
+            for dependency in self.dependencies(path):
+                visit(dependency)
+            ordered.append(path)
+
+        visit(self._declared[toplevel.lower()])
+        return ordered
+
+    def digest(self, toplevel: str, test_module: str) -> str:
+        """Hashes everything a run of test_module against toplevel depends on."""
+        hasher = hashlib.sha256()
+        paths = list(self.sources(toplevel))
+        spec = importlib.util.find_spec(test_module)
+        if spec is not None and spec.origin is not None:
+            paths.append(pathlib.Path(spec.origin))
+        paths.extend(sorted(PACKAGE_PATH.glob("*.py")))
+        for path in paths:
+            hasher.update(path.as_posix().encode())
+            hasher.update(path.read_bytes())
+        return hasher.hexdigest()
+
+
+def changed(work_path: os.PathLike | str, digest: str) -> bool:
+    """Indicates the digest differs from the digest recorded in work_path by the last passing run."""
+    path = pathlib.Path(work_path) / DIGEST_FILE
+    return not path.exists() or path.read_text().strip() != digest
+
+
+def record(work_path: os.PathLike | str, digest: str) -> None:
+    """Records the digest of a passing run in work_path."""
+    (pathlib.Path(work_path) / DIGEST_FILE).write_text(digest + "\n")
@@ -0,0 +1,461 @@
+"""
+Contains the ClockDomain, which steps the state machines of many interfaces from a single coroutine,
+along with the engine-driven versions of the valid, valid-ready, and fifo drivers and monitors.
+
+The drivers and monitors of cocotb_introduction.valid, cocotb_introduction.validready, and cocotb_introduction.fifo
+each start their own coroutines, which all await the rising edge of the same clock independently.
+With dozens of interfaces on one clock, that's dozens of scheduler wakeups per cycle.
+
+The ClockDomain instead awaits each rising edge once and steps the state machine of every active interface,
+i.e. an interface with outstanding messages, with a plain function call. Interfaces go inactive once they run out of messages,
+and the ClockDomain sleeps entirely once every interface is inactive, so the per-cycle overhead grows
+with the number of active interfaces, not the number of interfaces. A monitor goes inactive on the edges it observes nothing,
+and is activated again by an edge of the signals it samples, the same edges the coroutine monitors wait on.
+
+Each step happens in two phases, mirroring the drivers the engine replaces:
+    - the step, right after the rising edge, where the interfaces sample the values of the previous cycle, and
+    - the settle, in the ReadWrite phase after the edge, where the fifo interfaces drive the outputs
+      that depend on the fifo's registered status, e.g. valid depends on almost_full.
+
+The engine-driven drivers and monitors share the public interface of the drivers and monitors they replace,
+so they're interchangeable, apart from taking the ClockDomain in place of the clk and rst.
+"""
+import cocotb
+import cocotb.handle as handle
+import cocotb.triggers as triggers
+import cocotb.utils as utils
+import typing
+from .queue import Queue
+from .messages import WriteMessage, ReadMessage, MonitorMessage
+from . import packed
+from . import watchdog
+if typing.TYPE_CHECKING:
+    from .recorder import Channel
+
+
+M = typing.TypeVar("M", WriteMessage, ReadMessage)
+
+
+class Port:
+    """The state machine of a single interface, stepped by its ClockDomain.
+    Subclasses override step, and settle and reset if needed."""
+
+    settles: bool = False
+    """Indicates the ClockDomain must call settle in the ReadWrite phase of each edge the Port is stepped on."""
+
+    def __init__(self, domain: "ClockDomain") -> None:
+        super().__init__()
+        self._domain = domain
+        domain.register(self)
+
+    def step(self) -> bool:
+        """Called right after each rising edge while active. Returns whether the Port remains active."""
+        raise NotImplementedError()
+
+    def settle(self) -> None:
+        """Called in the ReadWrite phase of each edge the Port is stepped on, if settles is set."""
+        pass
+
+    def reset(self) -> None:
+        """Called on each rising edge while the reset is asserted, active or not."""
+        pass
+
+
+class ClockDomain:
+    """Steps the Ports registered with it, which all share the clk and the synchronous assert-high rst."""
+
+    def __init__(self, clk: handle.SimHandleBase, rst: handle.SimHandleBase) -> None:
+        super().__init__()
+        self._clk = clk
+        self._rst = rst
+        self._ports: typing.List[Port] = []
+        self._active: typing.Dict[Port, None] = {}
+        self._wake = triggers.Event()
+        cocotb.start_soon(self._run())
+
+    @property
+    def clk(self) -> handle.SimHandleBase:
+        """The clock of the domain."""
+        return self._clk
+
+    @property
+    def active(self) -> int:
+        """Number of active Ports."""
+        return len(self._active)
+
+    def register(self, port: Port) -> None:
+        """Registers port, which starts inactive."""
+        self._ports.append(port)
+
+    def activate(self, port: Port) -> None:
+        """Steps port from the next rising edge on, until it goes inactive."""
+        self._active[port] = None
+        self._wake.set()
+
+    async def _run(self) -> None:
+        while True:
+            if not self._active:
+                self._wake.clear()
+                await self._wake.wait()
+            await triggers.RisingEdge(self._clk)
+            if self._rst.value.binstr != "0":
+                for port in self._ports:
+                    port.reset()
+                await triggers.FallingEdge(self._rst)
+                continue
+            stepped = list(self._active)
+            for port in stepped:
+                if not port.step():
+                    del self._active[port]
+            settling = [port for port in stepped if port.settles]
+            if settling:
+                await triggers.ReadWrite()
+                for port in settling:
+                    port.settle()
+
+
+class _Driver(Port):
+    """Holds the messages of a driver, including the countdown of the delay of the next message."""
+
+    def __init__(self, domain: ClockDomain, record: typing.Optional["Channel"]) -> None:
+        super().__init__(domain)
+        self._messages = Queue[typing.Any]()
+        watchdog.register(self)
+        self._msg: typing.Any = None
+        self._wait = 0
+        self._record = record
+
+    def _submit(self, message: M) -> M:
+        self._messages.push(message)
+        self._domain.activate(self)
+        return message
+
+    def _next(self) -> bool:
+        """Starts the next message, once its delay elapsed. Returns whether a message was started."""
+        if self._wait:
+            self._wait -= 1
+            if self._wait:
+                return False
+        if self._messages.empty:
+            return False
+        if self._messages.peek().delay:
+            self._wait = self._messages.peek()._hold()
+            return False
+        self._msg = self._messages.pop()
+        self._msg._start()
+        return True
+
+    @property
+    def _busy(self) -> bool:
+        return self._msg is not None or self._wait != 0 or not self._messages.empty
+
+    def reset(self) -> None:
+        assert self._msg is None, "Reset occurred during an outstanding message."
+        self._wait = 0
+
+
+class ValidDriver(_Driver):
+    """Writes messages to the valid interface. The lifecycle events of the messages are recorded to record, if specified."""
+
+    def __init__(
+        self,
+        domain: ClockDomain,
+        valid: handle.SimHandleBase,
+        data: handle.SimHandleBase,
+        record: typing.Optional["Channel"] = None
+    ) -> None:
+        super().__init__(domain, record)
+        self._valid = valid
+        self._data = data
+        valid.value = 0
+
+    def step(self) -> bool:
+        if self._msg is not None:
+            self._msg._process()
+            if self._record is not None:
+                self._record.processed(self._msg.data)
+            self._msg = None
+            self._valid.value = 0
+        if self._next():
+            if self._record is not None:
+                self._record.started(self._msg.data)
+            packed.write(self._data, self._msg.data)
+            self._valid.value = 1
+        return self._busy
+
+    def reset(self) -> None:
+        super().reset()
+        self._valid.value = 0
+
+    def write(self, data: int, delay: int = 0) -> WriteMessage:
+        """Submit a write message to the driver. The driver holds off for delay cycles before writing the data."""
+        return self._submit(WriteMessage(data, delay))
+
+
+class ValidReadyWriteDriver(_Driver):
+    """Writes data to the valid-ready interface. The lifecycle events of the messages are recorded to record, if specified."""
+
+    def __init__(
+        self,
+        domain: ClockDomain,
+        valid: handle.SimHandleBase,
+        ready: handle.SimHandleBase,
+        data: handle.SimHandleBase,
+        record: typing.Optional["Channel"] = None
+    ) -> None:
+        super().__init__(domain, record)
+        self._valid = valid
+        self._ready = ready
+        self._data = data
+        valid.value = 0
+
+    def step(self) -> bool:
+        if self._msg is not None and self._ready.value.integer == 1:
+            self._msg._process()
+            if self._record is not None:
+                self._record.processed(self._msg.data)
+            self._msg = None
+            self._valid.value = 0
+        if self._msg is None and self._next():
+            if self._record is not None:
+                self._record.started(self._msg.data)
+            packed.write(self._data, self._msg.data)
+            self._valid.value = 1
+        return self._busy
+
+    def reset(self) -> None:
+        super().reset()
+        self._valid.value = 0
+
+    def write(self, data: int, delay: int = 0) -> WriteMessage:
+        """Submit a write message to the driver. The driver holds off for delay cycles before writing the data."""
+        return self._submit(WriteMessage(data, delay))
+
+
+class ValidReadyReadDriver(_Driver):
+    """Reads data from the valid-ready interface. The lifecycle events of the messages are recorded to record, if specified."""
+
+    def __init__(
+        self,
+        domain: ClockDomain,
+        valid: handle.SimHandleBase,
+        ready: handle.SimHandleBase,
+        data: handle.SimHandleBase,
+        record: typing.Optional["Channel"] = None
+    ) -> None:
+        super().__init__(domain, record)
+        self._valid = valid
+        self._ready = ready
+        self._data = data
+        ready.value = 0
+
+    def step(self) -> bool:
+        if self._msg is not None and self._valid.value.integer == 1:
+            self._msg._process(packed.read(self._data))
+            if self._record is not None:
+                self._record.processed(self._msg.data)
+            self._msg = None
+            self._ready.value = 0
+        if self._msg is None and self._next():
+            if self._record is not None:
+                self._record.started()
+            self._ready.value = 1
+        return self._busy
+
+    def reset(self) -> None:
+        super().reset()
+        self._ready.value = 0
+
+    def read(self, delay: int = 0) -> ReadMessage:
+        """Submit a read message to the driver. The driver holds off for delay cycles before reading the data."""
+        return self._submit(ReadMessage(delay))
+
+
+class FifoWriteDriver(_Driver):
+    """Writes data to the fifo. The lifecycle events of the messages are recorded to record, if specified.
+    Once almost_full is asserted, at most DEPTH - ALMOST_FULL_DEPTH more words are written until it deasserts."""
+
+    settles = True
+
+    def __init__(
+        self,
+        domain: ClockDomain,
+        almost_full: handle.SimHandleBase,
+        full: handle.SimHandleBase,
+        valid: handle.SimHandleBase,
+        data_in: handle.SimHandleBase,
+        DEPTH: int,
+        ALMOST_FULL_DEPTH: int,
+        record: typing.Optional["Channel"] = None
+    ) -> None:
+        super().__init__(domain, record)
+        self._almost_full = almost_full
+        self._valid = valid
+        self._data_in = data_in
+        self._cnt = 0
+        self._cnt_end = DEPTH - ALMOST_FULL_DEPTH
+        valid.value = 0
+
+    def step(self) -> bool:
+        almost_full = self._almost_full.value.integer
+        if self._msg is not None and (almost_full == 0 or self._cnt != self._cnt_end):
+            self._msg._process()
+            if self._record is not None:
+                self._record.processed(self._msg.data)
+            self._msg = None
+        if self._msg is None and self._next():
+            if self._record is not None:
+                self._record.started(self._msg.data)
+            packed.write(self._data_in, self._msg.data)
+        if almost_full == 0:
+            self._cnt = 0
+        elif self._msg is not None and self._cnt != self._cnt_end:
+            self._cnt += 1
+        # The count only resets while almost_full is deasserted, so stay active until then.
+        return self._busy or self._cnt != 0
+
+    def settle(self) -> None:
+        self._valid.value = int((self._almost_full.value.binstr == "0" or self._cnt != self._cnt_end) and self._msg is not None)
+
+    def reset(self) -> None:
+        super().reset()
+        self._cnt = 0
+
+    def write(self, data: int, delay: int = 0) -> WriteMessage:
+        """Submit a write message to the driver. The driver holds off for delay cycles before writing the data."""
+        return self._submit(WriteMessage(data, delay))
+
+
+class FifoReadDriver(_Driver):
+    """Reads data from the fifo. The lifecycle events of the messages are recorded to record, if specified."""
+
+    settles = True
+
+    def __init__(
+        self,
+        domain: ClockDomain,
+        empty: handle.SimHandleBase,
+        ack: handle.SimHandleBase,
+        data_out: handle.SimHandleBase,
+        record: typing.Optional["Channel"] = None
+    ) -> None:
+        super().__init__(domain, record)
+        self._empty = empty
+        self._ack = ack
+        self._data_out = data_out
+        ack.value = 0
+
+    def step(self) -> bool:
+        if self._msg is not None and self._empty.value.integer == 0:
+            self._msg._process(packed.read(self._data_out))
+            if self._record is not None:
+                self._record.processed(self._msg.data)
+            self._msg = None
+        if self._msg is None and self._next():
+            if self._record is not None:
+                self._record.started()
+        return self._busy
+
+    def settle(self) -> None:
+        self._ack.value = int(self._empty.value.binstr == "0" and self._msg is not None)
+
+    def read(self, delay: int = 0) -> ReadMessage:
+        """Submit a read message to the driver. The driver holds off for delay cycles before reading the data."""
+        return self._submit(ReadMessage(delay))
+
+
+class _Monitor(Port):
+    """Holds the latest message of a monitor. Once a step observes nothing, the monitor goes inactive,
+    and a coroutine awaiting an edge of any of the signals the monitor samples activates it again."""
+
+    def __init__(
+        self,
+        domain: ClockDomain,
+        data: handle.SimHandleBase,
+        record: typing.Optional["Channel"],
+        signals: typing.Sequence[handle.SimHandleBase]
+    ) -> None:
+        super().__init__(domain)
+        self._data = data
+        self._record = record
+        self._signals = signals
+        self._msg: typing.Optional[MonitorMessage] = None
+        self._evt = triggers.Event()
+        self._idle = triggers.Event()
+        domain.activate(self)
+        cocotb.start_soon(self._watch())
+
+    async def _watch(self) -> None:
+        while True:
+            await self._idle.wait()
+            self._idle.clear()
+            await triggers.First(*(triggers.Edge(signal) for signal in self._signals))
+            self._domain.activate(self)
+
+    def _sleep(self) -> bool:
+        """Goes inactive until the next edge of the signals. Returns False, for step to return."""
+        self._idle.set()
+        return False
+
+    def _observe(self) -> None:
+        self._msg = MonitorMessage(packed.read(self._data), utils.get_sim_time())
+        if self._record is not None:
+            self._record.observed(self._msg.data)
+        self._evt.set()
+
+    def reset(self) -> None:
+        self._msg = None
+
+    @property
+    def event(self) -> triggers.PythonTrigger:
+        """Current task resumes when a new message is available on the monitor."""
+        self._evt.clear()
+        return self._evt.wait()
+
+    @property
+    def message(self) -> MonitorMessage:
+        """The current message available on the monitor. Must await on the event first before accessing this property."""
+        assert self._msg is not None, "The monitor's event must be awaited prior to retreiving a message."
+        return self._msg
+
+
+class ValidMonitor(_Monitor):
+    """Observes a valid interface. The observed messages are recorded to record, if specified."""
+
+    def __init__(
+        self,
+        domain: ClockDomain,
+        valid: handle.SimHandleBase,
+        data: handle.SimHandleBase,
+        record: typing.Optional["Channel"] = None
+    ) -> None:
+        super().__init__(domain, data, record, (valid,))
+        self._valid = valid
+
+    def step(self) -> bool:
+        if self._valid.value.integer == 1:
+            self._observe()
+            return True
+        return self._sleep()
+
+
+class ValidReadyMonitor(_Monitor):
+    """Observes a valid-ready interface. The observed messages are recorded to record, if specified."""
+
+    def __init__(
+        self,
+        domain: ClockDomain,
+        valid: handle.SimHandleBase,
+        ready: handle.SimHandleBase,
+        data: handle.SimHandleBase,
+        record: typing.Optional["Channel"] = None
+    ) -> None:
+        super().__init__(domain, data, record, (valid, ready))
+        self._valid = valid
+        self._ready = ready
+
+    def step(self) -> bool:
+        if self._valid.value.integer == 1 and self._ready.value.integer == 1:
+            self._observe()
+            return True
+        return self._sleep()
@@ -5,11 +5,20 @@ import cocotb.triggers as triggers
 import cocotb
 from .messages import WriteMessage, ReadMessage
 from .queue import Queue
+from .timing import hold, Throttle
+from . import packed
+from . import watchdog
 import cocotb.handle as handle
+import typing
+if typing.TYPE_CHECKING:
+    from .recorder import Channel
+    from .stream import BeatBuffer
 
 
 class FifoWriteDriver:
-    """Writes data to the fifo."""
+    """Writes data to the fifo. The lifecycle events of the messages are recorded to record, if specified.
+    If a throttle is specified, a message only starts on the cycles the throttle allows.
+    The data of the messages is published to publish once written, if specified. See cocotb_introduction.stream for more information."""
 
     def __init__(
         self,
@@ -20,77 +29,101 @@ class FifoWriteDriver:
         valid: handle.SimHandleBase,
         data_in: handle.SimHandleBase,
         DEPTH: int,
-        ALMOST_FULL_DEPTH: int
+        ALMOST_FULL_DEPTH: int,
+        record: typing.Optional["Channel"] = None,
+        throttle: typing.Optional[Throttle] = None,
+        publish: typing.Optional["BeatBuffer"] = None
     ) -> None:
         super().__init__()
         self._messages = Queue[WriteMessage]()
-        msg = None
+        watchdog.register(self)
+        self._throttle = throttle
+        self._msg: typing.Optional[WriteMessage] = None
         msg_evt = triggers.Event()
-        cnt = 0
-        cnt_end = DEPTH - ALMOST_FULL_DEPTH
+        self._cnt = 0
+        self._cnt_end = DEPTH - ALMOST_FULL_DEPTH
         cnt_evt = triggers.Event()
 
         async def drive_cnt() -> None:
-            nonlocal msg, cnt
             while True:
                 await triggers.RisingEdge(clk)
                 await triggers.NullTrigger() # Reschedules the task; need to make sure drive_data always occurs first
                 if rst.value.binstr != "0":
-                    cnt = 0
+                    self._cnt = 0
                     await triggers.FallingEdge(rst)
                 else:
                     if almost_full.value.integer == 0:
-                        cnt = 0
+                        self._cnt = 0
                         cnt_evt.set()
                         await triggers.RisingEdge(almost_full)
-                    elif msg is not None and cnt != cnt_end:
-                        cnt += 1
+                    elif self._msg is not None and self._cnt != self._cnt_end:
+                        self._cnt += 1
                         cnt_evt.set()
 
         async def drive_valid() -> None:
-            nonlocal msg, cnt
             while True:
-                valid.value = int((almost_full.value.binstr == "0" or cnt != cnt_end) and msg is not None)
+                valid.value = int((almost_full.value.binstr == "0" or self._cnt != self._cnt_end) and self._msg is not None)
                 msg_evt.clear()
                 cnt_evt.clear()
                 await triggers.First(triggers.Edge(almost_full), msg_evt.wait(), cnt_evt.wait())
 
         async def drive_data() -> None:
-            nonlocal msg, cnt
             while True:
                 await triggers.RisingEdge(clk)
                 if rst.value.binstr != "0":
-                    assert msg is None, "Reset occurred during outstanding message"
+                    assert self._msg is None, "Reset occurred during outstanding message"
                     await triggers.FallingEdge(rst)
                 else:
-                    if (almost_full.value.integer == 0 or cnt != cnt_end) and msg is not None:
-                        msg._process()
-                        msg = None
+                    if (almost_full.value.integer == 0 or self._cnt != self._cnt_end) and self._msg is not None:
+                        self._msg._process()
+                        if record is not None:
+                            record.processed(self._msg.data)
+                        if publish is not None:
+                            publish.publish(self._msg.data)
+                        self._msg = None
                         msg_evt.set()
-                    if msg is None and not self._messages.empty:
-                        msg = self._messages.pop()
-                        data_in.value = msg.data
-                        msg._start()
+                    if self._msg is None and not self._messages.empty and self._messages.peek().delay:
+                        await hold(clk, self._messages.peek()._hold())
+                        continue
+                    if self._msg is None and not self._messages.empty and (self._throttle is None or self._throttle.next()):
+                        self._msg = self._messages.pop()
+                        packed.write(data_in, self._msg.data)
+                        self._msg._start()
+                        if record is not None:
+                            record.started(self._msg.data)
                         msg_evt.set()
-                    if msg is not None and almost_full.value.integer == 1 and cnt == cnt_end:
+                    if self._msg is not None and almost_full.value.integer == 1 and self._cnt == self._cnt_end:
                         cnt_evt.clear()
                         await triggers.First(triggers.Edge(rst), triggers.Edge(almost_full), cnt_evt.wait())
-                    elif msg is None and self._messages.empty:
+                    elif self._msg is None and self._messages.empty:
                         await triggers.First(triggers.Edge(rst), self._messages.event)
 
         cocotb.start_soon(drive_valid())
         cocotb.start_soon(drive_data())
         cocotb.start_soon(drive_cnt())
 
-    def write(self, data: int) -> WriteMessage:
-        """Submit a write message to the driver."""
-        message = WriteMessage(data)
+    @property
+    def throttle(self) -> typing.Optional[Throttle]:
+        """The throttle deciding on which cycles messages can start."""
+        return self._throttle
+
+    @throttle.setter
+    def throttle(self, throttle: typing.Optional[Throttle]) -> None:
+        self._throttle = throttle
+
+    def write(self, data: int, delay: int = 0) -> WriteMessage:
+        """Submit a write message to the driver. The driver holds off for delay cycles before writing the data."""
+        message = WriteMessage(data, delay)
         self._messages.push(message)
         return message
 
 
 class FifoReadDriver:
-    """Reads data from the fifo."""
+    """Reads data from the fifo. The lifecycle events of the messages are recorded to record, if specified.
+    If a throttle is specified, ack is only asserted on the cycles the throttle allows.
+
+    In sink mode, the driver reads data without any read messages, e.g. when the data is checked through a monitor instead.
+    The data read in sink mode is still recorded to record."""
 
     def __init__(
         self,
@@ -98,46 +131,87 @@ class FifoReadDriver:
         rst: handle.SimHandleBase,
         empty: handle.SimHandleBase,
         ack: handle.SimHandleBase,
-        data_out: handle.SimHandleBase
+        data_out: handle.SimHandleBase,
+        record: typing.Optional["Channel"] = None,
+        throttle: typing.Optional[Throttle] = None
     ) -> None:
         super().__init__()
         self._messages = Queue[ReadMessage]()
-        msg = None
+        watchdog.register(self)
+        self._throttle = throttle
+        self._sink = False
+        self._sink_evt = triggers.Event()
+        self._msg: typing.Optional[ReadMessage] = None
         msg_evt = triggers.Event()
+        self._allowed = throttle is None
+        sinking = False
 
         async def drive_ack() -> None:
-            nonlocal msg
             while True:
-                ack.value = int(empty.value.binstr == "0" and msg is not None)
+                ack.value = int(empty.value.binstr == "0" and (self._msg is not None or self._sink) and self._allowed)
                 msg_evt.clear()
                 await triggers.First(triggers.Edge(empty), msg_evt.wait())
 
         async def drive_data() -> None:
-                nonlocal msg
+                nonlocal sinking
                 while True:
                     await triggers.RisingEdge(clk)
                     if rst.value.binstr != "0":
-                        assert msg is None, "Reset occurred during outstanding message"
+                        assert self._msg is None, "Reset occurred during outstanding message"
                         await triggers.FallingEdge(rst)
                     else:
-                        if empty.value.integer == 0 and msg is not None:
-                            msg._process(data_out.value.integer)
-                            msg = None
+                        if empty.value.integer == 0 and (self._msg is not None or self._sink) and self._allowed:
+                            if self._msg is not None:
+                                self._msg._process(packed.read(data_out))
+                                if record is not None:
+                                    record.processed(self._msg.data)
+                                self._msg = None
+                                msg_evt.set()
+                            elif record is not None:
+                                record.processed(packed.read(data_out))
+                        if self._msg is None and not self._messages.empty and self._messages.peek().delay:
+                            await hold(clk, self._messages.peek()._hold())
+                            continue
+                        if self._msg is None and not self._messages.empty:
+                            self._msg = self._messages.pop()
+                            self._msg._start()
+                            if record is not None:
+                                record.started()
                             msg_evt.set()
-                        if msg is None and not self._messages.empty:
-                            msg = self._messages.pop()
-                            msg._start()
+                        # ack only changes along with the message, the sink mode, or the throttle,
+                        # so drive_ack is only woken on their transitions, rather than every cycle.
+                        previous = self._allowed
+                        self._allowed = self._throttle is None or self._throttle.next()
+                        if self._allowed != previous or sinking != self._sink:
+                            sinking = self._sink
                             msg_evt.set()
-                        if msg is not None and empty.value.integer == 1:
+                        if (self._msg is not None or self._sink) and self._throttle is None and empty.value.integer == 1:
                             await triggers.First(triggers.Edge(rst), triggers.Edge(empty))
-                        elif msg is None and self._messages.empty:
-                            await triggers.First(triggers.Edge(rst), self._messages.event)
+                        elif self._msg is None and not self._sink and self._messages.empty:
+                            self._sink_evt.clear()
+                            await triggers.First(triggers.Edge(rst), self._messages.event, self._sink_evt.wait())
 
         cocotb.start_soon(drive_ack())
         cocotb.start_soon(drive_data())
 
-    def read(self) -> ReadMessage:
-        """Submit a read message to the driver."""
-        message = ReadMessage()
+    @property
+    def throttle(self) -> typing.Optional[Throttle]:
+        """The throttle deciding on which cycles ack is asserted."""
+        return self._throttle
+
+    @throttle.setter
+    def throttle(self, throttle: typing.Optional[Throttle]) -> None:
+        self._throttle = throttle
+
+    def sink(self, enable: bool = True) -> None:
+        """Switches sink mode on or off. Sink mode can't be mixed with read messages."""
+        assert self._messages.empty, "Sink mode can't be switched with outstanding read messages."
+        self._sink = enable
+        self._sink_evt.set()
+
+    def read(self, delay: int = 0) -> ReadMessage:
+        """Submit a read message to the driver. The driver holds off for delay cycles before reading the data."""
+        assert not self._sink, "Read messages can't be submitted in sink mode."
+        message = ReadMessage(delay)
         self._messages.push(message)
         return message
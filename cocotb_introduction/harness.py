@@ -0,0 +1,106 @@
+"""
+Contains the generator of multi-instance harnesses.
+
+Every point of a sweep is normally its own simulation, which pays for its own build, simulator startup, and clock.
+A harness instead instantiates many configurations of a design side by side, under one shared clock and reset,
+so a whole sweep runs in a single simulation. The ports of each instance are brought out to the harness's top level,
+prefixed with the name of the instance, e.g. "fifo_w8_d32_af16_valid", so a testbench binds its own drivers and monitors to each instance.
+
+The harness is generated into a VHDL source, which is passed to runner.run along with the top level of the harness.
+"""
+import os
+import pathlib
+import typing
+
+
+Port = typing.Tuple[str, typing.Optional[str]]
+"""The direction of a port, "in" or "out", and the generic dictating its width, or None if the port is a single bit."""
+
+
+FIFO_PORTS: typing.Mapping[str, Port] = {
+    "empty": ("out", None),
+    "overflow": ("out", None),
+    "underflow": ("out", None),
+    "full": ("out", None),
+    "almost_full": ("out", None),
+    "valid": ("in", None),
+    "ack": ("in", None),
+    "data_in": ("in", "WIDTH"),
+    "data_out": ("out", "WIDTH")}
+"""The ports of the fifo and the bfifo, other than the clock and reset."""
+
+
+class Instance(typing.NamedTuple):
+    """A single instance of a harness, i.e. the entity instantiated and the generics it's instantiated with.
+    The name must be unique within the harness and a valid VHDL identifier."""
+    name: str
+    entity: str
+    generics: typing.Mapping[str, int]
+
+    def port(self, port: str) -> str:
+        """The name of the harness's port connected to port of the instance."""
+        return f"{self.name}_{port}"
+
+
+def generate(toplevel: str, instances: typing.Sequence[Instance], ports: typing.Mapping[str, Port] = FIFO_PORTS) -> str:
+    """Generates the VHDL of the harness toplevel, instantiating every instance with the given ports.
+    Every instance shares the clk and rst ports of the harness."""
+    assert instances
+    assert len({instance.name for instance in instances}) == len(instances), "The name of each instance must be unique."
+
+    def port_type(instance: Instance, width: typing.Optional[str]) -> str:
+        if width is None:
+            return "std_logic"
+        return f"std_logic_vector({instance.generics[width]}-1 downto 0)"
+
+    declarations = ["        clk : in std_logic", "        rst : in std_logic"]
+    for instance in instances:
+        for port, (direction, width) in ports.items():
+            declarations.append(f"        {instance.port(port)} : {direction} {port_type(instance, width)}")
+
+    bodies = []
+    for instance in instances:
+        generics = ",\n".join(f"            {generic} => {value}" for generic, value in instance.generics.items())
+        mappings = ",\n".join(
+            [f"            clk => clk", f"            rst => rst"] +
+            [f"            {port} => {instance.port(port)}" for port in ports])
+        bodies.append(
+            f"    {instance.name}_inst : entity work.{instance.entity}\n" +
+            (f"        generic map (\n{generics})\n" if instance.generics else "") +
+            f"        port map (\n{mappings});\n")
+
+    return (
+        "-- Generated by cocotb_introduction.harness. Do not edit.\n"
+        "library ieee;\n"
+        "use ieee.std_logic_1164.all;\n"
+        "\n"
+        f"entity {toplevel} is\n"
+        "    port (\n" +
+        ";\n".join(declarations) + ");\n" +
+        f"end entity {toplevel};\n"
+        "\n"
+        f"architecture rtl of {toplevel} is\n"
+        "begin\n"
+        "\n" +
+        "\n".join(bodies) +
+        "\n"
+        "end architecture rtl;\n")
+
+
+def write(
+    directory: os.PathLike | str,
+    toplevel: str,
+    instances: typing.Sequence[Instance],
+    ports: typing.Mapping[str, Port] = FIFO_PORTS
+) -> pathlib.Path:
+    """Generates the harness into the VHDL source toplevel.vhd of directory, returning the path of the source.
+    The source is only rewritten, atomically, if its contents changed, so unchanged harnesses don't look changed to cocotb_introduction.depends."""
+    path = pathlib.Path(directory) / f"{toplevel}.vhd"
+    path.parent.mkdir(parents=True, exist_ok=True)
+    text = generate(toplevel, instances, ports)
+    if not path.exists() or path.read_text() != text:
+        # Written aside and renamed into place, since concurrent workers may generate and compile the same source.
+        staging = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+        staging.write_text(text)
+        os.replace(staging, path)
+    return path
@@ -0,0 +1,72 @@
+"""
+Contains the History, a small local database of how long each sweep point took to run.
+
+runner.run_sweep schedules the sweep points longest-expected-first across its workers,
+so the long points don't end up running alone at the end of the sweep while the other workers sit idle.
+The expected time of each point comes from the History, which is updated from the results.xml of each run.
+"""
+import contextlib
+import os
+import pathlib
+import sqlite3
+import typing
+import xml.etree.ElementTree as ElementTree
+
+
+HISTORY_ENV = "SWEEP_HISTORY"
+"""Environmental variable holding the path of the database. Defaults to DEFAULT_PATH within the current directory."""
+DEFAULT_PATH = ".sweep_history.sqlite"
+
+
+def results_time(results: os.PathLike | str) -> float:
+    """Sums the wall times, in seconds, of every testcase in a results.xml."""
+    tree = ElementTree.parse(results)
+    return sum(float(testcase.get("time", 0.0)) for testcase in tree.iter("testcase"))
+
+
+class History:
+    """Persists the wall time of each sweep point, keyed by a unique name of the point such as its working directory.
+    Each new time is blended into the stored time with an exponential moving average, weighted by smoothing."""
+
+    def __init__(self, path: typing.Optional[os.PathLike | str] = None, smoothing: float = 0.5) -> None:
+        super().__init__()
+        assert 0.0 < smoothing <= 1.0
+        if path is None:
+            path = os.environ.get(HISTORY_ENV, DEFAULT_PATH)
+        self._path = pathlib.Path(path)
+        self._smoothing = smoothing
+        with self._connect() as connection:
+            connection.execute("CREATE TABLE IF NOT EXISTS history (key TEXT PRIMARY KEY, seconds REAL NOT NULL, runs INTEGER NOT NULL)")
+
+    def expected(self, keys: typing.Iterable[str]) -> typing.Dict[str, float]:
+        """The expected wall time of each key. Keys without any history are expected to take the mean of the known keys."""
+        keys = list(keys)
+        with self._connect() as connection:
+            rows = dict(connection.execute("SELECT key, seconds FROM history").fetchall())
+        default = sum(rows.values()) / len(rows) if rows else 0.0
+        return {key: rows.get(key, default) for key in keys}
+
+    def update(self, key: str, seconds: float) -> None:
+        """Blends the latest wall time of key into its history."""
+        with self._connect() as connection:
+            row = connection.execute("SELECT seconds, runs FROM history WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                connection.execute("INSERT INTO history (key, seconds, runs) VALUES (?, ?, 1)", (key, seconds))
+            else:
+                blended = (1.0 - self._smoothing) * row[0] + self._smoothing * seconds
+                connection.execute("UPDATE history SET seconds = ?, runs = ? WHERE key = ?", (blended, row[1] + 1, key))
+
+    def order(self, keys: typing.Iterable[str]) -> typing.List[str]:
+        """Orders the keys longest-expected-first. Ties keep their original order."""
+        expected = self.expected(keys)
+        return sorted(expected, key=lambda key: -expected[key])
+
+    @contextlib.contextmanager
+    def _connect(self) -> typing.Iterator[sqlite3.Connection]:
+        """Opens a connection that commits on success, rolls back on failure, and is closed either way."""
+        connection = sqlite3.connect(self._path, timeout=30.0)
+        try:
+            with connection:
+                yield connection
+        finally:
+            connection.close()
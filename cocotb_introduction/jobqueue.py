@@ -0,0 +1,253 @@
+"""
+Contains the JobQueue, which spreads the runs of a sweep across processes and hosts sharing a filesystem.
+
+The queue is a directory with four subdirectories, one file per job, and no service behind it:
+    - pending holds the jobs yet to be claimed, named <priority>-<work>.<attempt>.yaml, so claiming them in name order
+      runs them longest-expected-first, as ordered by the coordinator.
+    - claimed holds the jobs being run. A worker claims a job by renaming it from pending into claimed.
+      The rename is atomic, so exactly one worker wins each job.
+    - done holds the result of each job that passed, named <work>.yaml.
+    - failed holds the result of each job that failed, named <work>.yaml, along with the error of its worker.
+
+A worker keeps the lease of its job alive by touching the claimed file every heartbeat.
+A job whose claimed file isn't touched for longer than the lease, e.g. because its worker crashed or its host went down,
+is put back into pending by whichever process notices first, with its attempt incremented.
+A job that expires max_attempts times is abandoned, i.e. recorded in failed.
+
+The workers run the jobs with runner.run, from their current directory, so every worker and the coordinator
+must run from the same directory of the shared filesystem. The lease relies on the modification times of the claimed files,
+so the clocks of the hosts must roughly agree, i.e. far better than the lease.
+
+runner.run_sweep acts as the coordinator when given a queue directory, e.g. through the SWEEP_QUEUE environmental variable.
+It submits the runs, starts its local workers, and waits for the results, which it records like any other run.
+Workers on other hosts are started with the sweep-worker task of tests/tasks.py.
+"""
+import concurrent.futures
+import os
+import pathlib
+import socket
+import threading
+import time
+import traceback
+import typing
+import yaml
+from . import history
+from . import runner
+
+
+PENDING = "pending"
+CLAIMED = "claimed"
+DONE = "done"
+FAILED = "failed"
+
+
+class JobFailed(BaseException):
+    """Indicates a job failed, carrying the error recorded by its worker."""
+    pass
+
+
+class Result(typing.TypedDict):
+    """Represents the result of a job, as recorded in done or failed."""
+    work: str
+    passed: bool
+    seconds: float
+    error: typing.Optional[str]
+    worker: typing.Optional[str]
+    attempt: int
+
+
+Execute = typing.Callable[[runner.RunDict], float]
+"""Runs the run of a job, returning its wall time in seconds, or raising if it fails."""
+
+
+def execute(arguments: runner.RunDict) -> float:
+    """Runs the run of a job with runner.run, returning the wall time of its results.
+    runner.run raises if any test of the run fails, so the job is then recorded as failed."""
+    return history.results_time(runner.run(**arguments))
+
+
+class Job(typing.NamedTuple):
+    """A job, as named by its file."""
+    priority: int
+    work: str
+    attempt: int
+
+    @property
+    def name(self) -> str:
+        return f"{self.priority:06d}-{self.work}.{self.attempt}.yaml"
+
+    @classmethod
+    def parse(cls, name: str) -> "Job":
+        stem, attempt = name.removesuffix(".yaml").rsplit(".", 1)
+        priority, work = stem.split("-", 1)
+        return cls(int(priority), work, int(attempt))
+
+
+def _write(path: pathlib.Path, content: typing.Any) -> None:
+    """Writes content as yaml aside, then renames it into place, so readers never see a partial file."""
+    staging = path.with_name(f".{path.name}.{socket.gethostname()}.{os.getpid()}.tmp")
+    with open(staging, "w") as file:
+        yaml.safe_dump(content, file, sort_keys=False)
+    os.replace(staging, path)
+
+
+class JobQueue:
+    """The queue of jobs within the directory root. lease is the number of seconds a claimed job stays claimed without a heartbeat."""
+
+    def __init__(self, root: os.PathLike | str, lease: float = 120.0, max_attempts: int = 3) -> None:
+        super().__init__()
+        assert lease > 0
+        assert max_attempts > 0
+        self._root = pathlib.Path(root)
+        self._lease = lease
+        self._max_attempts = max_attempts
+        for state in (PENDING, CLAIMED, DONE, FAILED):
+            (self._root / state).mkdir(parents=True, exist_ok=True)
+
+    def _path(self, state: str, name: str) -> pathlib.Path:
+        return self._root / state / name
+
+    def _jobs(self, state: str) -> typing.List[Job]:
+        return sorted(Job.parse(name) for name in os.listdir(self._root / state) if name.endswith(".yaml") and not name.startswith("."))
+
+    def submit(self, runs: typing.Sequence[runner.RunDict], poll: float = 1.0) -> None:
+        """Submits the runs in order of priority, i.e. the first run is claimed first.
+        The previous result of each run, if any, is discarded, and so is any job of the run left pending, e.g. by a crashed coordinator.
+        A job of the run left claimed is waited on, polling every poll seconds, until it completes or its lease expires,
+        so no two workers ever run the same work, i.e. in the same working directory, at once."""
+        works = {arguments["work"] for arguments in runs}
+        while True:
+            self.expire()
+            for job in self._jobs(PENDING):
+                if job.work in works:
+                    self._path(PENDING, job.name).unlink(missing_ok=True)
+            if not any(job.work in works for job in self._jobs(CLAIMED)):
+                break
+            time.sleep(poll)
+        for priority, arguments in enumerate(runs):
+            for state in (DONE, FAILED):
+                self._path(state, f"{arguments['work']}.yaml").unlink(missing_ok=True)
+            _write(self._path(PENDING, Job(priority, arguments["work"], 1).name), dict(arguments))
+
+    def claim(self) -> typing.Optional[typing.Tuple[Job, runner.RunDict]]:
+        """Claims the pending job of the highest priority, returning it along with its run, or None if no job is pending."""
+        for job in self._jobs(PENDING):
+            try:
+                os.rename(self._path(PENDING, job.name), self._path(CLAIMED, job.name))
+            except FileNotFoundError:
+                continue  # Another worker claimed the job first.
+            os.utime(self._path(CLAIMED, job.name))
+            with open(self._path(CLAIMED, job.name)) as file:
+                return job, runner.RunDict(yaml.safe_load(file))
+        return None
+
+    def heartbeat(self, job: Job) -> bool:
+        """Renews the lease of the claimed job, returning False if the lease was lost, i.e. the job expired."""
+        try:
+            os.utime(self._path(CLAIMED, job.name))
+            return True
+        except FileNotFoundError:
+            return False
+
+    def complete(self, job: Job, result: Result) -> None:
+        """Records the result of the claimed job into done or failed, whichever it ended in, and the job is then no longer claimed."""
+        _write(self._path(DONE if result["passed"] else FAILED, f"{job.work}.yaml"), dict(result))
+        self._path(CLAIMED, job.name).unlink(missing_ok=True)
+
+    def expire(self, now: typing.Optional[float] = None) -> int:
+        """Puts the claimed jobs whose lease expired back into pending, or abandons them once they expired max_attempts times.
+        Returns the number of jobs expired."""
+        now = time.time() if now is None else now
+        expired = 0
+        for job in self._jobs(CLAIMED):
+            path = self._path(CLAIMED, job.name)
+            try:
+                if now - path.stat().st_mtime <= self._lease:
+                    continue
+                if job.attempt < self._max_attempts:
+                    os.rename(path, self._path(PENDING, job._replace(attempt=job.attempt + 1).name))
+                else:
+                    abandoned = path.with_name(f".{job.name}.abandoned")
+                    os.rename(path, abandoned)
+                    _write(self._path(FAILED, f"{job.work}.yaml"), dict(Result(
+                        work=job.work, passed=False, seconds=0.0, worker=None, attempt=job.attempt,
+                        error=f"The lease expired {job.attempt} times.")))
+                    abandoned.unlink()
+            except FileNotFoundError:
+                continue  # The job completed, or another process expired it first.
+            expired += 1
+        return expired
+
+    def idle(self) -> bool:
+        """Indicates no job is pending or claimed."""
+        return not self._jobs(PENDING) and not self._jobs(CLAIMED)
+
+    def results(self, works: typing.Iterable[str]) -> typing.Dict[str, Result]:
+        """The results of the given works recorded so far, whether they passed or failed."""
+        results = {}
+        for work in works:
+            for state in (DONE, FAILED):
+                path = self._path(state, f"{work}.yaml")
+                if path.exists():
+                    with open(path) as file:
+                        results[work] = Result(yaml.safe_load(file))
+        return results
+
+    def run(self, runs: typing.Sequence[runner.RunDict], workers: int = 1, poll: float = 1.0, execute: Execute = execute) -> typing.Dict[str, Result]:
+        """Coordinates the runs, i.e. submits them, starts workers local workers, which may be 0 if only remote workers are to run them,
+        and waits for the result of every run, expiring the jobs of crashed workers in the meantime."""
+        assert workers >= 0
+        works = [arguments["work"] for arguments in runs]
+        self.submit(runs, poll)
+        with concurrent.futures.ProcessPoolExecutor(max_workers=max(workers, 1)) as executor:
+            futures = [executor.submit(work, self._root, self._lease, self._max_attempts, poll, execute) for _ in range(workers)]
+            while len(results := self.results(works)) < len(works):
+                for future in futures:
+                    if future.done():
+                        future.result()
+                self.expire()
+                time.sleep(poll)
+        return results
+
+
+def work(
+    root: os.PathLike | str,
+    lease: float = 120.0,
+    max_attempts: int = 3,
+    poll: float = 1.0,
+    execute: Execute = execute,
+    exit_when_idle: bool = True
+) -> int:
+    """Works through the jobs of the queue within root, returning the number of jobs run.
+    While a job runs, its lease is renewed every third of the lease. While no job is pending, the worker polls every poll seconds,
+    since the claimed jobs of crashed workers may return to pending. The worker exits once the queue is idle, if exit_when_idle."""
+    queue = JobQueue(root, lease, max_attempts)
+    worker = f"{socket.gethostname()}:{os.getpid()}"
+    count = 0
+    while True:
+        queue.expire()
+        claimed = queue.claim()
+        if claimed is None:
+            if exit_when_idle and queue.idle():
+                return count
+            time.sleep(poll)
+            continue
+        job, arguments = claimed
+        finished = threading.Event()
+
+        def keep_alive() -> None:
+            while not finished.wait(lease / 3) and queue.heartbeat(job):
+                pass
+
+        heartbeat = threading.Thread(target=keep_alive, daemon=True)
+        heartbeat.start()
+        try:
+            seconds = execute(arguments)
+            result = Result(work=job.work, passed=True, seconds=seconds, error=None, worker=worker, attempt=job.attempt)
+        except (Exception, SystemExit):
+            result = Result(work=job.work, passed=False, seconds=0.0, error=traceback.format_exc(), worker=worker, attempt=job.attempt)
+        finally:
+            finished.set()
+            heartbeat.join()
+        queue.complete(job, result)
+        count += 1
@@ -0,0 +1,140 @@
+"""
+Contains the asynchronous logging backend used by the testbenches.
+
+By default, cocotb formats and writes every log record on the simulator thread,
+so a testbench that logs every transaction stalls the simulation on string formatting and I/O.
+The backend installed by setup instead pushes the unformatted records into a queue.
+A background thread pops the records, formats them, and writes them to standard out and,
+optionally, to a log file in the working directory, so the logs no longer have to be switched between the two.
+
+The backend is installed automatically when cocotb_introduction is imported within a simulation
+launched by runner.run with logging enabled. See the LOG_FILE_ENV environmental variable.
+
+Records are formatted lazily, so loggers should be passed the format string and its arguments separately
+(e.g. log.info("Comparing expected %d against actual %d...", exp, act)) instead of an f-string.
+Since the arguments are formatted later on the background thread, they should not be mutated after the call.
+"""
+import atexit
+import logging
+import logging.handlers
+import os
+import queue
+import time
+import typing
+import cocotb.log
+
+
+LOG_FILE_ENV = "COCOTB_INTRODUCTION_LOG_FILE"
+"""Environmental variable holding the path of the log file the simulation's logs are teed to."""
+
+
+_listener: typing.Optional[logging.handlers.QueueListener] = None
+_restore: typing.List[typing.Tuple[logging.Handler, typing.List[logging.Filter]]] = []
+
+
+class _DeferredQueueHandler(logging.handlers.QueueHandler):
+    """Enqueues records as they are, deferring all the formatting to the handlers of the listener."""
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        return record
+
+
+class RateLimit(logging.Filter):
+    """Limits the rate at which records pass through a logger or handler with a token bucket.
+
+    Up to burst records pass immediately, after which records pass at rate records per wall-clock second.
+    The number of records dropped in between is prepended to the next record that passes."""
+
+    def __init__(self, rate: float = 100.0, burst: int = 1000) -> None:
+        super().__init__()
+        assert rate > 0
+        assert burst > 0
+        self._rate = rate
+        self._burst = burst
+        self._tokens = float(burst)
+        self._stamp = time.monotonic()
+        self._dropped = 0
+
+    @property
+    def dropped(self) -> int:
+        """Number of records dropped since the last record passed."""
+        return self._dropped
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        stamp = time.monotonic()
+        self._tokens = min(self._burst, self._tokens + (stamp - self._stamp) * self._rate)
+        self._stamp = stamp
+        if self._tokens < 1.0:
+            self._dropped += 1
+            return False
+        self._tokens -= 1.0
+        if self._dropped:
+            record.msg = f"({self._dropped} records dropped) {record.msg}"
+            self._dropped = 0
+        return True
+
+
+def rate_limit(log: logging.Logger, rate: float = 100.0, burst: int = 1000) -> RateLimit:
+    """Adds a RateLimit filter to log, unless it already has one, returning the filter of log.
+    Loggers are shared by every test of a simulation, so adding a filter per test would otherwise stack them up."""
+    for filt in log.filters:
+        if isinstance(filt, RateLimit):
+            return filt
+    filt = RateLimit(rate, burst)
+    log.addFilter(filt)
+    return filt
+
+
+def setup(path: typing.Optional[os.PathLike | str] = None) -> None:
+    """Replaces the handlers of the root logger with a queue serviced by a background thread.
+    The original handlers, which write to standard out, are kept and serviced by the background thread.
+    If path is specified, records are also written to the file at path.
+    Calling setup more than once has no effect."""
+
+    global _listener
+    if _listener is not None:
+        return
+
+    # The sim time must be captured on the simulator thread, so it is attached to the record
+    # before enqueueing it. The background thread can't call into the simulator.
+    root = logging.getLogger()
+    handlers = list(root.handlers)
+    for handler in handlers:
+        removed = [filt for filt in handler.filters if isinstance(filt, cocotb.log.SimTimeContextFilter)]
+        for filt in removed:
+            handler.removeFilter(filt)
+        _restore.append((handler, removed))
+    if path is not None:
+        file_handler = logging.FileHandler(path, mode="w")
+        file_handler.setFormatter(cocotb.log.SimLogFormatter())
+        handlers.append(file_handler)
+
+    records: queue.SimpleQueue[logging.LogRecord] = queue.SimpleQueue()
+    queue_handler = _DeferredQueueHandler(records)
+    queue_handler.addFilter(cocotb.log.SimTimeContextFilter())
+    root.handlers = [queue_handler]
+
+    _listener = logging.handlers.QueueListener(records, *handlers, respect_handler_level=True)
+    _listener.start()
+    atexit.register(shutdown)
+
+
+def shutdown() -> None:
+    """Flushes the outstanding records, stops the background thread, and restores the original handlers of the root logger."""
+
+    global _listener
+    if _listener is None:
+        return
+    _listener.stop()
+    for handler in _listener.handlers:
+        handler.flush()
+        if isinstance(handler, logging.FileHandler):
+            handler.close()
+    root = logging.getLogger()
+    root.handlers = [handler for handler, _ in _restore]
+    for handler, removed in _restore:
+        for filt in removed:
+            handler.addFilter(filt)
+    _restore.clear()
+    _listener = None
+    atexit.unregister(shutdown)
@@ -0,0 +1,171 @@
+"""
+Contains the memory Monitor, which tracks how much memory each test holds onto, and where it was allocated.
+
+Unbounded structures, e.g. the backlog of a driver, the queue between a monitor and a scoreboard,
+pyuvm's analysis fifos, or cocotb_coverage's database, otherwise grow unnoticed until a soak test runs out of memory.
+While enabled, the Monitor takes a snapshot every period of simulated time, which records:
+    - The high-water mark of every Queue that's still alive, i.e. the largest number of values it ever held.
+      A Queue held by an object of the watchdog's registry, e.g. the messages of a driver, is named after the object and its attribute.
+    - The memory traced by tracemalloc, currently and at its peak, and the top allocating sites, grouped by key_type,
+      i.e. lineno, filename, or traceback, as tracemalloc.Snapshot.statistics.
+The snapshots of every test are written into the memory file of the working directory,
+along with the high-water marks of each test, i.e. the largest marks of its snapshots.
+
+The Monitor is enabled through the MEMORY_ENABLE environmental variable, since tracemalloc slows down every allocation.
+Otherwise, starting it does nothing, and only the high-water marks of the queues are kept, which costs a comparison per push.
+cocotb doesn't notify the end of a test, so the last snapshot of a test is taken once the Monitor of the next test starts,
+or once the simulation exits. The marks of the queues of a test that are no longer alive by then are only as recent as its previous snapshot.
+"""
+import atexit
+import os
+import pathlib
+import tracemalloc
+import typing
+import cocotb
+import cocotb.triggers as triggers
+import cocotb.utils as utils
+import yaml
+from .queue import Queue
+from . import profiling
+from . import watchdog
+
+
+MEMORY_ENV = "MEMORY_ENABLE"
+MEMORY_FILE = "memory.yaml"
+
+
+class Site(typing.TypedDict):
+    """Represents an allocating site of a snapshot."""
+    site: str
+    bytes: int
+    count: int
+
+
+class Snapshot(typing.TypedDict):
+    """Represents a snapshot of the memory."""
+    sim_time_ns: float
+    traced_bytes: int
+    peak_bytes: int
+    sites: typing.List[Site]
+    high_water: typing.Dict[str, int]
+
+
+_snapshots: typing.Dict[str, typing.List[Snapshot]] = {}
+_active: typing.Optional["Monitor"] = None
+
+
+def high_water() -> typing.Dict[str, int]:
+    """The high-water mark of every Queue that's still alive and ever held a value."""
+    marks = {}
+    owned = set()
+    for obj, name in watchdog.registered():
+        for attribute, value in getattr(obj, "__dict__", {}).items():
+            if isinstance(value, Queue):
+                owned.add(id(value))
+                if value.high_water:
+                    marks[f"{name}.{attribute}"] = value.high_water
+    for obj, name in watchdog.registered():
+        if isinstance(obj, Queue) and id(obj) not in owned and obj.high_water:
+            marks[name] = obj.high_water
+    return marks
+
+
+def sites(snapshot: tracemalloc.Snapshot, key_type: str = "lineno", top: int = 10) -> typing.List[Site]:
+    """The top allocating sites of snapshot, grouped by key_type, excluding the allocations of tracemalloc and the imports."""
+    snapshot = snapshot.filter_traces((
+        tracemalloc.Filter(False, tracemalloc.__file__),
+        tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+        tracemalloc.Filter(False, "<frozen importlib._bootstrap_external>"),
+        tracemalloc.Filter(False, "<unknown>")))
+    return [
+        Site(site=str(statistic.traceback), bytes=statistic.size, count=statistic.count)
+        for statistic in snapshot.statistics(key_type)[:top]]
+
+
+def report() -> typing.Dict[str, typing.Any]:
+    """The snapshots of every test, along with the high-water marks of each test."""
+    tests = {}
+    for test, snapshots in _snapshots.items():
+        marks: typing.Dict[str, int] = {}
+        for snapshot in snapshots:
+            for name, mark in snapshot["high_water"].items():
+                marks[name] = max(marks.get(name, 0), mark)
+        tests[test] = {"high_water": marks, "snapshots": snapshots}
+    return tests
+
+
+def write() -> pathlib.Path:
+    """Writes the report into the memory file of the working directory, returning the path of the file."""
+    path = pathlib.Path(os.environ.get("WORK_DIR", "")) / MEMORY_FILE
+    with open(path, "w") as file:
+        yaml.safe_dump(report(), file, sort_keys=False)
+    return path
+
+
+def _finish() -> None:
+    if _active is not None:
+        _active.snapshot()
+    write()
+
+
+class Monitor:
+    """Takes a snapshot of the memory every period, in units, of simulated time, recording the top allocating sites,
+    grouped by key_type, and tracing frames frames of every allocation. enable defaults to MEMORY_ENABLE."""
+
+    def __init__(
+        self,
+        period: float = 100,
+        units: str = "us",
+        top: int = 10,
+        key_type: str = "lineno",
+        frames: int = 1,
+        enable: typing.Optional[bool] = None
+    ) -> None:
+        super().__init__()
+        if enable is None:
+            enable = os.environ.get(MEMORY_ENV, "0") in ("1", "true", "True", "TRUE")
+        assert period > 0
+        assert top > 0
+        assert key_type in ("lineno", "filename", "traceback")
+        self._period = period
+        self._units = units
+        self._top = top
+        self._key_type = key_type
+        self._frames = frames
+        self._enable = enable
+        self._test = profiling.current_test()
+        self._task: typing.Optional[cocotb.task.Task] = None
+
+    def snapshot(self) -> Snapshot:
+        """Takes a snapshot of the memory now, and records it for the test the Monitor was created in."""
+        traced, peak = tracemalloc.get_traced_memory()
+        snapshot = Snapshot(
+            sim_time_ns=utils.get_sim_time("ns"),
+            traced_bytes=traced,
+            peak_bytes=peak,
+            sites=sites(tracemalloc.take_snapshot(), self._key_type, self._top),
+            high_water=high_water())
+        _snapshots.setdefault(self._test, []).append(snapshot)
+        return snapshot
+
+    def start(self) -> "Monitor":
+        """Starts taking snapshots, if enabled, after taking the last snapshot of the previous test."""
+        global _active
+        if not self._enable:
+            return self
+        if _active is None:
+            atexit.register(_finish)
+        else:
+            _active.snapshot()
+            write()
+        _active = self
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(self._frames)
+
+        async def take_snapshots() -> None:
+            while True:
+                await triggers.Timer(self._period, self._units)
+                self.snapshot()
+
+        self._task = cocotb.start_soon(take_snapshots())
+        return self
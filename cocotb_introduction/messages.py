@@ -13,6 +13,12 @@ where the driver can even send data back to the separate task or receive more da
 The driver is also responsible for dealing with the possibility of receiving multiple messages.
 In this sense, the driver acts like server, providing clients a safe, simpler access to a resource, the interface.
 
+A message can also hold off the driver for a delay, expressed in cycles, before the driver starts processing it.
+See cocotb_introduction.timing for more information.
+
+Rather than waiting on a message, a client can also register callbacks the driver calls as the message starts and gets processed,
+which lets scoreboards and UVM components track many in-flight messages without a coroutine per message.
+
 The monitors behave differently. Instead of sending it messages,
 separate tasks can get a reference to the latest message directly associated with the monitor.
 The monitor's event property must be awaited on first to know when the message has been updated.
@@ -26,25 +32,35 @@ class ReadNoData(BaseException):
     pass
 
 
-class WriteMessage:
-    """Represents a message that can be sent to a WriteDriver. Data is passed into the message.
+Callback = typing.Callable[[typing.Any], None]
 
-    Please note that in the context of the message's documentation,
-    client refers to the task that's communicating with the driver through the message,
-    whereas the driver itself is regarded as a server."""
 
-    def __init__(self, data: int) -> None:
+class Lifecycle:
+    """The lifecycle shared by the messages sent to drivers, i.e. the delay, and whether the message started and got processed.
+
+    Clients learn about the lifecycle in three ways:
+        - polling the started and processed properties,
+        - awaiting the started and processed triggers, or the started_wait and processed_wait coroutines,
+          which only resume on the event they wait for, and
+        - registering on_started and on_processed callbacks, which the driver calls synchronously,
+          so no coroutine is spawned or woken for each message.
+    The events behind the triggers are only created once a client awaits them."""
+
+    def __init__(self, delay: int = 0) -> None:
         super().__init__()
-        self._data = data
+        assert delay >= 0
+        self._delay = delay
         self._started = False
         self._processed = False
-        self._event = triggers.Event()
+        self._started_evt: typing.Optional[triggers.Event] = None
+        self._processed_evt: typing.Optional[triggers.Event] = None
+        self._started_cbs: typing.Optional[typing.List[Callback]] = None
+        self._processed_cbs: typing.Optional[typing.List[Callback]] = None
 
     @property
-    def event(self) -> triggers.PythonTrigger:
-        """Current task resumes when a change occurs on the message."""
-        self._event.clear()
-        return self._event.wait()
+    def delay(self) -> int:
+        """Number of cycles the driver holds off before it starts processing the message."""
+        return self._delay
 
     @property
     def started(self) -> bool:
@@ -57,62 +73,111 @@ class WriteMessage:
         return self._processed
 
     @property
-    def data(self) -> int:
-        """The data associated with the message."""
-        return self._data
+    def started_trigger(self) -> triggers.PythonTrigger:
+        """Current task resumes when the message is getting processed, immediately if it already is."""
+        if self._started_evt is None:
+            self._started_evt = triggers.Event()
+            if self._started:
+                self._started_evt.set()
+        return self._started_evt.wait()
+
+    @property
+    def processed_trigger(self) -> triggers.PythonTrigger:
+        """Current task resumes when the message has gotten processed, immediately if it already has."""
+        if self._processed_evt is None:
+            self._processed_evt = triggers.Event()
+            if self._processed:
+                self._processed_evt.set()
+        return self._processed_evt.wait()
+
+    def on_started(self, callback: Callback) -> None:
+        """Calls callback with the message once the message is getting processed, immediately if it already is."""
+        if self._started:
+            callback(self)
+        elif self._started_cbs is None:
+            self._started_cbs = [callback]
+        else:
+            self._started_cbs.append(callback)
+
+    def on_processed(self, callback: Callback) -> None:
+        """Calls callback with the message once the message has gotten processed, immediately if it already has."""
+        if self._processed:
+            callback(self)
+        elif self._processed_cbs is None:
+            self._processed_cbs = [callback]
+        else:
+            self._processed_cbs.append(callback)
 
     async def started_wait(self) -> None:
         """Current task resumes when the message is getting processed."""
-        while not self.started:
-            await self.event
+        if not self._started:
+            await self.started_trigger
 
-    async def processed_wait(self) -> None:
-        """Current task resumes when the message has gotten processed."""
-        while not self.processed:
-            await self.event
+    def _hold(self) -> int:
+        """The driver calls this method in order to take the delay, so the driver holds off only once."""
+        delay = self._delay
+        self._delay = 0
+        return delay
 
     def _start(self) -> None:
         """The driver calls this method in order to indicate back to the client the message is getting processed."""
         assert not self._started
-        self._event.set()
         self._started = True
-
-    def _process(self) -> None:
-        """The driver calls this method in order to indicate back to the client the message has gotten processed."""
+        if self._started_evt is not None:
+            self._started_evt.set()
+        if self._started_cbs is not None:
+            for callback in self._started_cbs:
+                callback(self)
+            self._started_cbs = None
+
+    def _complete(self) -> None:
+        """Indicates back to the client the message has gotten processed."""
         assert not self._processed
-        self._event.set()
         self._processed = True
+        if self._processed_evt is not None:
+            self._processed_evt.set()
+        if self._processed_cbs is not None:
+            for callback in self._processed_cbs:
+                callback(self)
+            self._processed_cbs = None
 
 
-class ReadMessage:
-    """Represents a message that can be sent to a ReadDriver. Contains the data read from the driver.
+class WriteMessage(Lifecycle):
+    """Represents a message that can be sent to a WriteDriver. Data is passed into the message.
 
     Please note that in the context of the message's documentation,
     client refers to the task that's communicating with the driver through the message,
     whereas the driver itself is regarded as a server."""
 
-    def __init__(self) -> None:
-        super().__init__()
-        self._data: typing.Optional[int] = None
-        self._started = False
-        self._processed = False
-        self._event = triggers.Event()
+    def __init__(self, data: int, delay: int = 0) -> None:
+        super().__init__(delay)
+        self._data = data
 
     @property
-    def event(self) -> triggers.PythonTrigger:
-        """Current task resumes when a change occurs on the message."""
-        self._event.clear()
-        return self._event.wait()
+    def data(self) -> int:
+        """The data associated with the message."""
+        return self._data
 
-    @property
-    def started(self) -> bool:
-        """Indicates back to the client task the message is getting processed."""
-        return self._started
+    async def processed_wait(self) -> None:
+        """Current task resumes when the message has gotten processed."""
+        if not self._processed:
+            await self.processed_trigger
 
-    @property
-    def processed(self) -> bool:
-        """Indicates back to the client task the message has gotten processed."""
-        return self._processed
+    def _process(self) -> None:
+        """The driver calls this method in order to indicate back to the client the message has gotten processed."""
+        self._complete()
+
+
+class ReadMessage(Lifecycle):
+    """Represents a message that can be sent to a ReadDriver. Contains the data read from the driver.
+
+    Please note that in the context of the message's documentation,
+    client refers to the task that's communicating with the driver through the message,
+    whereas the driver itself is regarded as a server."""
+
+    def __init__(self, delay: int = 0) -> None:
+        super().__init__(delay)
+        self._data: typing.Optional[int] = None
 
     @property
     def data(self) -> int:
@@ -121,39 +186,32 @@ class ReadMessage:
             raise ReadNoData()
         return self._data
 
-    async def started_wait(self) -> None:
-        """Current task resumes when the message is getting processed."""
-        while not self.started:
-            await self.event
-
     async def processed_wait(self) -> int:
         """Current task resumes when the message has gotten processed. The read data is returned."""
-        while not self.processed:
-            await self.event
+        if not self._processed:
+            await self.processed_trigger
         return self.data
 
-    def _start(self) -> None:
-        """The driver calls this method in order to indicate back to the client the message is getting processed."""
-        assert not self._started
-        self._event.set()
-        self._started = True
-
     def _process(self, data: int) -> None:
         """The driver calls this method in order to indicate back to the client the message has gotten processed."""
-        assert not self._processed
-        self._event.set()
-        self._processed = True
         self._data = data
+        self._complete()
 
 
 class MonitorMessage:
     """Represents a message a monitor can make available."""
 
-    def __init__(self, data: int) -> None:
+    def __init__(self, data: int, time: int = 0) -> None:
         super().__init__()
         self._data = data
+        self._time = time
 
     @property
     def data(self) -> int:
         """The data associated with the message."""
-        return self._data
\ No newline at end of file
+        return self._data
+
+    @property
+    def time(self) -> int:
+        """The sim time, in simulator time steps, at which the monitor observed the message."""
+        return self._time
\ No newline at end of file
@@ -0,0 +1,176 @@
+"""
+Contains the Layout, the CompositeHandle, and the fast codec used by the drivers and monitors to access the data signals.
+
+Reading a signal through handle.value.integer builds a BinaryValue from the signal's binary string before converting it into an integer,
+and writing an integer to a signal wider than 32 bits builds a BinaryValue from the integer before converting it back into a binary string.
+For wide buses, of hundreds to thousands of bits, those conversions dominate the cost of each beat.
+read and write instead convert between the binary string and the integer directly, through the private API of cocotb 1.x,
+and fall back on handle.value with a cocotb release lacking it.
+
+A Layout describes struct-like data, i.e. named fields of fixed widths packed into one integer, with the first field in the least significant bits.
+Besides packing and unpacking single tuples, it packs and unpacks whole columns of fields at once with NumPy,
+e.g. to pack the stimulus generated by cocotb_introduction.stimulus ahead of time.
+
+A CompositeHandle maps the fields of a Layout onto signals, either one signal per field or one signal for the whole Layout,
+and behaves like a handle towards the drivers and monitors, which read and write the fields as tuples.
+"""
+import cocotb
+import cocotb.handle as handle
+import collections
+import numpy as np
+import typing
+
+
+Signal = typing.Union[handle.SimHandleBase, "CompositeHandle"]
+
+
+class Layout:
+    """Describes named fields of fixed widths packed into one integer, the first field in the least significant bits.
+    The fields are unpacked into instances of tuple_type, which defaults to a namedtuple of the fields."""
+
+    def __init__(self, fields: typing.Mapping[str, int], tuple_type: typing.Optional[typing.Callable[..., typing.Tuple[int, ...]]] = None) -> None:
+        super().__init__()
+        assert fields
+        assert all(width > 0 for width in fields.values())
+        self._names = tuple(fields)
+        self._widths = tuple(fields.values())
+        self._offsets = tuple(sum(self._widths[:index]) for index in range(len(self._widths)))
+        self._masks = tuple((1 << width) - 1 for width in self._widths)
+        self._width = sum(self._widths)
+        self._tuple = tuple_type if tuple_type is not None else collections.namedtuple("Packed", self._names)
+
+    @property
+    def names(self) -> typing.Tuple[str, ...]:
+        """The names of the fields."""
+        return self._names
+
+    @property
+    def widths(self) -> typing.Tuple[int, ...]:
+        """The widths of the fields."""
+        return self._widths
+
+    @property
+    def width(self) -> int:
+        """The width of the packed fields."""
+        return self._width
+
+    def pack(self, values: typing.Sequence[int]) -> int:
+        """Packs one value of each field into an integer."""
+        word = 0
+        for value, offset, mask in zip(values, self._offsets, self._masks):
+            assert 0 <= value <= mask
+            word |= value << offset
+        return word
+
+    def unpack(self, word: int) -> typing.Tuple[int, ...]:
+        """Unpacks an integer into one value of each field."""
+        return self.fields((word >> offset) & mask for offset, mask in zip(self._offsets, self._masks))
+
+    def fields(self, values: typing.Iterable[int]) -> typing.Tuple[int, ...]:
+        """Wraps one value of each field into the tuple_type."""
+        return self._tuple(*values)
+
+    def to_bytes(self, word: int) -> bytes:
+        """Converts a packed integer into little-endian bytes."""
+        return word.to_bytes((self._width + 7) // 8, "little")
+
+    def from_bytes(self, raw: bytes) -> int:
+        """Converts little-endian bytes into a packed integer."""
+        return int.from_bytes(raw, "little") & ((1 << self._width) - 1)
+
+    def pack_many(self, *columns: typing.Union[np.ndarray, typing.Sequence[int]]) -> np.ndarray:
+        """Packs columns of values, one column per field, into an array of packed integers.
+        If the fields fit in 64 bits, the array is an unsigned integer array, otherwise an object array of Python integers."""
+        assert len(columns) == len(self._names)
+        dtype = np.uint64 if self._width <= 64 else object
+        words = np.zeros(len(columns[0]), dtype=dtype)
+        for column, offset, mask in zip(columns, self._offsets, self._masks):
+            values = np.asarray(column).astype(dtype)
+            if dtype is object:
+                words |= (values & mask) << offset
+            else:
+                words |= (values & np.uint64(mask)) << np.uint64(offset)
+        return words
+
+    def unpack_many(self, words: typing.Union[np.ndarray, typing.Sequence[int]]) -> typing.Tuple[np.ndarray, ...]:
+        """Unpacks an array of packed integers into columns of values, one column per field."""
+        dtype = np.uint64 if self._width <= 64 else object
+        words = np.asarray(words).astype(dtype)
+        if dtype is object:
+            return tuple((words >> offset) & mask for offset, mask in zip(self._offsets, self._masks))
+        return tuple((words >> np.uint64(offset)) & np.uint64(mask) for offset, mask in zip(self._offsets, self._masks))
+
+
+class CompositeHandle:
+    """Maps the fields of layout onto signals, which is either a mapping from the name of each field to its own signal,
+    or a single signal for the whole layout. Reads and writes tuples of the fields through the value property,
+    so it can stand in for the data handle of any driver or monitor."""
+
+    def __init__(self, layout: Layout, signals: typing.Union[handle.SimHandleBase, typing.Mapping[str, handle.SimHandleBase]]) -> None:
+        super().__init__()
+        self._layout = layout
+        if isinstance(signals, typing.Mapping):
+            assert set(signals) == set(layout.names)
+            self._signals: typing.Optional[typing.Tuple[handle.SimHandleBase, ...]] = tuple(signals[name] for name in layout.names)
+            self._signal = None
+        else:
+            self._signals = None
+            self._signal = signals
+
+    @property
+    def layout(self) -> Layout:
+        """The layout of the fields."""
+        return self._layout
+
+    @property
+    def integer(self) -> typing.Tuple[int, ...]:
+        """Reads the fields as a tuple."""
+        if self._signals is None:
+            return self._layout.unpack(read(self._signal))
+        return self._layout.fields(read(signal) for signal in self._signals)
+
+    @property
+    def value(self) -> typing.Self:
+        return self
+
+    @value.setter
+    def value(self, value: typing.Sequence[int]) -> None:
+        """Writes the fields from a tuple."""
+        if self._signals is None:
+            write(self._signal, self._layout.pack(value))
+        else:
+            for signal, field in zip(self._signals, value):
+                write(signal, field)
+
+
+def read(signal: Signal) -> typing.Any:
+    """Reads the value of signal as an integer, or as a tuple if signal is a CompositeHandle.
+    Like handle.value.integer, a ValueError is raised if the signal isn't fully resolved, e.g. holds an X.
+    Anything other than a simulation handle, e.g. a CompositeHandle, is read through its value.integer,
+    and so is a simulation handle of a cocotb release whose simulator object lacks get_signal_val_binstr."""
+    get_binstr = getattr(getattr(signal, "_handle", None), "get_signal_val_binstr", None)
+    if not isinstance(signal, handle.SimHandleBase) or get_binstr is None:
+        return signal.value.integer
+    return int(get_binstr(), 2)
+
+
+def write(signal: Signal, value: typing.Any) -> None:
+    """Writes value, an integer, or a tuple if signal is a CompositeHandle, to signal,
+    in the same way as assigning handle.value, i.e. the write is applied in the next ReadWrite phase.
+    Like handle.value, an integer from -2**(width - 1) to 2**width - 1 is accepted, negative ones in two's complement,
+    and an OverflowError is raised otherwise.
+    Anything other than a simulation handle, signals narrow enough for cocotb's own fast path,
+    and signals of a cocotb release lacking the scheduler's _schedule_write or the simulator object's set_signal_val_binstr
+    are written through their value."""
+    if not isinstance(signal, handle.SimHandleBase) or len(signal) <= 32:
+        signal.value = value
+        return
+    schedule_write = getattr(cocotb.scheduler, "_schedule_write", None)
+    set_binstr = getattr(signal._handle, "set_signal_val_binstr", None)
+    if schedule_write is None or set_binstr is None:
+        signal.value = value
+        return
+    width = len(signal)
+    if not -(1 << (width - 1)) <= value < 1 << width:
+        raise OverflowError(f"Int value ({value!r}) out of range for assignment of {width!r}-bit signal ({signal._name!r})")
+    schedule_write(signal, set_binstr, 0, format(value & ((1 << width) - 1), f"0{width}b"))
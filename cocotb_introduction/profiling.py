@@ -0,0 +1,178 @@
+"""
+Contains the opt-in profiler of the simulations, which tells where the wall time of each test goes.
+
+The simulator and Python share the simulator's thread. cocotb re-enters Python on every callback of the simulator,
+e.g. an edge or a timer a coroutine awaits, holding the GIL only for the duration of the callback.
+The profiler relies on that, so the wall time of each test is split between:
+    - simulator, i.e. the simulator's thread runs no Python at all, so the time is spent in nvc.
+    - gpi, i.e. the innermost Python frame is within cocotb's handles or triggers, so the time is mostly spent crossing the GPI,
+      e.g. reading or writing a signal, or registering a callback.
+    - cocotb, i.e. the innermost Python frame is elsewhere within cocotb, such as its scheduler.
+    - testbench, i.e. anything else, such as the drivers, the coverage, and the scoreboards.
+
+The profiler runs in one of the following modes, selected through the PROFILE_MODE environmental variable:
+    - sample runs a thread that samples the stack of the simulator's thread every PROFILE_INTERVAL seconds, 0.001 by default.
+      Each sample is weighted by the wall time since the previous one, since the thread can't sample while Python holds the GIL.
+      The stacks of each test are written into <test>.folded, in the collapsed format of flame graph tools,
+      e.g. flamegraph.pl or speedscope, weighted in microseconds. The time the simulator runs is collapsed into a [simulator] frame.
+    - cprofile runs cProfile on the simulator's thread, written into profile.pstats, for all the tests together.
+      Only the split between Python and the simulator is summarised, from the time spent within the calls from the simulator.
+Either way, the split is summarised into profile.yaml.
+
+The profiler is installed automatically when cocotb_introduction is imported within a simulation, if PROFILE_MODE is set.
+runner.run sets it from its profile_mode argument, and the test tasks of tests/tasks.py from their profile-mode option.
+The files are written into the working directory once the simulation exits.
+"""
+import atexit
+import cProfile
+import os
+import pathlib
+import pstats
+import sys
+import threading
+import time
+import typing
+import yaml
+import cocotb
+
+
+PROFILE_ENV = "PROFILE_MODE"
+INTERVAL_ENV = "PROFILE_INTERVAL"
+MODES = ("sample", "cprofile")
+SUMMARY_FILE = "profile.yaml"
+PSTATS_FILE = "profile.pstats"
+SIMULATOR_FRAME = "[simulator]"
+CATEGORIES = ("simulator", "gpi", "cocotb", "testbench")
+
+
+_COCOTB_DIR = os.path.dirname(cocotb.__file__)
+_GPI_FILES = (os.path.join(_COCOTB_DIR, "handle.py"), os.path.join(_COCOTB_DIR, "triggers.py"))
+
+
+def _directory() -> pathlib.Path:
+    return pathlib.Path(os.environ.get("WORK_DIR", ""))
+
+
+def current_test() -> str:
+    """The name of the test cocotb runs, or setup before the first test starts."""
+    test = getattr(cocotb.regression_manager, "_test", None)
+    return "setup" if test is None else getattr(test, "__qualname__", str(test))
+
+
+def categorize(filename: typing.Optional[str]) -> str:
+    """The category of the wall time spent with filename as the innermost Python frame, or with no Python frame at all if None."""
+    if filename is None:
+        return "simulator"
+    if filename in _GPI_FILES:
+        return "gpi"
+    if filename.startswith(_COCOTB_DIR):
+        return "cocotb"
+    return "testbench"
+
+
+def collapse(frame: typing.Any) -> str:
+    """Collapses the stack ending with frame, outermost first, into a line of the collapsed format without its weight."""
+    names = []
+    while frame is not None:
+        code = frame.f_code
+        names.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+        frame = frame.f_back
+    return ";".join(reversed(names))
+
+
+class Sampler:
+    """Samples the stack of the thread identified by thread every interval seconds, from a thread of its own."""
+
+    def __init__(self, thread: int, interval: float = 0.001) -> None:
+        super().__init__()
+        assert interval > 0
+        self._thread = thread
+        self._interval = interval
+        self._stacks: typing.Dict[str, typing.Dict[str, float]] = {}
+        self._split: typing.Dict[str, typing.Dict[str, float]] = {}
+        self._stopped = threading.Event()
+        self._sampler = threading.Thread(target=self._sample, daemon=True)
+
+    def _sample(self) -> None:
+        previous = time.perf_counter()
+        while not self._stopped.wait(self._interval):
+            frame = sys._current_frames().get(self._thread, None)
+            now = time.perf_counter()
+            self.record(current_test(), frame, now - previous)
+            previous = now
+            del frame
+
+    def record(self, test: str, frame: typing.Any, seconds: float) -> None:
+        """Records a sample of test, with frame as the innermost Python frame, or None if the simulator ran, weighted by seconds."""
+        stack = SIMULATOR_FRAME if frame is None else collapse(frame)
+        category = categorize(None if frame is None else frame.f_code.co_filename)
+        stacks = self._stacks.setdefault(test, {})
+        stacks[stack] = stacks.get(stack, 0.0) + seconds
+        split = self._split.setdefault(test, dict.fromkeys(CATEGORIES, 0.0))
+        split[category] += seconds
+
+    def start(self) -> "Sampler":
+        self._sampler.start()
+        return self
+
+    def stop(self) -> None:
+        self._stopped.set()
+        self._sampler.join()
+
+    def summary(self) -> typing.Dict[str, typing.Any]:
+        """The split of the wall time of each test, in seconds."""
+        return {
+            test: {"wall_s": sum(split.values()), **{f"{category}_s": seconds for category, seconds in split.items()}}
+            for test, split in self._split.items()}
+
+    def write(self, directory: pathlib.Path) -> typing.List[pathlib.Path]:
+        """Writes the stacks of each test into <test>.folded within directory, returning the paths written."""
+        paths = []
+        for test, stacks in self._stacks.items():
+            path = directory / f"{test}.folded"
+            with open(path, "w") as file:
+                for stack, seconds in sorted(stacks.items()):
+                    if (microseconds := round(seconds * 1e6)) > 0:
+                        file.write(f"{stack} {microseconds}\n")
+            paths.append(path)
+        return paths
+
+
+def _python_time(stats: pstats.Stats) -> float:
+    """The time spent within the calls with no Python caller, i.e. the calls from the simulator."""
+    return sum(ct for _, _, _, ct, callers in stats.stats.values() if not callers)
+
+
+def setup(mode: str, interval: float = 0.001) -> None:
+    """Starts profiling the calling thread, i.e. the simulator's thread, in mode, until the simulation exits."""
+    assert mode in MODES, f"Unknown profiling mode {mode}, expected one of {MODES}."
+    started = time.perf_counter()
+
+    if mode == "sample":
+        # The sampler only gets the GIL once the simulator's thread drops it, so the switch interval bounds the resolution.
+        sys.setswitchinterval(min(sys.getswitchinterval(), interval))
+        sampler = Sampler(threading.get_ident(), interval).start()
+
+        def finish_sample() -> None:
+            sampler.stop()
+            sampler.write(_directory())
+            summary = {"mode": mode, "interval_s": interval, "tests": sampler.summary()}
+            with open(_directory() / SUMMARY_FILE, "w") as file:
+                yaml.safe_dump(summary, file, sort_keys=False)
+
+        atexit.register(finish_sample)
+        return
+
+    profile = cProfile.Profile()
+
+    def finish_cprofile() -> None:
+        profile.disable()
+        wall = time.perf_counter() - started
+        profile.dump_stats(_directory() / PSTATS_FILE)
+        python = _python_time(pstats.Stats(profile))
+        summary = {"mode": mode, "wall_s": wall, "python_s": python, "simulator_s": max(wall - python, 0.0)}
+        with open(_directory() / SUMMARY_FILE, "w") as file:
+            yaml.safe_dump(summary, file, sort_keys=False)
+
+    atexit.register(finish_cprofile)
+    profile.enable()
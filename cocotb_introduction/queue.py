@@ -8,6 +8,7 @@ WARNING: As it turns out, cocotb already comes with a Queue!
 import collections
 import typing
 import cocotb.triggers as triggers
+from . import watchdog
 
 
 T = typing.TypeVar("T")
@@ -24,6 +25,17 @@ class Queue(typing.Generic[T]):
         super().__init__()
         self._deque: typing.Deque[T] = collections.deque()
         self._event = triggers.Event()
+        self._high_water = 0
+        watchdog.register(self)
+
+    def __len__(self) -> int:
+        """The number of values in the queue."""
+        return len(self._deque)
+
+    @property
+    def high_water(self) -> int:
+        """The largest number of values the queue ever held."""
+        return self._high_water
 
     @property
     def empty(self) -> bool:
@@ -40,6 +52,8 @@ class Queue(typing.Generic[T]):
         """Pushes data into the queue."""
         self._event.set()
         self._deque.append(value)
+        if len(self._deque) > self._high_water:
+            self._high_water = len(self._deque)
 
     def pop(self) -> T:
         """Reads data from the queue."""
@@ -0,0 +1,187 @@
+"""
+Contains the Recorder, which keeps a history of the transactions on the interfaces of the testbench.
+
+Every driver and monitor optionally takes a Channel of a Recorder, in which case
+the driver or monitor records a fixed-size record for every lifecycle event of its messages,
+i.e. when a WriteMessage or ReadMessage starts getting processed, when it has gotten processed,
+and when a monitor observes a new MonitorMessage.
+
+The records are stored column by column. Each column is a memory-mapped file of fixed-size values
+in the Recorder's directory, which is normally within the working directory of the test.
+Records are first appended to small buffers, and the buffers are copied into the memory-mapped files a block at a time,
+so recording costs little more than a few appends per beat.
+After the run, load maps the columns back into NumPy arrays without copying them.
+"""
+import array
+import atexit
+import os
+import pathlib
+import typing
+import cocotb.utils as utils
+import numpy as np
+import yaml
+
+
+STARTED = 0
+"""Event recorded when a WriteMessage or ReadMessage starts getting processed."""
+PROCESSED = 1
+"""Event recorded when a WriteMessage or ReadMessage has gotten processed."""
+OBSERVED = 2
+"""Event recorded when a monitor observes a new MonitorMessage."""
+
+COLUMNS: typing.Mapping[str, typing.Tuple[str, typing.Type[np.generic]]] = {
+    "interface": ("H", np.uint16),
+    "event": ("B", np.uint8),
+    "time": ("Q", np.uint64),
+    "cycle": ("Q", np.uint64),
+    "data": ("Q", np.uint64),
+}
+"""The columns of each record, mapped to their array typecode and NumPy dtype."""
+
+META_FILE = "meta.yaml"
+DATA_MASK = (1 << 64) - 1
+
+
+class Recording(typing.NamedTuple):
+    """Represents a recording loaded with load."""
+    interfaces: typing.List[str]
+    period: int
+    columns: typing.Dict[str, np.ndarray]
+
+
+class Channel:
+    """Records the events of a single interface. Created with Recorder.channel."""
+
+    def __init__(self, recorder: "Recorder", interface: int, encode: typing.Callable[[typing.Any], int]) -> None:
+        super().__init__()
+        self._recorder = recorder
+        self._interface = interface
+        self._encode = encode
+
+    def started(self, data: typing.Any = 0) -> None:
+        """Records a message starting to get processed."""
+        self._recorder._append(self._interface, STARTED, self._encode(data))
+
+    def processed(self, data: typing.Any = 0) -> None:
+        """Records a message that has gotten processed."""
+        self._recorder._append(self._interface, PROCESSED, self._encode(data))
+
+    def observed(self, data: typing.Any) -> None:
+        """Records a monitor observing a new message."""
+        self._recorder._append(self._interface, OBSERVED, self._encode(data))
+
+
+class Recorder:
+    """Records transactions into memory-mapped columnar files stored in the directory path.
+
+    period and units specify the period of the clock, which is used to derive the cycle column from the sim time.
+    block is the number of records buffered before they're copied into the memory-mapped files."""
+
+    def __init__(
+        self,
+        path: os.PathLike | str = "transactions",
+        period: int = 10,
+        units: str = "ns",
+        block: int = 4096
+    ) -> None:
+        super().__init__()
+        assert block > 0
+        self._path = pathlib.Path(path)
+        self._path.mkdir(parents=True, exist_ok=True)
+        self._period = utils.get_sim_steps(period, units)
+        self._block = block
+        self._interfaces: typing.List[str] = []
+        self._count = 0
+        self._capacity = 0
+        self._buffers = {name: array.array(code) for name, (code, _) in COLUMNS.items()}
+        self._maps: typing.Dict[str, np.memmap] = {}
+        self._closed = False
+        for name in COLUMNS:
+            (self._path / f"{name}.bin").write_bytes(b"")
+        self._write_meta()
+        atexit.register(self.close)
+
+    @property
+    def count(self) -> int:
+        """Number of records recorded so far."""
+        return self._count + len(self._buffers["event"])
+
+    def channel(self, name: str, encode: typing.Callable[[typing.Any], int] = int) -> Channel:
+        """Creates the channel a driver or monitor records its events with.
+        encode converts the data of the messages into an integer, of which the lower 64 bits are recorded."""
+        assert name not in self._interfaces, f"Channel {name} already exists."
+        self._interfaces.append(name)
+        self._write_meta()
+        return Channel(self, len(self._interfaces) - 1, encode)
+
+    def flush(self) -> None:
+        """Copies the buffered records into the memory-mapped files."""
+        size = len(self._buffers["event"])
+        if size == 0:
+            return
+        if self._count + size > self._capacity:
+            self._grow(self._count + size)
+        for name, (_, dtype) in COLUMNS.items():
+            self._maps[name][self._count:self._count + size] = np.frombuffer(self._buffers[name], dtype=dtype)
+            del self._buffers[name][:]
+        self._count += size
+        self._write_meta()
+
+    def close(self) -> None:
+        """Flushes the buffered records and closes the memory-mapped files. Calling close more than once has no effect."""
+        if self._closed:
+            return
+        self.flush()
+        for mm in self._maps.values():
+            mm.flush()
+        self._maps.clear()
+        # Trim the preallocated tails off the files.
+        for name, (_, dtype) in COLUMNS.items():
+            os.truncate(self._path / f"{name}.bin", self._count * np.dtype(dtype).itemsize)
+        self._closed = True
+        atexit.unregister(self.close)
+
+    def _append(self, interface: int, event: int, data: int) -> None:
+        time = utils.get_sim_time()
+        buffers = self._buffers
+        buffers["interface"].append(interface)
+        buffers["event"].append(event)
+        buffers["time"].append(time)
+        buffers["cycle"].append(time // self._period)
+        buffers["data"].append(data & DATA_MASK)
+        if len(buffers["event"]) >= self._block:
+            self.flush()
+
+    def _grow(self, required: int) -> None:
+        capacity = max(self._capacity * 2, self._block)
+        while capacity < required:
+            capacity *= 2
+        for name, (_, dtype) in COLUMNS.items():
+            if name in self._maps:
+                self._maps[name].flush()
+            self._maps[name] = np.memmap(self._path / f"{name}.bin", dtype=dtype, mode="r+" if self._capacity else "w+", shape=(capacity,))
+        self._capacity = capacity
+
+    def _write_meta(self) -> None:
+        meta = {
+            "count": self._count,
+            "period": self._period,
+            "interfaces": self._interfaces,
+            "columns": {name: np.dtype(dtype).str for name, (_, dtype) in COLUMNS.items()}}
+        with open(self._path / META_FILE, "w") as file:
+            yaml.safe_dump(meta, file)
+
+
+def load(path: os.PathLike | str = "transactions") -> Recording:
+    """Maps the columns of the recording stored in the directory path into read-only NumPy arrays without copying them."""
+    path = pathlib.Path(path)
+    with open(path / META_FILE, "r") as file:
+        meta = yaml.safe_load(file)
+    count = meta["count"]
+    columns = {}
+    for name, dtype in meta["columns"].items():
+        if count == 0:
+            columns[name] = np.empty(0, dtype=dtype)
+        else:
+            columns[name] = np.memmap(path / f"{name}.bin", dtype=dtype, mode="r", shape=(count,))
+    return Recording(interfaces=list(meta["interfaces"]), period=meta["period"], columns=columns)
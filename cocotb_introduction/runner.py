@@ -1,47 +1,383 @@
 import cocotb.runner
+import concurrent.futures
 import pathlib
 import itertools
 import os
-import shutil
+import pytest
+import random
 import typing
 from . import config
+from . import logger
+from . import history
+from . import depends
+from . import watchdog
+from . import profiling
+from . import workdir
 
 
-def run(hdl_toplevel: str, test_module: str, work: str, parameters: typing.Mapping[str, typing.Any] | None = None) -> None:
+class RunDict(typing.TypedDict):
+    """Represents the arguments of a single run."""
+    hdl_toplevel: str
+    test_module: str
+    work: str
+    parameters: typing.Mapping[str, typing.Any] | None
+    sources: typing.NotRequired[typing.Sequence[str]]
+    profile: typing.NotRequired[str]
+    sim_time_limit: typing.NotRequired[float]
+    wall_time_limit: typing.NotRequired[float]
+    profile_mode: typing.NotRequired[str]
+
+
+def vhdl_sources() -> typing.List[pathlib.Path]:
+    """Every VHDL source listed in the yaml."""
+    return list(itertools.chain.from_iterable(
+        config.CONFIG_PATH.parent.glob(source) for source in config.CONFIG['runner']['vhdl_sources']))
+
+
+def select_profile(name: typing.Optional[str] = None) -> config.ProfileDict:
+    """The profile of simulator options selected by the SIM_PROFILE environmental variable, if set,
+    otherwise by name, otherwise by the profile of the yaml. The environment takes precedence,
+    so a whole regression can be switched to a profile regardless of the profiles its tests select.
+    Without any profile, the simulator's defaults are used."""
+    name = os.environ.get("SIM_PROFILE", name or config.CONFIG.get("profile", None))
+    if name is None:
+        return config.ProfileDict(build_args=[], test_args=[], waves=False)
+    profiles = config.CONFIG.get("profiles", {})
+    assert name in profiles, f"Unknown profile {name}, expected one of {list(profiles)}."
+    return profiles[name]
+
+
+def run(
+    hdl_toplevel: str,
+    test_module: str,
+    work: str,
+    parameters: typing.Mapping[str, typing.Any] | None = None,
+    sources: typing.Sequence[str] = (),
+    profile: typing.Optional[str] = None,
+    sim_time_limit: typing.Optional[float] = None,
+    wall_time_limit: typing.Optional[float] = None,
+    profile_mode: typing.Optional[str] = None
+) -> pathlib.Path:
     """Wraps around the cocotb runner to encapsulate operations that need to be common for every test.
-    parameters refers to overloading/setting generics of the design."""
+    parameters refers to overloading/setting generics of the design.
+    sources refers to additional VHDL sources, such as generated harnesses, on top of the sources listed in the yaml.
+    profile refers to the profile of simulator options in the yaml. See select_profile for how it's selected.
+    sim_time_limit, in nanoseconds, and wall_time_limit, in seconds, override the limits of the tests' watchdogs.
+    See cocotb_introduction.watchdog for more information.
+    profile_mode refers to the mode of the profiler, i.e. sample or cprofile, which is otherwise off unless PROFILE_MODE is set.
+    See cocotb_introduction.profiling for more information.
+    Only the VHDL sources hdl_toplevel depends on are compiled, in dependency order.
+    The run is built and run in a scratch directory, if configured, and only its reports are kept in its working directory.
+    See cocotb_introduction.workdir for more information.
+    The path of the results file is returned, once every test passed. Otherwise, an AssertionError is raised,
+    so a failing run is never mistaken for a passing one, e.g. by run_sweep, even outside of pytest."""
+    selected = select_profile(profile)
 
-    # Unfortunately, it doesn't seem to be possible to log and print to standard out at the same time.
-    # For now, the following environmental variable will be used to switch logging on/off.
-    log_enable = os.environ.get("LOG_ENABLE", config.CONFIG.get("log_enable", None)) in ("1", "true", "True", "TRUE", True)
+    # The following environmental variable switches logging to files on/off.
+    # The simulation's logs are teed to standard out and sim.log by the cocotb_introduction.logger backend,
+    # whereas the build's logs can only go to build.log.
+    log_enable = os.environ.get("LOG_ENABLE", selected.get("log_enable", config.CONFIG.get("log_enable", None))) in ("1", "true", "True", "TRUE", True)
 
-    # Prepare working directory.
+    # Prepare working directory, and the directory the run is built and run in.
     work_path = pathlib.Path(work + ".work")
-    if work_path.exists():
-        shutil.rmtree(work_path.as_posix())
-    work_path.mkdir(parents=True)
+    run_path = workdir.prepare(work_path)
 
     # Pull configurations from yaml.
     runner_config = config.CONFIG['runner']
     runner = cocotb.runner.get_runner(simulator_name=runner_config['simulator'])
-    sources = list(cocotb.runner.VHDL(source) for source in
-                   itertools.chain.from_iterable(config.CONFIG_PATH.parent.glob(source) for source in runner_config['vhdl_sources']))
-
-    # Build the HDL using the cocotb runner.
-    runner.build(
-        hdl_library=runner_config['hdl_library'],
-        sources=sources,
-        build_dir=work_path,
-        log_file=work_path / "build.log" if log_enable else None,
-        always=True,
-        waves=False, # Unfortunately, waves is not yet supported, using the cocotb.runner. Waves can be generated with the Makefile approach, however.
-    )
-
-    # Run the test with cocotb runner.
-    runner.test(
-        test_module=test_module,
-        hdl_toplevel=hdl_toplevel,
-        hdl_toplevel_library=runner_config['hdl_library'],
-        log_file=work_path / "sim.log" if log_enable else None,
-        test_dir=work_path,
-        parameters=parameters)
+    index = depends.Index(vhdl_sources() + [pathlib.Path(source) for source in sources])
+    build_sources = list(cocotb.runner.VHDL(source) for source in index.sources(hdl_toplevel))
+
+    # The cocotb runner places the build arguments among nvc's global options, ahead of both the analysis and the elaboration,
+    # and always elaborates with --jit, so the profiles can't select optimisation levels or ahead-of-time compilation.
+    # Waves aren't supported by the cocotb runner either, so the waveform is requested from nvc directly, as a runtime option.
+    build_args = list(selected["build_args"])
+    test_args = list(selected["test_args"])
+    if selected["waves"]:
+        test_args.append(f"--wave={(run_path / 'waveform.fst').resolve().as_posix()}")
+
+    # Pass the logging and the watchdogs' configurations to the simulation.
+    extra_env = {}
+    if log_enable:
+        extra_env[logger.LOG_FILE_ENV] = (run_path / "sim.log").resolve().as_posix()
+    if sim_time_limit is not None:
+        extra_env[watchdog.SIM_TIME_ENV] = str(sim_time_limit)
+    if wall_time_limit is not None:
+        extra_env[watchdog.WALL_TIME_ENV] = str(wall_time_limit)
+    if profile_mode is not None:
+        extra_env[profiling.PROFILE_ENV] = profile_mode
+
+    try:
+        # Build the HDL using the cocotb runner.
+        runner.build(
+            hdl_library=runner_config['hdl_library'],
+            sources=build_sources,
+            build_args=build_args,
+            build_dir=run_path,
+            log_file=run_path / "build.log" if log_enable else None,
+            always=True,
+            waves=False,
+        )
+
+        # Run the test with cocotb runner.
+        # Under pytest, the cocotb runner raises if any test fails, otherwise the results are checked here.
+        results = runner.test(
+            test_module=test_module,
+            hdl_toplevel=hdl_toplevel,
+            hdl_toplevel_library=runner_config['hdl_library'],
+            test_dir=run_path,
+            test_args=test_args,
+            extra_env=extra_env,
+            parameters=parameters)
+        _, fails = cocotb.runner.get_results(results)
+    except BaseException:
+        # Under pytest, the cocotb runner names the results file after the test, e.g. test_fifo.None, so it's kept by name.
+        results_file = runner.env.get("COCOTB_RESULTS_FILE", None)
+        workdir.persist(work_path, run_path, passed=False, keep=() if results_file is None else (pathlib.Path(results_file).name,))
+        raise
+    workdir.persist(work_path, run_path, passed=fails == 0, keep=(results.name,))
+    if fails:
+        raise AssertionError(f"{fails} test(s) failed.")
+    return work_path / results.name
+
+
+def _run_timed(arguments: RunDict) -> typing.Tuple[str, float]:
+    """Runs a single run of a sweep, returning its work and the wall time of its results."""
+    results = run(**arguments)
+    return arguments["work"], history.results_time(results)
+
+
+def _digest(arguments: RunDict) -> str:
+    """The digest of everything a run depends on. See cocotb_introduction.depends for more information."""
+    index = depends.Index(vhdl_sources() + [pathlib.Path(source) for source in arguments.get("sources", ())])
+    return index.digest(arguments["hdl_toplevel"], arguments["test_module"])
+
+
+def _changed_only(changed_only: typing.Optional[bool]) -> bool:
+    """Pulls changed_only from the SWEEP_CHANGED_ONLY environmental variable, defaulting to off, if it isn't specified."""
+    if changed_only is None:
+        return os.environ.get("SWEEP_CHANGED_ONLY", "0") in ("1", "true", "True", "TRUE")
+    return changed_only
+
+
+def run_point(arguments: RunDict, changed_only: typing.Optional[bool] = None) -> None:
+    """Runs a single run of a sweep, typically as a pytest item generated by parametrize.
+    Like with run_sweep, the wall time of a passing run is recorded in the History database,
+    and if changed_only is on, an unchanged run is skipped through pytest.skip."""
+    digest = _digest(arguments)
+    work = arguments["work"]
+    if _changed_only(changed_only) and not depends.changed(work + ".work", digest):
+        pytest.skip(f"{work} is unchanged since it last passed.")
+    work, seconds = _run_timed(arguments)
+    history.History().update(work, seconds)
+    depends.record(work + ".work", digest)
+
+
+def parametrize(metafunc: pytest.Metafunc, runs: typing.Callable[[], typing.Mapping[str, RunDict]]) -> None:
+    """Expands the runs into one pytest item per run, for every test function of the module with an arguments parameter.
+    Called from the pytest_generate_tests hook of a test module, so runs, which returns a mapping from the stable id of each run
+    to the run, is only called when pytest collects the module, rather than whenever the module is imported, e.g. by the simulator.
+    Every point of a sweep is then its own item, which typically passes its run on to run_point,
+    so pytest-xdist distributes the points across its workers, and --lf only reruns the failing points.
+    The items are generated in the order of runs, since every worker of pytest-xdist must collect the same items in the same order."""
+    if "arguments" in metafunc.fixturenames:
+        expanded = runs()
+        metafunc.parametrize("arguments", list(expanded.values()), ids=list(expanded))
+
+
+def point_id(point: "Point", prefixes: typing.Mapping[str, str]) -> str:
+    """The stable id of a point of a sweep, joining the value of each parameter, preceded by its prefix, with dashes,
+    e.g. fifo-w8-d64-af32 for the prefixes {"top_level": "", "WIDTH": "w", "DEPTH": "d", "ALMOST_FULL_DEPTH": "af"}.
+    The prefix of a parameter missing from prefixes is its lowercase name."""
+    return "-".join(f"{prefixes.get(name, name.lower())}{value}" for name, value in point.items())
+
+
+def run_sweep(
+    runs: typing.Sequence[RunDict],
+    jobs: typing.Optional[int] = None,
+    changed_only: typing.Optional[bool] = None,
+    queue: typing.Optional[os.PathLike | str] = None
+) -> None:
+    """Runs every run of a sweep, with up to jobs runs in parallel.
+    If jobs isn't specified, it's pulled from the SWEEP_JOBS environmental variable, defaulting to 1.
+
+    The runs are submitted longest-expected-first, according to the wall times the runs took previously,
+    which are recorded in the History database. Each run is identified by its work, so works must be unique.
+    Every run is attempted, even if some fail. The first failure is then raised.
+
+    If changed_only isn't specified, it's pulled from the SWEEP_CHANGED_ONLY environmental variable, defaulting to off.
+    When on, the runs whose transitive HDL sources, test module, and cocotb_introduction package are unchanged
+    since their last passing run are skipped. See cocotb_introduction.depends for more information.
+
+    If queue isn't specified, it's pulled from the SWEEP_QUEUE environmental variable, if set.
+    With a queue, the runs are submitted as jobs into the queue directory, which workers on any host sharing the filesystem run,
+    jobs being the number of local workers, which may then be 0. See cocotb_introduction.jobqueue for more information."""
+    if jobs is None:
+        jobs = int(os.environ.get("SWEEP_JOBS", "1"))
+    if queue is None:
+        queue = os.environ.get("SWEEP_QUEUE", None)
+    assert jobs > 0 or (queue is not None and jobs == 0)
+    by_work = {arguments["work"]: arguments for arguments in runs}
+    assert len(by_work) == len(runs), "The work of each run must be unique."
+    digests = {work: _digest(arguments) for work, arguments in by_work.items()}
+    if _changed_only(changed_only):
+        by_work = {work: arguments for work, arguments in by_work.items() if depends.changed(work + ".work", digests[work])}
+    database = history.History()
+    ordered = [by_work[work] for work in database.order(by_work)]
+    failures: typing.List[BaseException] = []
+
+    def passed(work: str, seconds: float) -> None:
+        database.update(work, seconds)
+        depends.record(work + ".work", digests[work])
+
+    if queue is not None:
+        # Imported here, since the jobqueue builds on this module.
+        from . import jobqueue
+        for work, result in jobqueue.JobQueue(queue).run(ordered, workers=jobs).items():
+            if result["passed"]:
+                passed(work, result["seconds"])
+            else:
+                failures.append(jobqueue.JobFailed(f"{work} failed on {result['worker']}:\n{result['error']}"))
+    elif jobs == 1:
+        for arguments in ordered:
+            try:
+                passed(*_run_timed(arguments))
+            except (Exception, SystemExit) as failure:
+                failures.append(failure)
+    else:
+        with concurrent.futures.ProcessPoolExecutor(max_workers=jobs) as executor:
+            futures = [executor.submit(_run_timed, arguments) for arguments in ordered]
+            for future in concurrent.futures.as_completed(futures):
+                try:
+                    passed(*future.result())
+                except (Exception, SystemExit) as failure:
+                    failures.append(failure)
+
+    if failures:
+        raise failures[0]
+
+
+Point = typing.Dict[str, typing.Any]
+Constraint = typing.Callable[[Point], bool]
+
+
+class Sweep:
+    """Declares the space of a sweep, i.e. the values of each parameter and the constraints every point must satisfy.
+
+    Only the valid points are generated. Rather than every valid point, a covering array of the valid points
+    can be generated instead, in which every combination of values of any strength parameters appears in at least one point.
+    The number of points of a covering array grows roughly logarithmically with the number of parameters,
+    rather than multiplicatively like the exhaustive sweep."""
+
+    def __init__(self, parameters: typing.Mapping[str, typing.Sequence[typing.Any]], constraints: typing.Sequence[Constraint] = ()) -> None:
+        super().__init__()
+        assert parameters
+        self._parameters = {name: tuple(values) for name, values in parameters.items()}
+        self._constraints = tuple(constraints)
+
+    def valid(self, point: Point) -> bool:
+        """Indicates the point satisfies every constraint."""
+        return all(constraint(point) for constraint in self._constraints)
+
+    def exhaustive(self) -> typing.List[Point]:
+        """Generates every valid point."""
+        names = list(self._parameters)
+        points = (dict(zip(names, values)) for values in itertools.product(*self._parameters.values()))
+        return [point for point in points if self.valid(point)]
+
+    def consistent(self, point: Point) -> bool:
+        """Indicates a partial point, i.e. one with only some parameters assigned, violates none of the constraints it determines.
+        A constraint that looks up an unassigned parameter raises KeyError, so it's left undetermined."""
+        for constraint in self._constraints:
+            try:
+                if not constraint(point):
+                    return False
+            except KeyError:
+                pass
+        return True
+
+    def covering(self, strength: int = 2, candidates: int = 20) -> typing.List[Point]:
+        """Generates a covering array of the given strength, e.g. 2 for pairwise, from the valid points.
+        Only the combinations of values that appear in at least one valid point need to be covered.
+
+        The array is built AETG-style, from the combinations yet to be covered, without enumerating the valid points.
+        Each point is the best of candidates candidates. Each candidate starts from an uncovered combination,
+        then assigns the remaining parameters one at a time, in a random order, each time choosing the consistent value
+        that covers the most uncovered combinations with the parameters assigned so far.
+        If no candidate is valid, a valid point with the combination is searched for, backtracking from inconsistent partial points,
+        and if there's none, the combination isn't covered, since no valid point has it.
+        The result is small, though not necessarily minimal, and deterministic."""
+        assert strength > 0
+        assert candidates > 0
+        names = list(self._parameters)
+        if strength >= len(names):
+            return self.exhaustive()
+        groups = list(itertools.combinations(names, strength))
+        uncovered = {
+            (group, values)
+            for group in groups
+            for values in itertools.product(*(self._parameters[name] for name in group))}
+        rng = random.Random(0)
+
+        def combinations(point: Point) -> typing.Set[typing.Tuple[typing.Tuple[str, ...], typing.Tuple[typing.Any, ...]]]:
+            return {(group, tuple(point[name] for name in group)) for group in groups}
+
+        def gain(point: Point, name: str) -> int:
+            # The uncovered combinations of the groups of name whose other parameters are already assigned.
+            return sum(
+                (group, tuple(point[other] for other in group)) in uncovered
+                for group in groups
+                if name in group and all(other in point for other in group))
+
+        def candidate(point: Point) -> typing.Optional[Point]:
+            remaining = [name for name in names if name not in point]
+            rng.shuffle(remaining)
+            for name in remaining:
+                scored = []
+                for value in self._parameters[name]:
+                    point[name] = value
+                    if self.consistent(point):
+                        scored.append((gain(point, name), rng.random(), value))
+                if not scored:
+                    return None
+                point[name] = max(scored)[2]
+            return {name: point[name] for name in names} if self.valid(point) else None
+
+        def search(point: Point) -> typing.Optional[Point]:
+            if not self.consistent(point):
+                return None
+            remaining = [name for name in names if name not in point]
+            if not remaining:
+                return {name: point[name] for name in names} if self.valid(point) else None
+            for value in self._parameters[remaining[0]]:
+                if (found := search({**point, remaining[0]: value})) is not None:
+                    return found
+            return None
+
+        chosen = []
+        while uncovered:
+            group, values = min(uncovered, key=lambda combination: (names.index(combination[0][0]), repr(combination)))
+            best: typing.Optional[Point] = None
+            best_gain = 0
+            if self.consistent(dict(zip(group, values))):
+                for _ in range(candidates):
+                    point = candidate(dict(zip(group, values)))
+                    if point is not None and (covered := len(combinations(point) & uncovered)) > best_gain:
+                        best, best_gain = point, covered
+                if best is None:
+                    best = search(dict(zip(group, values)))
+            if best is None:
+                uncovered.discard((group, values))
+                continue
+            chosen.append(best)
+            uncovered -= combinations(best)
+        return chosen
+
+    def points(self, strength: typing.Optional[int] = None) -> typing.List[Point]:
+        """Generates the points of the sweep. If strength isn't specified, it's pulled from the SWEEP_STRENGTH environmental variable.
+        A strength of 0, the default, generates every valid point, otherwise the covering array of that strength is generated."""
+        if strength is None:
+            strength = int(os.environ.get("SWEEP_STRENGTH", "0"))
+        if strength == 0:
+            return self.exhaustive()
+        return self.covering(strength)
@@ -0,0 +1,160 @@
+"""
+Contains the PooledScoreboard, which evaluates the reference model of a scoreboard in a pool of processes.
+
+A scoreboard normally predicts each output inline, on the simulator's thread, which is fine for an adder,
+but a reference model taking milliseconds per transaction, e.g. of a DSP or a crypto core, stalls the simulation.
+The PooledScoreboard instead collects the inputs into batches, submits each batch to a pool of worker processes,
+and compares the predictions against the outputs as the predictions return, in order.
+The simulation only waits on the model once window batches are in flight, i.e. the prediction window is full,
+or once finish is called at the end of the test.
+
+A batch is submitted once it holds batch inputs, or earlier, once an output arrives that no submitted input predicts,
+so a trickle of transactions is still compared promptly.
+
+The model predicts a whole batch of outputs from a batch of inputs. It's sent to the workers by pickling,
+so it must be a function defined at the top level of a module, or a functools.partial of one, and so must its inputs and outputs.
+The workers are spawned rather than forked, since forking the simulator is unsafe,
+and they're shared by every PooledScoreboard with the same number of workers, for the rest of the simulation.
+With 0 workers, the model is evaluated inline instead, batch by batch, e.g. for cheap models or for debugging.
+The number of workers defaults to the SCOREBOARD_WORKERS environmental variable, or 0.
+"""
+import atexit
+import collections
+import concurrent.futures
+import logging
+import multiprocessing
+import os
+import typing
+from . import logger
+from . import watchdog
+
+
+WORKERS_ENV = "SCOREBOARD_WORKERS"
+
+
+Model = typing.Callable[[typing.List[typing.Any]], typing.List[typing.Any]]
+"""Predicts the outputs of a batch of inputs."""
+
+
+_pools: typing.Dict[int, concurrent.futures.ProcessPoolExecutor] = {}
+
+
+def pool(workers: int) -> concurrent.futures.ProcessPoolExecutor:
+    """The pool of workers worker processes, spawned on first use and shut down once the simulation exits."""
+    assert workers > 0
+    if workers not in _pools:
+        if not _pools:
+            atexit.register(shutdown)
+        _pools[workers] = concurrent.futures.ProcessPoolExecutor(
+            max_workers=workers,
+            mp_context=multiprocessing.get_context("spawn"))
+    return _pools[workers]
+
+
+def shutdown() -> None:
+    """Shuts down every pool."""
+    for executor in _pools.values():
+        executor.shutdown(cancel_futures=True)
+    _pools.clear()
+
+
+class _Done:
+    """Stands in for the future of a batch predicted inline."""
+
+    def __init__(self, predictions: typing.List[typing.Any]) -> None:
+        super().__init__()
+        self._predictions = predictions
+
+    def done(self) -> bool:
+        return True
+
+    def result(self) -> typing.List[typing.Any]:
+        return self._predictions
+
+
+class PooledScoreboard:
+    """Compares the outputs passed to actual against the predictions of model for the inputs passed to expect, in order.
+    Inputs are submitted batch at a time, with at most window batches in flight. workers defaults to SCOREBOARD_WORKERS."""
+
+    def __init__(
+        self,
+        model: Model,
+        batch: int = 64,
+        window: int = 8,
+        workers: typing.Optional[int] = None,
+        name: str = "scoreboard"
+    ) -> None:
+        super().__init__()
+        if workers is None:
+            workers = int(os.environ.get(WORKERS_ENV, 0))
+        assert batch > 0
+        assert window > 0
+        assert workers >= 0
+        self._model = model
+        self._batch = batch
+        self._window = window
+        self._workers = workers
+        self._inputs: typing.List[typing.Any] = []
+        self._in_flight: typing.Deque[typing.Union[concurrent.futures.Future, _Done]] = collections.deque()
+        self._expected: typing.Deque[typing.Any] = collections.deque()
+        self._actual: typing.Deque[typing.Any] = collections.deque()
+        self._submitted = 0
+        self._compared = 0
+        self._log = logging.getLogger(f"cocotb.{name}")
+        logger.rate_limit(self._log)
+        watchdog.register(self, name)
+
+    @property
+    def compared(self) -> int:
+        """The number of outputs compared so far."""
+        return self._compared
+
+    @property
+    def pending(self) -> int:
+        """The number of inputs whose outputs are yet to be compared."""
+        return self._submitted + len(self._inputs) - self._compared
+
+    def expect(self, input: typing.Any) -> None:
+        """Adds the input of the next expected output."""
+        self._inputs.append(input)
+        if len(self._inputs) >= self._batch:
+            self._submit()
+        self._compare()
+
+    def actual(self, output: typing.Any) -> None:
+        """Adds the next actual output, comparing it once its prediction is available."""
+        self._actual.append(output)
+        if self._compared + len(self._actual) > self._submitted and self._inputs:
+            self._submit()
+        self._compare()
+
+    def finish(self) -> None:
+        """Waits for every prediction in flight, and compares the remaining outputs. Asserts every input got its output."""
+        if self._inputs:
+            self._submit()
+        while self._in_flight:
+            self._expected.extend(self._in_flight.popleft().result())
+            self._compare()
+        assert not self._expected and not self._actual, \
+            f"{len(self._expected)} predictions and {len(self._actual)} outputs were left uncompared."
+
+    def _submit(self) -> None:
+        # Once the window is full, the simulation waits for the oldest batch.
+        while len(self._in_flight) >= self._window:
+            self._expected.extend(self._in_flight.popleft().result())
+        inputs, self._inputs = self._inputs, []
+        if self._workers:
+            self._in_flight.append(pool(self._workers).submit(self._model, inputs))
+        else:
+            self._in_flight.append(_Done(self._model(inputs)))
+        self._submitted += len(inputs)
+
+    def _compare(self) -> None:
+        while self._in_flight and self._in_flight[0].done():
+            self._expected.extend(self._in_flight.popleft().result())
+        while self._expected and self._actual:
+            exp = self._expected.popleft()
+            act = self._actual.popleft()
+            self._log.info("Comparing expected %s against actual %s...", exp, act)
+            assert exp == act, f"Output {self._compared}: expected {exp} but got {act}."
+            self._compared += 1
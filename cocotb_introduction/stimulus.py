@@ -0,0 +1,125 @@
+"""
+Contains the generators of constrained-random stimulus.
+
+Instead of drawing each value from Python's random module, the stimulus is generated in large blocks
+with the NumPy generator shared with cocotb_introduction.timing, which is seeded from cocotb's RANDOM_SEED.
+The constraints are applied to whole blocks at once:
+    - the values are drawn uniformly from a range, by default the full range of a bit width,
+    - a fraction of the values is replaced by corner values, by default the bounds of the range, e.g. 0 and the mask, and
+    - values wider than 64 bits are assembled from whole arrays of random 64-bit words, shifted and OR-ed together.
+
+The blocks are generated lazily and fed into the drivers with feed,
+which bounds the number of outstanding messages, so multi-million beat tests don't hold all their stimulus in memory.
+The generation can also be open-ended and stopped by a condition, such as the closure of functional coverage.
+See cocotb_introduction.closure for more information.
+"""
+import numpy as np
+import typing
+from .timing import generator
+from .messages import WriteMessage, ReadMessage
+
+
+Column = typing.Callable[[int], typing.Union[np.ndarray, typing.Sequence[typing.Any]]]
+Message = typing.Union[WriteMessage, ReadMessage]
+
+
+def integers(
+    count: int,
+    width: int,
+    low: int = 0,
+    high: typing.Optional[int] = None,
+    corners: typing.Optional[typing.Sequence[int]] = None,
+    corner_weight: float = 0.0,
+    rng: typing.Optional[np.random.Generator] = None
+) -> np.ndarray:
+    """Generates count integers of width bits, drawn uniformly from low to high inclusively.
+    high defaults to the mask of width.
+    Each value is replaced with one of the corners, by default low and high, with the probability corner_weight.
+    Values of up to 64 bits are returned as an unsigned integer array, wider values as an object array of Python integers."""
+    assert count >= 0
+    assert width > 0
+    assert 0.0 <= corner_weight <= 1.0
+    mask = (1 << width) - 1
+    if high is None:
+        high = mask
+    assert 0 <= low <= high <= mask
+    if corners is None:
+        corners = (low, high)
+    if rng is None:
+        rng = generator()
+
+    if width <= 64:
+        values = rng.integers(low, high, size=count, endpoint=True, dtype=np.uint64)
+    else:
+        assert low == 0 and high == mask, "Ranges are only supported for widths of up to 64 bits."
+        # Draws a 64-bit word per value for each 64 bits of the width, the top word masked to the remaining bits.
+        words = (width + 63) // 64
+        draws = rng.integers(0, np.iinfo(np.uint64).max, size=(words, count), endpoint=True, dtype=np.uint64)
+        draws[-1] &= np.uint64((1 << (width - 64 * (words - 1))) - 1)
+        values = draws[0].astype(object)
+        for word in range(1, words):
+            values |= draws[word].astype(object) << (64 * word)
+
+    if corner_weight > 0.0 and corners:
+        replace = rng.random(count) < corner_weight
+        choices = np.array(corners, dtype=values.dtype)
+        values[replace] = choices[rng.integers(0, len(choices), size=int(replace.sum()))]
+    return values
+
+
+def ramp(count: int, width: int, start: int = 0) -> np.ndarray:
+    """Generates count consecutive integers from start, wrapped around to width bits."""
+    assert width <= 64
+    return (np.arange(start, start + count, dtype=np.uint64) & np.uint64((1 << width) - 1))
+
+
+def blocks(
+    total: typing.Optional[int],
+    block: int,
+    *columns: Column,
+    until: typing.Optional[typing.Callable[[], bool]] = None
+) -> typing.Iterator[typing.Tuple[typing.List[typing.Any], ...]]:
+    """Lazily generates total rows of stimulus, block rows at a time.
+    Each column is a callable that generates the given number of values, e.g. lambda count: integers(count, 8).
+    Each block is yielded as a tuple of columns, converted to lists of Python objects.
+    If until is specified, it's checked before each block, and the generation stops once it returns True.
+    If total is None, the generation only stops with until."""
+    assert block > 0
+    assert total is not None or until is not None
+    generated = 0
+    while total is None or generated < total:
+        if until is not None and until():
+            break
+        count = block if total is None else min(block, total - generated)
+        yield tuple(_tolist(column(count)) for column in columns)
+        generated += count
+
+
+def _tolist(values: typing.Union[np.ndarray, typing.Sequence[typing.Any]]) -> typing.List[typing.Any]:
+    """Converts the values into a list of Python objects, which are far cheaper to drive than NumPy scalars."""
+    if isinstance(values, np.ndarray):
+        return values.tolist()
+    return list(values)
+
+
+async def feed(
+    submit: typing.Callable[..., Message],
+    stimulus: typing.Iterable[typing.Tuple[typing.Sequence[typing.Any], ...]],
+    backlog: int = 1024
+) -> typing.Tuple[int, typing.Optional[Message]]:
+    """Submits every row of the stimulus blocks as a message, e.g. submit=driver.write, where each column is an argument.
+    At most backlog messages are left outstanding, so the blocks are generated only as the driver catches up.
+    The number of messages submitted and the last message submitted, or None if there was no stimulus, are returned."""
+    assert backlog > 0
+    outstanding: typing.List[Message] = []
+    message = None
+    count = 0
+    for columns in stimulus:
+        for row in zip(*columns):
+            message = submit(*row)
+            outstanding.append(message)
+            count += 1
+        if len(outstanding) > backlog:
+            await outstanding[-backlog - 1].started_wait()
+            del outstanding[:-backlog]
+    return count, message
@@ -0,0 +1,167 @@
+"""
+Contains the BeatBuffer, which streams the beats a write driver got accepted straight to the scoreboards.
+
+Scoreboards otherwise recover the expected stream by monitoring the input side of the DUT, even though the write driver
+already knows every beat it got accepted, and when. A write driver given a BeatBuffer through its publish argument instead
+publishes each beat into the buffer once the beat is accepted, i.e. on the same edge a monitor of the input side would observe it.
+The input side then only needs to be monitored if it isn't trusted, e.g. to verify the driver itself.
+
+Each beat gets a sequence number, counting from 0, along with the sim time and the cycle it was accepted in.
+The buffer is a ring of NumPy columns, preallocated for capacity beats, which grows whenever the slowest reader falls capacity beats behind.
+Each consumer, e.g. a scoreboard or a StreamAnalyzer, reads the buffer through a BeatReader of its own,
+which must be created before the first beat is published. A reader either pops beats one at a time,
+or takes views of the pending beats, without copying them, and releases them once consumed.
+"""
+import cocotb.triggers as triggers
+import cocotb.utils as utils
+import numpy as np
+import typing
+from . import watchdog
+
+
+class BeatEmpty(BaseException):
+    pass
+
+
+class Beat(typing.NamedTuple):
+    """A beat accepted by a write driver."""
+    sequence: int
+    time: int
+    cycle: int
+    data: typing.Any
+
+
+class BeatBuffer:
+    """Buffers the beats published by a write driver, initially capacity beats at most.
+
+    period and units specify the period of the clock, which is used to derive the cycle of each beat from its sim time.
+    encode converts the data of the beats into the data column, which holds dtype, e.g. np.uint64, or object for data wider than 64 bits.
+    decode converts the data column back, when popping beats, e.g. Layout.unpack for struct-like data encoded with Layout.pack."""
+
+    def __init__(
+        self,
+        capacity: int = 1024,
+        period: int = 10,
+        units: str = "ns",
+        encode: typing.Callable[[typing.Any], typing.Any] = int,
+        decode: typing.Optional[typing.Callable[[typing.Any], typing.Any]] = None,
+        dtype: typing.Any = np.uint64
+    ) -> None:
+        super().__init__()
+        assert capacity > 0
+        self._period = utils.get_sim_steps(period, units)
+        self._encode = encode
+        self._decode = decode
+        self._time = np.zeros(capacity, dtype=np.uint64)
+        self._cycle = np.zeros(capacity, dtype=np.uint64)
+        self._data = np.zeros(capacity, dtype=dtype)
+        self._head = 0
+        self._readers: typing.List["BeatReader"] = []
+        self._event = triggers.Event()
+        watchdog.register(self)
+
+    def __len__(self) -> int:
+        """The number of beats the slowest reader has yet to release."""
+        return self._head - self._tail
+
+    @property
+    def capacity(self) -> int:
+        """The number of beats the buffer holds before growing."""
+        return len(self._data)
+
+    @property
+    def published(self) -> int:
+        """The number of beats published so far, i.e. the sequence number of the next beat."""
+        return self._head
+
+    @property
+    def _tail(self) -> int:
+        return min((reader._tail for reader in self._readers), default=self._head)
+
+    def reader(self) -> "BeatReader":
+        """Creates a reader, which starts with the next beat published."""
+        reader = BeatReader(self, self._head)
+        self._readers.append(reader)
+        return reader
+
+    def publish(self, data: typing.Any) -> int:
+        """Publishes a beat accepted now, returning its sequence number."""
+        if self._head - self._tail == len(self._data):
+            self._grow()
+        time = utils.get_sim_time()
+        index = self._head % len(self._data)
+        self._time[index] = time
+        self._cycle[index] = time // self._period
+        self._data[index] = self._encode(data)
+        self._head += 1
+        self._event.set()
+        return self._head - 1
+
+    def _grow(self) -> None:
+        """Doubles the capacity, moving the beats yet to be released to their indices within the larger ring."""
+        sequences = np.arange(self._tail, self._head)
+        old, new = sequences % len(self._data), sequences % (2 * len(self._data))
+        for name in ("_time", "_cycle", "_data"):
+            column = getattr(self, name)
+            grown = np.zeros(2 * len(column), dtype=column.dtype)
+            grown[new] = column[old]
+            setattr(self, name, grown)
+
+
+class BeatReader:
+    """Reads the beats of a BeatBuffer, in order of their sequence numbers. Created by BeatBuffer.reader."""
+
+    def __init__(self, buffer: BeatBuffer, tail: int) -> None:
+        super().__init__()
+        self._buffer = buffer
+        self._tail = tail
+
+    def __len__(self) -> int:
+        """The number of beats yet to be read."""
+        return self._buffer._head - self._tail
+
+    @property
+    def empty(self) -> bool:
+        """Indicates no beat is yet to be read."""
+        return self._buffer._head == self._tail
+
+    @property
+    def event(self) -> triggers.PythonTrigger:
+        """Current task resumes when a beat is published."""
+        self._buffer._event.clear()
+        return self._buffer._event.wait()
+
+    def pending(self) -> typing.Tuple[int, np.ndarray, np.ndarray, np.ndarray]:
+        """The sequence number of the next beat to be read, along with views of the time, cycle, and data columns of the beats
+        yet to be read, up to the end of the ring. The views aren't copies, so they're only valid until released with release."""
+        buffer = self._buffer
+        start = self._tail % len(buffer._data)
+        stop = start + min(len(self), len(buffer._data) - start)
+        return self._tail, buffer._time[start:stop], buffer._cycle[start:stop], buffer._data[start:stop]
+
+    def release(self, count: int) -> None:
+        """Releases the next count beats, i.e. marks them as read."""
+        assert 0 <= count <= len(self)
+        self._tail += count
+
+    def pop(self) -> Beat:
+        """Reads the next beat."""
+        if self.empty:
+            raise BeatEmpty()
+        buffer = self._buffer
+        index = self._tail % len(buffer._data)
+        data = buffer._data[index]
+        data = int(data) if buffer._data.dtype != object else data
+        beat = Beat(
+            sequence=self._tail,
+            time=int(buffer._time[index]),
+            cycle=int(buffer._cycle[index]),
+            data=data if buffer._decode is None else buffer._decode(data))
+        self._tail += 1
+        return beat
+
+    async def pop_wait(self) -> Beat:
+        """Current task resumes when a beat is available, then the beat is read."""
+        while self.empty:
+            await self.event
+        return self.pop()
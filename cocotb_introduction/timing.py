@@ -0,0 +1,128 @@
+"""
+Contains the facilities for expressing the timing of stimulus in clock cycles.
+
+Instead of awaiting Timers of arbitrary durations between messages, which wake the client tasks at times
+the drivers ignore until the next edge anyway, the client tasks pass a delay in cycles along with each message.
+The driver then holds off the message for that many edges on its own, so no scheduler events occur off the clock edges,
+and the same traffic pattern is produced regardless of the period of the clock.
+
+Whole schedules of delays are precomputed as arrays with a NumPy generator seeded from cocotb's RANDOM_SEED,
+so the traffic patterns are also reproducible.
+
+Backpressure and bursty traffic are instead expressed as a Throttle, which decides cycle by cycle whether a driver
+may accept, or start presenting, a beat. The decisions are precomputed in blocks from a pattern, either a fixed mask,
+a random duty cycle, or bursts generated by a two-state Markov chain, so no client objects are involved per beat.
+"""
+import cocotb
+import cocotb.handle as handle
+import cocotb.triggers as triggers
+import numpy as np
+import typing
+
+
+_generator: typing.Optional[np.random.Generator] = None
+
+
+def generator() -> np.random.Generator:
+    """The generator shared by the schedules and the stimulus.
+    It's seeded once from cocotb's RANDOM_SEED, so a test is reproduced by rerunning it with the same seed."""
+    global _generator
+    if _generator is None:
+        _generator = np.random.default_rng(getattr(cocotb, "RANDOM_SEED", None))
+    return _generator
+
+
+def gaps(count: int, low: int, high: int, rng: typing.Optional[np.random.Generator] = None) -> np.ndarray:
+    """Precomputes count delays in cycles, drawn uniformly from low to high inclusively.
+    Negative delays are clipped to 0, so a negative low sets the probability of back-to-back messages."""
+    assert count >= 0
+    assert low <= high
+    if rng is None:
+        rng = generator()
+    return np.maximum(rng.integers(low, high, size=count, endpoint=True), 0)
+
+
+async def hold(clk: handle.SimHandleBase, cycles: int) -> None:
+    """Called by a driver right after a rising edge of clk to hold off a message for cycles edges.
+    The final edge is left for the driver to await, so the driver resumes after cycles - 1 edges."""
+    if cycles > 1:
+        await triggers.ClockCycles(clk, cycles - 1)
+
+
+Pattern = typing.Callable[[int], np.ndarray]
+"""Generates the given number of the next decisions of a Throttle, as a boolean array."""
+
+
+class Throttle:
+    """Decides, cycle by cycle, whether a driver may accept or start presenting a beat.
+    The decisions are generated by pattern, block cycles at a time."""
+
+    def __init__(self, pattern: Pattern, block: int = 4096) -> None:
+        super().__init__()
+        assert block > 0
+        self._pattern = pattern
+        self._block = block
+        self._decisions: typing.List[bool] = []
+        self._index = 0
+
+    def next(self) -> bool:
+        """The decision of the next cycle."""
+        if self._index == len(self._decisions):
+            self._decisions = self._pattern(self._block).tolist()
+            self._index = 0
+        decision = self._decisions[self._index]
+        self._index += 1
+        return decision
+
+
+def mask(bits: typing.Union[np.ndarray, typing.Sequence[bool]], repeat: bool = True) -> Throttle:
+    """Throttles with a fixed mask, one decision per cycle, repeated if repeat is set.
+    Otherwise, every cycle after the mask is allowed."""
+    bits = np.asarray(bits, dtype=bool)
+    assert bits.size > 0
+    offset = 0
+
+    def pattern(count: int) -> np.ndarray:
+        nonlocal offset
+        indices = np.arange(offset, offset + count)
+        offset += count
+        if repeat:
+            return bits[indices % bits.size]
+        return np.concatenate((bits[indices[indices < bits.size]], np.ones(int((indices >= bits.size).sum()), dtype=bool)))
+
+    return Throttle(pattern)
+
+
+def duty(ratio: float, rng: typing.Optional[np.random.Generator] = None) -> Throttle:
+    """Throttles randomly, allowing each cycle independently with the probability ratio."""
+    assert 0.0 <= ratio <= 1.0
+    if rng is None:
+        rng = generator()
+    return Throttle(lambda count: rng.random(count) < ratio)
+
+
+def markov(stop: float, start: float, rng: typing.Optional[np.random.Generator] = None) -> Throttle:
+    """Throttles in bursts, generated by a two-state Markov chain. Bursts of allowed cycles end with the probability stop each cycle,
+    and gaps of throttled cycles end with the probability start each cycle, so the mean lengths are 1/stop and 1/start cycles.
+    The long-run ratio of allowed cycles is start / (start + stop)."""
+    assert 0.0 < stop <= 1.0
+    assert 0.0 < start <= 1.0
+    if rng is None:
+        rng = generator()
+    leftover = np.zeros(0, dtype=bool)
+
+    def pattern(count: int) -> np.ndarray:
+        nonlocal leftover
+        chunks = [leftover]
+        generated = leftover.size
+        while generated < count:
+            runs = 64
+            lengths = np.column_stack((rng.geometric(stop, runs), rng.geometric(start, runs))).ravel()
+            chunk = np.repeat(np.tile(np.array([True, False]), runs), lengths)
+            chunks.append(chunk)
+            generated += chunk.size
+        decisions = np.concatenate(chunks)
+        leftover = decisions[count:]
+        return decisions[:count]
+
+    return Throttle(pattern)
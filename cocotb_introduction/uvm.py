@@ -0,0 +1,165 @@
+"""
+Contains the pyuvm adapters that move transactions through the UVM plumbing in batches.
+
+In a conventional pyuvm testbench, every transaction crosses start_item/finish_item, get_next_item/item_done,
+a message to the driver, and an analysis port into a uvm_tlm_analysis_fifo, one handoff after another per beat.
+The adapters instead carry a batch of transactions per sequence item and per analysis write,
+so the cost of the UVM plumbing is paid once per batch, while the drivers still process each beat on its own.
+
+    - BatchItem carries the data and the delays of a batch of beats.
+    - BatchWriteDriver and BatchReadDriver submit a whole BatchItem to a write or read driver of cocotb_introduction.
+      BatchReadDriver writes the data it read to its analysis port, a batch at a time, and drain waits for the reads in flight.
+    - BatchMonitor writes the data observed by a monitor of cocotb_introduction to its analysis port, a batch at a time.
+    - BatchScoreboard compares the predictions of a batch of inputs against the outputs, a batch at a time,
+      and checks as many outputs as inputs came through.
+
+Every batch written to an analysis port is a list. The remaining partial batches are flushed in the extract phase,
+so they're compared in the check phase.
+"""
+import pyuvm
+import typing
+
+
+class BatchItem(pyuvm.uvm_sequence_item):
+    """A batch of beats, i.e. the data of each beat, if any, and the number of cycles the driver holds off before each beat.
+    A read batch carries no data, so its size is the number of delays."""
+
+    def __init__(self, name: str, data: typing.Sequence[typing.Any] = (), delays: typing.Optional[typing.Sequence[int]] = None) -> None:
+        super().__init__(name)
+        self.data = list(data)
+        self.delays = [0] * len(self.data) if delays is None else list(delays)
+        assert not self.data or len(self.data) == len(self.delays)
+
+    def __len__(self) -> int:
+        return len(self.delays)
+
+    def __eq__(self, other: typing.Any) -> bool:
+        assert isinstance(other, type(self))
+        return self.data == other.data and self.delays == other.delays
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}(size={len(self)})"
+
+
+class BatchWriteDriver(pyuvm.uvm_driver):
+    """Submits the data of each BatchItem to driver, anything with a write(data, delay) method,
+    which is assigned by a subclass, typically in the start_of_simulation_phase.
+    The next BatchItem is only requested once the last write of the current one starts, so at most a batch is outstanding."""
+
+    driver: typing.Any = None
+
+    async def run_phase(self) -> None:
+        assert self.driver is not None
+        while True:
+            batch: BatchItem = await self.seq_item_port.get_next_item()
+            message = None
+            for data, delay in zip(batch.data, batch.delays):
+                message = self.driver.write(data, delay=delay)
+            self.seq_item_port.item_done()
+            if message is not None:
+                await message.started_wait()
+
+
+class BatchReadDriver(pyuvm.uvm_driver):
+    """Submits a read for each beat of each BatchItem to driver, anything with a read(delay) method,
+    which is assigned by a subclass, typically in the start_of_simulation_phase.
+    The data read for each BatchItem is written to ap as a list by a callback on the batch's last read,
+    so no coroutine waits on the reads in flight. Since a BatchItem is done before its reads are,
+    the test awaits drain before it drops its objection, so the last batch is written to ap."""
+
+    driver: typing.Any = None
+
+    def build_phase(self) -> None:
+        self.ap = pyuvm.uvm_analysis_port("ap", self)
+        self.outstanding: typing.Any = None
+
+    async def run_phase(self) -> None:
+        assert self.driver is not None
+        while True:
+            batch: BatchItem = await self.seq_item_port.get_next_item()
+            messages = [self.driver.read(delay=delay) for delay in batch.delays]
+            if messages:
+                messages[-1].on_processed(lambda _, messages=messages: self.ap.write([message.data for message in messages]))
+                self.outstanding = messages[-1]
+            self.seq_item_port.item_done()
+            if messages:
+                await messages[-1].started_wait()
+
+    async def drain(self) -> None:
+        """Current task resumes when the last read submitted has gotten processed, so every batch has been written to ap."""
+        if self.outstanding is not None:
+            await self.outstanding.processed_wait()
+
+
+class BatchMonitor(pyuvm.uvm_component):
+    """Writes the data observed by monitor, anything with the event and message properties,
+    to ap as lists of up to batch beats. monitor is assigned by a subclass, typically in the build_phase,
+    and batch can be overridden by the subclass too."""
+
+    monitor: typing.Any = None
+    batch: int = 256
+
+    def build_phase(self) -> None:
+        self.ap = pyuvm.uvm_analysis_port("ap", self)
+        self._pending: typing.List[typing.Any] = []
+
+    async def run_phase(self) -> None:
+        assert self.monitor is not None
+        while True:
+            await self.monitor.event
+            self._pending.append(self.monitor.message.data)
+            if len(self._pending) >= self.batch:
+                self.flush()
+
+    def flush(self) -> None:
+        """Writes the pending data to ap, if any."""
+        if self._pending:
+            self.ap.write(self._pending)
+            self._pending = []
+
+    def extract_phase(self) -> None:
+        self.flush()
+
+
+class BatchScoreboard(pyuvm.uvm_component):
+    """Compares the outputs predicted from the batches of inputs written to input_export
+    against the batches of outputs written to output_export. The batches needn't line up,
+    since the inputs and outputs are compared as streams. Subclasses override predict,
+    which predicts a whole batch of outputs at once, e.g. with NumPy."""
+
+    def build_phase(self) -> None:
+        self.input_fifo = pyuvm.uvm_tlm_analysis_fifo("input_fifo", self)
+        self.output_fifo = pyuvm.uvm_tlm_analysis_fifo("output_fifo", self)
+        self.input_get_port = pyuvm.uvm_get_port("input_get_port", self)
+        self.output_get_port = pyuvm.uvm_get_port("output_get_port", self)
+        self.input_export = self.input_fifo.analysis_export
+        self.output_export = self.output_fifo.analysis_export
+
+    def connect_phase(self) -> None:
+        self.input_get_port.connect(self.input_fifo.get_export)
+        self.output_get_port.connect(self.output_fifo.get_export)
+
+    def predict(self, inputs: typing.List[typing.Any]) -> typing.List[typing.Any]:
+        """Predicts the outputs of a batch of inputs."""
+        raise NotImplementedError()
+
+    def check_phase(self) -> None:
+        expected: typing.List[typing.Any] = []
+        actual: typing.List[typing.Any] = []
+        while self.input_get_port.can_get():
+            success, inputs = self.input_get_port.try_get()
+            assert success
+            expected.extend(self.predict(inputs))
+        while self.output_get_port.can_get():
+            success, outputs = self.output_get_port.try_get()
+            assert success
+            actual.extend(outputs)
+        compared = min(len(expected), len(actual))
+        if len(expected) != len(actual):
+            self.logger.error("Expected %d beats but got %d.", len(expected), len(actual))
+        mismatches = [index for index in range(compared) if expected[index] != actual[index]]
+        self.logger.info("Compared %d beats, with %d mismatches.", compared, len(mismatches))
+        for index in mismatches[:16]:
+            self.logger.error("Beat %d: expected %s but got %s.", index, expected[index], actual[index])
+        assert len(expected) == len(actual)
+        assert not mismatches
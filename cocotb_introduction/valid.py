@@ -4,64 +4,86 @@ Contains the ValidDriver and the ValidMonitor implementations.
 import cocotb
 from .queue import Queue
 from .messages import WriteMessage, MonitorMessage
+from .timing import hold
+from . import packed
+from . import watchdog
 import cocotb.handle as handle
 import cocotb.triggers as triggers
+import cocotb.utils as utils
 import typing
+if typing.TYPE_CHECKING:
+    from .recorder import Channel
+    from .stream import BeatBuffer
 
 
 class ValidDriver:
-    """Writes messages to the valid interface."""
+    """Writes messages to the valid interface. The lifecycle events of the messages are recorded to record, if specified.
+    The data of the messages is published to publish once written, if specified. See cocotb_introduction.stream for more information."""
 
     def __init__(
         self,
         clk: handle.SimHandleBase,
         rst: handle.SimHandleBase,
         valid: handle.SimHandleBase,
-        data: handle.SimHandleBase
+        data: handle.SimHandleBase,
+        record: typing.Optional["Channel"] = None,
+        publish: typing.Optional["BeatBuffer"] = None
     ) -> None:
         super().__init__()
         self._message = Queue[WriteMessage]()
+        self._msg: typing.Optional[WriteMessage] = None
+        watchdog.register(self)
 
         async def drive_valid_data() -> None:
-            msg = None
             valid.value = 0
             while True:
                 await triggers.RisingEdge(clk)
                 if rst.value.binstr != "0":
                     valid.value = 0
-                    assert msg is None, "Reset occurred during an oustanding transaction."
+                    assert self._msg is None, "Reset occurred during an oustanding transaction."
                     await triggers.FallingEdge(rst)
                 else:
-                    if msg is not None:
-                        assert msg is not None
-                        msg._process()
-                        msg = None
+                    if self._msg is not None:
+                        assert self._msg is not None
+                        self._msg._process()
+                        if record is not None:
+                            record.processed(self._msg.data)
+                        if publish is not None:
+                            publish.publish(self._msg.data)
+                        self._msg = None
                         valid.value = 0
-                    if msg is None and not self._message.empty:
-                        msg = self._message.pop()
-                        msg._start()
-                        data.value = msg.data
+                    if self._msg is None and not self._message.empty and self._message.peek().delay:
+                        await hold(clk, self._message.peek()._hold())
+                        continue
+                    if self._msg is None and not self._message.empty:
+                        self._msg = self._message.pop()
+                        self._msg._start()
+                        if record is not None:
+                            record.started(self._msg.data)
+                        packed.write(data, self._msg.data)
                         valid.value = 1
-                    if msg is None and self._message.empty:
+                    if self._msg is None and self._message.empty:
                         await triggers.First(triggers.Edge(rst), self._message.event)
 
         cocotb.start_soon(drive_valid_data())
 
-    def write(self, data: int) -> WriteMessage:
-        msg = WriteMessage(data)
+    def write(self, data: int, delay: int = 0) -> WriteMessage:
+        """Submit a write message to the driver. The driver holds off for delay cycles before writing the data."""
+        msg = WriteMessage(data, delay)
         self._message.push(msg)
         return msg
 
 
 class ValidMonitor:
-    """Observes a valid interface."""
+    """Observes a valid interface. The observed messages are recorded to record, if specified."""
 
     def __init__(
         self,
         clk: handle.SimHandleBase,
         rst: handle.SimHandleBase,
         valid: handle.SimHandleBase,
-        data: handle.SimHandleBase
+        data: handle.SimHandleBase,
+        record: typing.Optional["Channel"] = None
     ) -> None:
         super().__init__()
         self._msg: typing.Optional[MonitorMessage] = None
@@ -74,7 +96,9 @@ class ValidMonitor:
                     self._msg = None
                 else:
                     if valid.value.integer == 1:
-                        self._msg = MonitorMessage(data.value.integer)
+                        self._msg = MonitorMessage(packed.read(data), utils.get_sim_time())
+                        if record is not None:
+                            record.observed(self._msg.data)
                         self._evt.set()
                     else:
                         await triggers.First(triggers.Edge(rst), triggers.Edge(valid))
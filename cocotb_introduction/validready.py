@@ -5,11 +5,18 @@ It should be noted the valid-ready interface is simply a watered down version of
 where there's only clk, rst, data, valid, and ready. The rst is assert-on-high.
 """
 import cocotb.triggers as triggers
+import cocotb.utils as utils
 import cocotb
 import typing
 from .queue import Queue
 from .messages import WriteMessage, ReadMessage, MonitorMessage
+from .timing import hold, Throttle
+from . import packed
+from . import watchdog
 import cocotb.handle as handle
+if typing.TYPE_CHECKING:
+    from .recorder import Channel
+    from .stream import BeatBuffer
 
 
 class ValidReadyInterface(typing.TypedDict):
@@ -22,7 +29,10 @@ class ValidReadyInterface(typing.TypedDict):
 
 
 class ValidReadyWriteDriver:
-    """Writes data to the valid-ready interface."""
+    """Writes data to the valid-ready interface. The lifecycle events of the messages are recorded to record, if specified.
+    If a throttle is specified, a message only starts, i.e. valid is only asserted, on the cycles the throttle allows.
+    Once asserted, valid stays asserted until the data is accepted.
+    The data of the messages is published to publish once accepted, if specified. See cocotb_introduction.stream for more information."""
 
     def __init__(
         self,
@@ -30,47 +40,74 @@ class ValidReadyWriteDriver:
         rst: handle.SimHandleBase,
         valid: handle.SimHandleBase,
         ready: handle.SimHandleBase,
-        data: handle.SimHandleBase
+        data: handle.SimHandleBase,
+        record: typing.Optional["Channel"] = None,
+        throttle: typing.Optional[Throttle] = None,
+        publish: typing.Optional["BeatBuffer"] = None
     ) -> None:
         super().__init__()
         self._messages = Queue[WriteMessage]()
+        self._msg: typing.Optional[WriteMessage] = None
+        watchdog.register(self)
+        self._throttle = throttle
 
         async def drive_valid_data() -> None:
             valid.value = 0
-            msg = None
             while True:
                 await triggers.RisingEdge(clk)
                 if rst.value.binstr != "0":
-                    assert msg is None, "Reset occurred during oustanding transaction."
+                    assert self._msg is None, "Reset occurred during oustanding transaction."
                     valid.value = 0
                     await triggers.FallingEdge(rst)
                 else:
-                    if msg is not None and ready.value.integer == 1:
-                        msg._process()
-                        msg = None
+                    if self._msg is not None and ready.value.integer == 1:
+                        self._msg._process()
+                        if record is not None:
+                            record.processed(self._msg.data)
+                        if publish is not None:
+                            publish.publish(self._msg.data)
+                        self._msg = None
                         valid.value = 0
                         pass
-                    if msg is None and not self._messages.empty:
-                        msg = self._messages.pop()
-                        msg._start()
-                        data.value = msg.data
+                    if self._msg is None and not self._messages.empty and self._messages.peek().delay:
+                        await hold(clk, self._messages.peek()._hold())
+                        continue
+                    if self._msg is None and not self._messages.empty and (self._throttle is None or self._throttle.next()):
+                        self._msg = self._messages.pop()
+                        self._msg._start()
+                        if record is not None:
+                            record.started(self._msg.data)
+                        packed.write(data, self._msg.data)
                         valid.value = 1
-                    if msg is None and self._messages.empty:
+                    if self._msg is None and self._messages.empty:
                         await triggers.First(triggers.Edge(rst), self._messages.event)
-                    elif msg is not None and ready.value.integer == 0:
+                    elif self._msg is not None and ready.value.integer == 0:
                         await triggers.First(triggers.Edge(rst), triggers.Edge(ready))
 
         cocotb.start_soon(drive_valid_data())
 
-    def write(self, data: int) -> WriteMessage:
-        """Submit a write message to the driver."""
-        message = WriteMessage(data)
+    @property
+    def throttle(self) -> typing.Optional[Throttle]:
+        """The throttle deciding on which cycles messages can start."""
+        return self._throttle
+
+    @throttle.setter
+    def throttle(self, throttle: typing.Optional[Throttle]) -> None:
+        self._throttle = throttle
+
+    def write(self, data: int, delay: int = 0) -> WriteMessage:
+        """Submit a write message to the driver. The driver holds off for delay cycles before writing the data."""
+        message = WriteMessage(data, delay)
         self._messages.push(message)
         return message
 
 
 class ValidReadyReadDriver:
-    """Reads data from the valid-ready interface."""
+    """Reads data from the valid-ready interface. The lifecycle events of the messages are recorded to record, if specified.
+    If a throttle is specified, ready is only asserted on the cycles the throttle allows.
+
+    In sink mode, the driver accepts data without any read messages, e.g. when the data is checked through a monitor instead.
+    The data accepted in sink mode is still recorded to record."""
 
     def __init__(
         self,
@@ -78,45 +115,82 @@ class ValidReadyReadDriver:
         rst: handle.SimHandleBase,
         valid: handle.SimHandleBase,
         ready: handle.SimHandleBase,
-        data: handle.SimHandleBase
+        data: handle.SimHandleBase,
+        record: typing.Optional["Channel"] = None,
+        throttle: typing.Optional[Throttle] = None
     ) -> None:
         super().__init__()
         self._messages = Queue[ReadMessage]()
+        self._msg: typing.Optional[ReadMessage] = None
+        self._accepting = False
+        watchdog.register(self)
+        self._throttle = throttle
+        self._sink = False
+        self._sink_evt = triggers.Event()
 
         async def drive_ready() -> None:
-            msg = None
             ready.value = 0
             while True:
                 await triggers.RisingEdge(clk)
                 if rst.value.binstr != "0":
-                    assert msg is None, "Reset occurred on outstanding transaction."
+                    assert self._msg is None, "Reset occurred on outstanding transaction."
+                    self._accepting = False
                     ready.value = 0
                     await triggers.FallingEdge(rst)
                 else:
-                    if msg is not None and valid.value.integer == 1:
-                        msg._process(data.value.integer)
-                        msg = None
+                    if self._accepting and valid.value.integer == 1:
+                        if self._msg is not None:
+                            self._msg._process(packed.read(data))
+                            if record is not None:
+                                record.processed(self._msg.data)
+                            self._msg = None
+                        elif record is not None:
+                            record.processed(packed.read(data))
+                    if self._msg is None and not self._messages.empty and self._messages.peek().delay:
+                        self._accepting = False
                         ready.value = 0
-                    if msg is None and not self._messages.empty:
-                        msg = self._messages.pop()
-                        msg._start()
-                        ready.value = 1
-                    if msg is None and self._messages.empty:
-                        await triggers.First(triggers.Edge(rst), self._messages.event)
-                    elif msg is not None and valid.value.integer == 0:
+                        await hold(clk, self._messages.peek()._hold())
+                        continue
+                    if self._msg is None and not self._messages.empty:
+                        self._msg = self._messages.pop()
+                        self._msg._start()
+                        if record is not None:
+                            record.started()
+                    self._accepting = (self._msg is not None or self._sink) and (self._throttle is None or self._throttle.next())
+                    ready.value = int(self._accepting)
+                    if self._msg is None and not self._sink and self._messages.empty:
+                        self._sink_evt.clear()
+                        await triggers.First(triggers.Edge(rst), self._messages.event, self._sink_evt.wait())
+                    elif self._accepting and self._throttle is None and valid.value.integer == 0:
                         await triggers.First(triggers.Edge(rst), triggers.Edge(valid))
 
         cocotb.start_soon(drive_ready())
 
-    def read(self) -> ReadMessage:
-        """Submit a read message to the driver."""
-        message = ReadMessage()
+    @property
+    def throttle(self) -> typing.Optional[Throttle]:
+        """The throttle deciding on which cycles ready is asserted."""
+        return self._throttle
+
+    @throttle.setter
+    def throttle(self, throttle: typing.Optional[Throttle]) -> None:
+        self._throttle = throttle
+
+    def sink(self, enable: bool = True) -> None:
+        """Switches sink mode on or off. Sink mode can't be mixed with read messages."""
+        assert self._messages.empty, "Sink mode can't be switched with outstanding read messages."
+        self._sink = enable
+        self._sink_evt.set()
+
+    def read(self, delay: int = 0) -> ReadMessage:
+        """Submit a read message to the driver. The driver holds off for delay cycles before reading the data."""
+        assert not self._sink, "Read messages can't be submitted in sink mode."
+        message = ReadMessage(delay)
         self._messages.push(message)
         return message
 
 
 class ValidReadyMonitor:
-    """Observes a valid-ready interface."""
+    """Observes a valid-ready interface. The observed messages are recorded to record, if specified."""
 
     def __init__(
         self,
@@ -124,7 +198,8 @@ class ValidReadyMonitor:
         rst: handle.SimHandleBase,
         valid: handle.SimHandleBase,
         ready: handle.SimHandleBase,
-        data: handle.SimHandleBase
+        data: handle.SimHandleBase,
+        record: typing.Optional["Channel"] = None
     ) -> None:
         super().__init__()
         self._msg: typing.Optional[MonitorMessage] = None
@@ -137,7 +212,9 @@ class ValidReadyMonitor:
                     pass
                 else:
                     if valid.value.integer == 1 and ready.value.integer == 1:
-                        self._msg = MonitorMessage(data.value.integer)
+                        self._msg = MonitorMessage(packed.read(data), utils.get_sim_time())
+                        if record is not None:
+                            record.observed(self._msg.data)
                         self._evt.set()
                     else:
                         await triggers.First(triggers.Edge(rst), triggers.Edge(valid), triggers.Edge(ready))
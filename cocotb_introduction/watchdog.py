@@ -0,0 +1,169 @@
+"""
+Contains the Watchdog, which caps the simulated and wall-clock time of a test, and the registry of the objects it reports on.
+
+A deadlocked driver, or a client awaiting a message that never gets processed, otherwise leaves the clock running
+until the whole job is killed. The Watchdog instead aborts the test once either limit expires, after dumping the state
+of every registered object, e.g. the depth of each Queue, the message at its head, and the state of each driver,
+to the log and to the watchdog file of the working directory.
+
+The drivers and the queues of cocotb_introduction register themselves. The registry only holds weak references,
+so registering an object never keeps it alive. Only the attributes of an object are dumped, so the drivers keep the state
+a dump should show, e.g. the message in flight, as attributes rather than as locals of their coroutines.
+
+The wall-clock limit is checked from within the simulation, every poll of simulated time, so the test is aborted
+like any other failing test. If the simulation stops advancing altogether, e.g. a coroutine spins without awaiting,
+a thread dumps the state instead, once the grace period past the limit expires, and exits the simulator.
+
+The limits are configured per test through the arguments of the Watchdog, and per run through the WATCHDOG_SIM_TIME,
+in nanoseconds, and WATCHDOG_WALL_TIME, in seconds, environmental variables, which take precedence.
+runner.run sets the variables from its sim_time_limit and wall_time_limit arguments, so each point of a sweep gets its own limits.
+"""
+import cocotb
+import cocotb.triggers as triggers
+import cocotb.utils as utils
+import os
+import pathlib
+import sys
+import threading
+import time
+import typing
+import weakref
+import yaml
+from .messages import Lifecycle
+
+
+SIM_TIME_ENV = "WATCHDOG_SIM_TIME"
+WALL_TIME_ENV = "WATCHDOG_WALL_TIME"
+WATCHDOG_FILE = "watchdog.yaml"
+GRACE = 30.0
+"""Seconds past the wall-clock limit after which the thread exits the simulator, if the simulation hasn't aborted the test itself."""
+
+
+_registry: "weakref.WeakKeyDictionary[typing.Any, str]" = weakref.WeakKeyDictionary()
+
+
+class WatchdogExpired(BaseException):
+    """Indicates a watchdog expired, i.e. the test ran out of simulated or wall-clock time."""
+    pass
+
+
+def register(obj: typing.Any, name: typing.Optional[str] = None) -> None:
+    """Registers obj, so its state is dumped when a watchdog expires. name defaults to the type and the id of obj."""
+    _registry[obj] = name if name is not None else f"{type(obj).__name__}@{id(obj):x}"
+
+
+def registered() -> typing.List[typing.Tuple[typing.Any, str]]:
+    """Every registered object that's still alive, along with its name."""
+    return list(_registry.items())
+
+
+def _describe(value: typing.Any) -> typing.Any:
+    """Describes the state of value, or returns None if value has no describable state."""
+    if isinstance(value, Lifecycle):
+        described = {"type": type(value).__name__, "delay": value.delay, "started": value.started, "processed": value.processed}
+        data = getattr(value, "_data", None)
+        if data is not None:
+            described["data"] = data if isinstance(data, int) else str(data)
+        return described
+    if isinstance(value, (bool, int, float, str)):
+        return value
+    if isinstance(value, typing.Sized) and hasattr(value, "peek"):
+        return {
+            "depth": len(value),
+            "high_water": getattr(value, "high_water", None),
+            "head": _describe(value.peek()) if len(value) else None}
+    return None
+
+
+def state() -> typing.Dict[str, typing.Dict[str, typing.Any]]:
+    """The state of every registered object that's still alive, i.e. every attribute with a describable state."""
+    states = {}
+    for obj, name in registered():
+        described = _describe(obj)
+        if described is not None:
+            states[name] = described
+            continue
+        states[name] = {
+            attribute: described
+            for attribute, described in ((attribute, _describe(value)) for attribute, value in vars(obj).items())
+            if described is not None}
+    return states
+
+
+def dump(reason: str, sim_time: typing.Optional[float] = None) -> pathlib.Path:
+    """Dumps the state of every registered object, along with reason and the simulated time in nanoseconds, if known,
+    to the watchdog file of the working directory, returning the path of the file."""
+    path = pathlib.Path(os.environ.get("WORK_DIR", "")) / WATCHDOG_FILE
+    with open(path, "w") as file:
+        yaml.safe_dump({"reason": reason, "sim_time_ns": sim_time, "objects": state()}, file, sort_keys=False)
+    return path
+
+
+class Watchdog:
+    """Caps the test at sim_time of simulated time, in units, and wall_time seconds of wall-clock time.
+    Either limit is disabled if None, unless set by its environmental variable.
+    The wall-clock limit is checked every poll nanoseconds of simulated time."""
+
+    def __init__(
+        self,
+        sim_time: typing.Optional[float] = None,
+        wall_time: typing.Optional[float] = None,
+        units: str = "ns",
+        poll: float = 10000
+    ) -> None:
+        super().__init__()
+        if SIM_TIME_ENV in os.environ:
+            sim_time = utils.get_time_from_sim_steps(utils.get_sim_steps(float(os.environ[SIM_TIME_ENV]), "ns"), units)
+        if WALL_TIME_ENV in os.environ:
+            wall_time = float(os.environ[WALL_TIME_ENV])
+        assert sim_time is None or sim_time > 0
+        assert wall_time is None or wall_time > 0
+        self._sim_time = sim_time
+        self._wall_time = wall_time
+        self._units = units
+        self._poll = poll
+        self._tasks: typing.List[cocotb.task.Task] = []
+
+    def start(self) -> "Watchdog":
+        """Starts the watchdog. It's cancelled along with every other task at the end of the test."""
+        log = cocotb.log.getChild("watchdog")
+
+        def expire(reason: str) -> typing.NoReturn:
+            path = dump(reason, utils.get_sim_time("ns"))
+            log.error("%s The state of the registered objects is dumped into %s.", reason, path)
+            raise WatchdogExpired(reason)
+
+        async def watch_sim_time() -> None:
+            await triggers.Timer(self._sim_time, self._units)
+            expire(f"Simulated time limit of {self._sim_time} {self._units} expired.")
+
+        async def watch_wall_time() -> None:
+            while True:
+                await triggers.Timer(self._poll, "ns")
+                if time.monotonic() - started > self._wall_time:
+                    expire(f"Wall-clock time limit of {self._wall_time} s expired.")
+
+        def watch_stalled(task: cocotb.task.Task) -> None:
+            while not task.done():
+                time.sleep(1.0)
+                if time.monotonic() - started > self._wall_time + GRACE and not task.done():
+                    # The simulator isn't thread-safe, so the simulated time isn't queried from this thread.
+                    reason = f"Wall-clock time limit of {self._wall_time} s expired and the simulation stalled."
+                    path = dump(reason)
+                    print(f"{reason} The state of the registered objects is dumped into {path}.", file=sys.stderr, flush=True)
+                    os._exit(1)
+
+        started = time.monotonic()
+        if self._sim_time is not None:
+            self._tasks.append(cocotb.start_soon(watch_sim_time()))
+        if self._wall_time is not None:
+            task = cocotb.start_soon(watch_wall_time())
+            self._tasks.append(task)
+            threading.Thread(target=watch_stalled, args=(task,), daemon=True).start()
+        return self
+
+    def cancel(self) -> None:
+        """Cancels the watchdog before the end of the test."""
+        for task in self._tasks:
+            task.kill()
+        self._tasks = []
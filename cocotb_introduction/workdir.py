@@ -0,0 +1,103 @@
+"""
+Contains the policy of the working directories, i.e. where runs are built and run, what's kept of them, and for how long.
+
+runner.run builds and runs each run within its working directory, <work>.work, which ends up holding the simulator's whole build tree
+next to the few reports anyone reads, such as results.xml and coverage.yaml. With the policy:
+    - The run is built and run in a scratch directory under WORK_SCRATCH, if set, e.g. a tmpfs such as /dev/shm,
+      so the build tree never touches the shared or persistent filesystem. Otherwise, the run is built and run in place.
+    - Once the run passes, only the reports matching KEEP are kept in the working directory.
+      The artifacts matching ARTIFACTS, i.e. the logs, waveforms, transactions and profiles, are removed along with the build tree.
+    - Once the run fails, the reports are kept too, and the whole tree, artifacts included, is kept alongside, compressed into ARCHIVE.
+The policy is selected through the WORK_PERSIST environmental variable:
+    - reports, the default, applies the policy above.
+    - artifacts keeps the artifacts of every run in the working directory too, e.g. to look into the waveforms of passing runs.
+    - all keeps the whole tree of every run, uncompressed, as before.
+
+retain applies a retention policy to the working directories, removing the least recently used ones first,
+until they fit a size cap and none is older than a maximum age. The clean task of tests/tasks.py applies it.
+"""
+import fnmatch
+import os
+import pathlib
+import shutil
+import tarfile
+import tempfile
+import time
+import typing
+
+
+SCRATCH_ENV = "WORK_SCRATCH"
+PERSIST_ENV = "WORK_PERSIST"
+ARCHIVE = "artifacts.tar.gz"
+KEEP: typing.Tuple[str, ...] = ("*results.xml", "*.yaml", "*.sha256")
+"""The patterns of the reports kept within the working directory, matched against the names of the entries at its top."""
+ARTIFACTS: typing.Tuple[str, ...] = ("*.log", "waveform.*", "transactions", "*.folded", "*.pstats")
+"""The patterns of the artifacts also kept within the working directory if WORK_PERSIST is artifacts."""
+
+
+def prepare(work_path: pathlib.Path) -> pathlib.Path:
+    """Prepares the empty working directory work_path, returning the directory the run is built and run in,
+    which is a new scratch directory if WORK_SCRATCH is set, otherwise work_path itself."""
+    if work_path.exists():
+        shutil.rmtree(work_path)
+    work_path.mkdir(parents=True)
+    scratch = os.environ.get(SCRATCH_ENV, None)
+    if not scratch:
+        return work_path
+    pathlib.Path(scratch).mkdir(parents=True, exist_ok=True)
+    return pathlib.Path(tempfile.mkdtemp(prefix=f"{work_path.name}.", dir=scratch))
+
+
+def persist(work_path: pathlib.Path, run_path: pathlib.Path, passed: bool, keep: typing.Sequence[str] = ()) -> None:
+    """Persists the run built and run in run_path into work_path, according to the policy, and removes the scratch directory, if any.
+    keep holds the names of further reports to keep on top of KEEP, e.g. the results file, which the cocotb runner names after the test under pytest."""
+    mode = os.environ.get(PERSIST_ENV, "reports")
+    if mode == "all":
+        if run_path != work_path:
+            shutil.copytree(run_path, work_path, dirs_exist_ok=True)
+            shutil.rmtree(run_path)
+        return
+    # The archive is written outside of run_path, since run_path may be work_path itself.
+    archive_path = work_path.parent / f".{work_path.name}.{ARCHIVE}"
+    if not passed:
+        with tarfile.open(archive_path, "w:gz") as archive:
+            archive.add(run_path, arcname=work_path.name)
+    patterns = KEEP + ARTIFACTS if mode == "artifacts" else KEEP
+    for entry in list(run_path.iterdir()):
+        kept = entry.name in keep or any(fnmatch.fnmatch(entry.name, pattern) for pattern in patterns)
+        if kept and run_path != work_path:
+            shutil.move(entry, work_path / entry.name)
+        elif not kept and entry.is_dir():
+            shutil.rmtree(entry)
+        elif not kept:
+            entry.unlink()
+    if run_path != work_path:
+        shutil.rmtree(run_path)
+    if not passed:
+        os.replace(archive_path, work_path / ARCHIVE)
+
+
+def size(path: pathlib.Path) -> int:
+    """The size in bytes of every file under path."""
+    return sum(entry.stat().st_size for entry in path.rglob("*") if entry.is_file())
+
+
+def retain(
+    root: os.PathLike | str = ".",
+    max_bytes: typing.Optional[int] = None,
+    max_age: typing.Optional[float] = None
+) -> typing.List[pathlib.Path]:
+    """Removes the working directories under root that are older than max_age seconds,
+    then the least recently modified ones until the rest fit within max_bytes. Returns the working directories removed."""
+    now = time.time()
+    works = sorted(pathlib.Path(root).glob("*.work"), key=lambda path: path.stat().st_mtime, reverse=True)
+    removed = []
+    total = 0
+    for path in works:
+        used = size(path)
+        if (max_age is not None and now - path.stat().st_mtime > max_age) or (max_bytes is not None and total + used > max_bytes):
+            shutil.rmtree(path)
+            removed.append(path)
+        else:
+            total += used
+    return removed
@@ -0,0 +1,55 @@
+"""
+Contains the fixtures shared by the tests of cocotb_introduction that don't need a simulator.
+"""
+import os
+import pathlib
+import typing
+import pytest
+import cocotb_introduction.history as history
+import cocotb_introduction.runner as runner
+import cocotb_introduction.workdir as workdir
+
+
+class FakeRunner:
+    """Stands in for the cocotb runner of nvc. Each run records a single testcase, of 1.5 seconds, or of 4 seconds failing if the FAIL parameter is set.
+    Like the cocotb runner, if PYTEST_CURRENT_TEST is set, the results file is named after the pytest test and the results_xml argument,
+    and a failing run raises SystemExit."""
+
+    def __init__(self) -> None:
+        super().__init__()
+        self.env: typing.Dict[str, str] = {}
+
+    def build(self, build_dir: pathlib.Path, **kwargs) -> None:
+        (build_dir / "top").mkdir()
+        (build_dir / "top" / "_top.so").write_bytes(bytes(1024))
+
+    def test(self, test_dir: pathlib.Path, parameters: dict, results_xml: typing.Optional[str] = None, **kwargs) -> pathlib.Path:
+        pytest_current_test = os.environ.get("PYTEST_CURRENT_TEST", None)
+        if pytest_current_test is not None:
+            results = test_dir / f"{pytest_current_test.split(':')[-1].split(' ')[0]}.{results_xml}"
+        else:
+            results = test_dir / (results_xml or "results.xml")
+        self.env["COCOTB_RESULTS_FILE"] = str(results)
+        seconds, failure = (4.0, "<failure/>") if parameters.get("FAIL", 0) else (1.5, "")
+        results.write_text(f"<testsuites><testsuite><testcase name=\"test\" time=\"{seconds}\">{failure}</testcase></testsuite></testsuites>")
+        if pytest_current_test is not None and failure:
+            raise SystemExit("ERROR: Failed 1 of 1 tests.")
+        return results
+
+
+@pytest.fixture
+def fake_runs(tmp_path, monkeypatch) -> typing.Callable[..., runner.RunDict]:
+    """Runs the runs with the FakeRunner, in place, from tmp_path as the current directory, which also holds the History database.
+    Returns a factory of the runs, which fail if fail is set."""
+    monkeypatch.setattr(runner.cocotb.runner, "get_runner", lambda simulator_name: FakeRunner())
+    monkeypatch.delenv(workdir.SCRATCH_ENV, raising=False)
+    monkeypatch.delenv(workdir.PERSIST_ENV, raising=False)
+    monkeypatch.delenv("LOG_ENABLE", raising=False)
+    monkeypatch.setenv(history.HISTORY_ENV, (tmp_path / "history.sqlite").as_posix())
+    monkeypatch.chdir(tmp_path)
+
+    def make(work: str, fail: bool = False) -> runner.RunDict:
+        return runner.RunDict(
+            hdl_toplevel="fifo", test_module="tests.test_fifo", work=work, parameters={"FAIL": int(fail)})
+
+    return make
@@ -1,10 +1,15 @@
 import invoke
 import invoke.exceptions as exceptions
 import typing
-import itertools
 import sys
 import pathlib
 import bs4
+import cocotb_introduction.analytics as analytics
+import cocotb_introduction.runner as runner
+import cocotb_introduction.depends as depends
+import cocotb_introduction.clocking as clocking
+import cocotb_introduction.jobqueue as jobqueue
+import cocotb_introduction.workdir as workdir
 
 
 class SimulationFailure(BaseException):
@@ -12,8 +17,21 @@ class SimulationFailure(BaseException):
     pass
 
 
-def run_simulation(c: invoke.Context, module_name: str, top_level: str, work_dir: typing.Optional[str] = None, sim_args: typing.Optional[str] = None) -> None:
-    """Creates the command for the specified cocotb test with make."""
+def run_simulation(
+    c: invoke.Context,
+    module_name: str,
+    top_level: str,
+    work_dir: typing.Optional[str] = None,
+    sim_args: typing.Optional[str] = None,
+    extra_sources: typing.Sequence[pathlib.Path] = (),
+    profile: str = "debug",
+    profile_mode: str = ""
+) -> None:
+    """Creates the command for the specified cocotb test with make.
+    extra_sources refers to generated VHDL sources, such as clocked wrappers, on top of the sources listed in the yaml.
+    profile refers to the profile of simulator options in the yaml, which SIM_PROFILE overrides.
+    Unlike with the cocotb runner, the debug profile is the default, so waves are dumped.
+    profile_mode refers to the mode of the profiler, i.e. sample or cprofile. See cocotb_introduction.profiling for more information."""
 
     # Determine work directory.
     if work_dir is None:
@@ -28,16 +46,27 @@ def run_simulation(c: invoke.Context, module_name: str, top_level: str, work_dir
     waveform_path = work_path / "waveform.vcd"
     results_path = work_path / "results.xml"
     error_path = work_path / "error.log"
+    log_path = work_path / "sim.log"
+
+    # Compile only the sources the top level depends on, overriding the full list in the Makefile.
+    sources = depends.Index(runner.vhdl_sources() + [source.resolve() for source in extra_sources]).sources(top_level)
+
+    # The build arguments of the profile are nvc's global options, which the Makefile takes as EXTRA_ARGS.
+    selected = runner.select_profile(profile)
+    run_args = list(selected["test_args"]) + ([f"--wave={waveform_path.as_posix()}"] if selected["waves"] else [])
 
     # Create the simulation command and run the test.
     command = (f"MODULE={module_name} " +
         f"TOPLEVEL={top_level} " +
         f"SIM_BUILD={work_path.as_posix()} " +
         f"WORK_DIR={work_path.as_posix()} " +
-        f"SIM_ARGS=\"--wave={waveform_path.as_posix()} " +
+        f"EXTRA_ARGS=\"{' '.join(selected['build_args'])}\" " +
+        f"SIM_ARGS=\"{' '.join(run_args)} " +
         ("" if sim_args is None else f"{sim_args} ") + "\" " +
         f"COCOTB_RESULTS_FILE={results_path.as_posix()} " +
-        f"make " +
+        f"COCOTB_INTRODUCTION_LOG_FILE={log_path.resolve().as_posix()} " +
+        (f"PROFILE_MODE={profile_mode} " if profile_mode else "") +
+        f"make VHDL_SOURCES=\"{' '.join(source.as_posix() for source in sources)}\" " +
         f"2>{error_path.as_posix()}")
 
     # Run command. Catch any errors and dump the logs.
@@ -70,9 +99,37 @@ def run_simulation(c: invoke.Context, module_name: str, top_level: str, work_dir
 
 
 @invoke.task
-def clean(c: invoke.Context) -> None:
-    """Removes all the working directories."""
-    c.run("rm -rf *.work")
+def clean(c: invoke.Context, max_mb: float = 0, max_age_days: float = 0) -> None:
+    """Removes all the working directories, or, given max_mb or max_age_days, only the least recently used ones
+    past the size cap and the ones older than the maximum age. See cocotb_introduction.workdir for more information."""
+    if not max_mb and not max_age_days:
+        c.run("rm -rf *.work")
+        return
+    removed = workdir.retain(
+        ".",
+        max_bytes=int(max_mb * 1024 ** 2) if max_mb else None,
+        max_age=max_age_days * 24 * 60 * 60 if max_age_days else None)
+    print(f"Removed {len(removed)} working directories.")
+
+
+@invoke.task
+def sweep_worker(c: invoke.Context, queue: str, lease: float = 120.0) -> None:
+    """Runs the jobs of a sweep's queue directory until the queue is idle. Run from the same shared directory as the coordinator."""
+    print(f"Ran {jobqueue.work(queue, lease=lease)} jobs.")
+
+
+@invoke.task
+def performance(c: invoke.Context) -> None:
+    """Compares the performance measured in each working directory."""
+    print(f"{'work':<56} {'in/cyc':>8} {'out/cyc':>8} {'lat p50':>8} {'lat p99':>8} {'occ max':>8}")
+    for work, summary in analytics.collect().items():
+        print(f"{work:<56} "
+              f"{summary['input_throughput']:>8.3f} "
+              f"{summary['output_throughput']:>8.3f} "
+              f"{summary['latency']['p50']!s:>8} "
+              f"{summary['latency']['p99']!s:>8} "
+              f"{summary['occupancy']['max']!s:>8} " +
+              " ".join(f"{name}={ratio:.3f}" for name, ratio in summary['stalls'].items()))
 
 
 @invoke.task
@@ -83,60 +140,76 @@ def simple_tests(c: invoke.Context) -> None:
 
 
 @invoke.task
-def adder_tests(c: invoke.Context) -> None:
+def adder_tests(c: invoke.Context, profile_mode: str = "") -> None:
     """Verifies the adder."""
     widths = (2, 4, 8)
+    source = clocking.write("clocked.harness", "simple_adder", clocking.ADDER_GENERICS, clocking.SIMPLE_ADDER_PORTS)
     for width in widths:
         run_simulation(
             c=c,
             module_name="test_adder",
-            top_level="simple_adder",
+            top_level=clocking.toplevel("simple_adder"),
             work_dir=f"adder_tests_width_{width}",
-            sim_args=f"-gWIDTH={width}")
+            sim_args=f"-gWIDTH={width}",
+            extra_sources=[source],
+            profile_mode=profile_mode)
 
 
 @invoke.task
-def back_adder_tests(c: invoke.Context) -> None:
+def back_adder_tests(c: invoke.Context, profile_mode: str = "") -> None:
     """Verifies the adder with back pressure."""
     widths = (16, 32,)
+    source = clocking.write("clocked.harness", "back_adder", clocking.ADDER_GENERICS, clocking.BACK_ADDER_PORTS)
     for width in widths:
         run_simulation(
             c=c,
             module_name="test_back_adder",
-            top_level="back_adder",
+            top_level=clocking.toplevel("back_adder"),
             work_dir=f"back_adder_tests_width_{width}",
-            sim_args=f"-gWIDTH={width}")
+            sim_args=f"-gWIDTH={width}",
+            extra_sources=[source],
+            profile_mode=profile_mode)
 
 
 @invoke.task
-def back_adder_uvm(c: invoke.Context) -> None:
+def back_adder_uvm(c: invoke.Context, profile_mode: str = "") -> None:
     """Verifies the adder with back pressure, using pyuvm."""
     widths = (16,)
+    source = clocking.write("clocked.harness", "back_adder", clocking.ADDER_GENERICS, clocking.BACK_ADDER_PORTS)
     for width in widths:
         run_simulation(
             c=c,
             module_name="test_back_adder_uvm",
-            top_level="back_adder",
+            top_level=clocking.toplevel("back_adder"),
             work_dir=f"back_adder_uvm_width_{width}",
-            sim_args=f"-gWIDTH={width}")
+            sim_args=f"-gWIDTH={width}",
+            extra_sources=[source],
+            profile_mode=profile_mode)
 
 
 @invoke.task
-def fifo_tests(c: invoke.Context) -> None:
-    """Verifies the fifo. Includes functional coverage with cocotb_coverage."""
-    top_levels = ("fifo", "bfifo",)
-    widths = (4, 8,)
-    depths = (2, 32, 64,)
-    af_depths = (2, 16, 32,)
-    for top_level, width, depth, af_depth in itertools.product(top_levels, widths, depths, af_depths):
-        if af_depth > depth:
-            continue
+def fifo_tests(c: invoke.Context, strength: int = 0, profile_mode: str = "") -> None:
+    """Verifies the fifo. Includes functional coverage with cocotb_coverage.
+    A non-zero strength only runs a covering array of that strength, e.g. 2 for pairwise.
+    A profile_mode of sample or cprofile profiles each run. See cocotb_introduction.profiling for more information."""
+    sweep = runner.Sweep(
+        parameters={
+            "top_level": ("fifo", "bfifo",),
+            "WIDTH": (4, 8,),
+            "DEPTH": (2, 32, 64,),
+            "ALMOST_FULL_DEPTH": (2, 16, 32,)},
+        constraints=(lambda point: point["ALMOST_FULL_DEPTH"] <= point["DEPTH"],))
+    for point in sweep.points(strength):
+        top_level, width, depth, af_depth = point["top_level"], point["WIDTH"], point["DEPTH"], point["ALMOST_FULL_DEPTH"]
+        source = clocking.write("clocked.harness", top_level, clocking.FIFO_GENERICS)
         run_simulation(
             c=c,
             module_name="test_fifo",
-            top_level=top_level,
+            top_level=clocking.toplevel(top_level),
             work_dir=f"{top_level}_tests_width_{width}_depth_{depth}_afdepth_{af_depth}",
-            sim_args=f"-gWIDTH={width} -gDEPTH={depth} -gALMOST_FULL_DEPTH={af_depth}")
+            sim_args=f"-gWIDTH={width} -gDEPTH={depth} -gALMOST_FULL_DEPTH={af_depth}",
+            extra_sources=[source],
+            profile_mode=profile_mode)
 
 
 @invoke.task
@@ -190,6 +263,8 @@ ns.add_collection(tests_ns)
 ns.add_collection(tutorial_ns)
 ns.add_task(run)
 ns.add_task(clean)
+ns.add_task(performance)
+ns.add_task(sweep_worker)
 
 
 
@@ -1,11 +1,15 @@
 import cocotb
-import cocotb.clock as clock
 import cocotb.handle as handle
 import cocotb.triggers as triggers
-import random
 from cocotb_introduction import reset
 import cocotb_introduction.valid as validmdl
 import cocotb_introduction.runner as runner
+import cocotb_introduction.logger as logger
+import cocotb_introduction.timing as timing
+import cocotb_introduction.packed as packed
+import cocotb_introduction.clocking as clocking
+import cocotb_introduction.memory as memory
+import cocotb_introduction.watchdog as watchdog
 import typing
 
 
@@ -14,35 +18,15 @@ class ABData(typing.NamedTuple):
     b: int
 
 
-class ABDataHandle:
-    def __init__(self, a: handle.SimHandleBase, b: handle.SimHandleBase) -> None:
-        super().__init__()
-        self._a = a
-        self._b = b
-
-    @property
-    def integer(self) -> ABData:
-        return ABData(a=self._a.value.integer, b=self._b.value.integer)
-
-    @property
-    def value(self) -> typing.Self:
-        return self
-
-    @value.setter
-    def value(self, value: ABData) -> None:
-        self._a.value = value.a
-        self._b.value = value.b
-
-
 @cocotb.test()
 async def random_test(top: handle.SimHandleBase) -> None:
     ab_driver = validmdl.ValidDriver(
         clk=top.clk,
         rst=top.rst,
         valid=top.abValid,
-        data=ABDataHandle( # Using duct-typing here to fake it till we make it
-            a=top.aData,
-            b=top.bData))
+        data=packed.CompositeHandle(
+            packed.Layout({"a": len(top.aData), "b": len(top.bData)}, ABData),
+            {"a": top.aData, "b": top.bData}))
 
     r_monitor = validmdl.ValidMonitor(
         clk=top.clk,
@@ -58,35 +42,48 @@ async def random_test(top: handle.SimHandleBase) -> None:
     r_data = [ (a + b) & mask for a, b in zip(a_data, b_data)]
 
     async def drive_data() -> None:
-        for a, b in zip(a_data, b_data):
-            msg = ab_driver.write(ABData(a, b))
-            wait = random.randint(-100, 50)
-            if wait > 0:
-                await triggers.Timer(wait, "ns")
-            await msg.started_wait()
+        for a, b, gap in zip(a_data, b_data, timing.gaps(total, -10, 5).tolist()):
+            msg = ab_driver.write(ABData(a, b), delay=gap)
+        await msg.processed_wait()
 
     async def check_data() -> None:
+        log = cocotb.log.getChild("check_data")
+        logger.rate_limit(log)
         for exp in r_data:
             await r_monitor.event
             act = r_monitor.message.data
-            cocotb.log.info(f"Comparing expected {exp} against actual {act}...")
+            log.info("Comparing expected %d against actual %d...", exp, act)
             assert exp == act
 
-    cocotb.start_soon(clock.Clock(top.clk, 10, "ns").start())
+    clocking.Clock(top, 10, "ns").start()
+    watchdog.Watchdog(sim_time=100, wall_time=300, units="us").start()
+    memory.Monitor().start()
     cocotb.start_soon(reset(top.clk, top.rst))
     await triggers.Combine(cocotb.start_soon(drive_data()), cocotb.start_soon(check_data()))
 
 
-def test_adder() -> None:
+def runs() -> typing.Dict[str, runner.RunDict]:
+    """The runs of the sweep over the widths, by their stable ids, e.g. w2."""
     widths = (2, 4, 8)
-    for width in widths:
-        runner.run(
-            hdl_toplevel="simple_adder",
+    source = clocking.write("clocked.harness", "simple_adder", clocking.ADDER_GENERICS, clocking.SIMPLE_ADDER_PORTS)
+    return {
+        runner.point_id({"WIDTH": width}, {"WIDTH": "w"}): runner.RunDict(
+            hdl_toplevel=clocking.toplevel("simple_adder"),
             test_module="tests.test_adder",
             work=f"adder_tests_width_{width}",
-            parameters={"WIDTH": width})
+            parameters={"WIDTH": width},
+            sources=[source.resolve().as_posix()])
+        for width in widths}
+
+
+def pytest_generate_tests(metafunc) -> None:
+    runner.parametrize(metafunc, runs)
+
+
+def test_adder(arguments: runner.RunDict) -> None:
+    runner.run_point(arguments)
 
 
 if __name__ == "__main__":
-    test_adder()
+    runner.run_sweep(list(runs().values()))
     pass
\ No newline at end of file
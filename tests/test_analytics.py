@@ -0,0 +1,98 @@
+"""
+Verifies the parts of cocotb_introduction.analytics that don't need a simulator.
+"""
+import typing
+import pytest
+import yaml
+import cocotb_introduction.analytics as analytics
+import cocotb_introduction.messages as messages
+
+
+def test_histogram() -> None:
+    histogram = analytics.Histogram(linear=4)
+    assert histogram.summary() == {"count": 0, "min": None, "max": None, "mean": None, "p50": None, "p99": None, "bins": {}}
+    for value in (0, 1, 1, 3):
+        histogram.add(value)
+    histogram.add(5, weight=3)
+    histogram.add(9)
+    histogram.add(2, weight=0)  # Has no effect.
+    summary = histogram.summary()
+    # 5 falls in the bin from 4 to 7, and 9 in the bin from 8 to 15.
+    assert summary["bins"] == {0: 1, 1: 2, 3: 1, 4: 3, 8: 1}
+    assert summary["count"] == 8 and summary["min"] == 0 and summary["max"] == 9
+    assert summary["mean"] == pytest.approx(29 / 8)
+    assert summary["p50"] == 3 and summary["p99"] == 8
+    assert histogram.quantile(0.0) == 0 and histogram.quantile(1.0) == 8
+
+
+def test_histogram_linear() -> None:
+    # The first wide bin starts at linear, even if linear isn't a power of two.
+    histogram = analytics.Histogram(linear=100)
+    histogram.add(64)
+    histogram.add(120)
+    histogram.add(300)
+    summary = histogram.summary()
+    assert summary["bins"] == {64: 1, 100: 1, 256: 1}
+    assert summary["p50"] == 100 and summary["max"] == 300
+
+
+class Monitor:
+    """Stands in for a monitor, whose event resumes the observing coroutine once stepped by the test."""
+
+    def __init__(self) -> None:
+        self.message: typing.Optional[messages.MonitorMessage] = None
+
+    @property
+    def event(self) -> "Monitor":
+        return self
+
+    def __await__(self) -> typing.Generator[None, None, None]:
+        yield
+
+
+def test_stream_analyzer(monkeypatch) -> None:
+    # The coroutines of the analyzer can't run without a simulator, so the test steps them on each message.
+    time = [0]
+    coroutines: typing.List[typing.Any] = []
+    monkeypatch.setattr(analytics.utils, "get_sim_steps", lambda period, units: period)
+    monkeypatch.setattr(analytics.utils, "get_sim_time", lambda: time[0])
+    monkeypatch.setattr(analytics.cocotb, "start_soon", coroutines.append)
+    input, output = Monitor(), Monitor()
+    analyzer = analytics.StreamAnalyzer(input, output, period=10)
+    observe_input, observe_output = coroutines
+    observe_input.send(None)
+    observe_output.send(None)
+
+    def observe(coroutine: typing.Any, monitor: Monitor, at: int) -> None:
+        monitor.message = messages.MonitorMessage(0, at)
+        coroutine.send(None)
+
+    observe(observe_input, input, 10)
+    observe(observe_input, input, 20)
+    observe(observe_output, output, 50)
+    observe(observe_output, output, 60)
+    time[0] = 80
+    summary = analyzer.summary()
+    assert summary["cycles"] == 8
+    assert summary["input_beats"] == summary["output_beats"] == 2
+    # Both sides were active from the first input at 10 to the last output at 60.
+    assert summary["input_throughput"] == summary["output_throughput"] == pytest.approx(2 / 6)
+    assert summary["latency"]["bins"] == {4: 2}
+    # The DUT held no beat for a cycle, a beat for 1 + 1 cycles, and both beats for 3 cycles.
+    assert summary["occupancy"]["bins"] == {0: 1, 1: 2, 2: 3}
+    assert summary["stalls"] == {}
+    observe_input.close()
+    observe_output.close()
+
+
+def test_collect(tmp_path) -> None:
+    for name, cycles in (("fifo_depth_16", 100), ("bfifo_depth_16", 80)):
+        (tmp_path / f"{name}.work").mkdir()
+        with open(tmp_path / f"{name}.work" / analytics.PERFORMANCE_FILE, "w") as file:
+            yaml.safe_dump({"cycles": cycles}, file)
+    (tmp_path / "other").mkdir()
+    (tmp_path / "other" / analytics.PERFORMANCE_FILE).write_text("cycles: 1\n")
+    (tmp_path / "empty.work").mkdir()
+    summaries = analytics.collect(tmp_path)
+    assert list(summaries) == ["bfifo_depth_16", "fifo_depth_16"]
+    assert summaries["fifo_depth_16"]["cycles"] == 100
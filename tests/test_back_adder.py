@@ -1,13 +1,22 @@
 import cocotb
-import cocotb.clock as clock
 import cocotb.handle as handle
 import cocotb.triggers as triggers
-import random
 from cocotb_introduction import reset
 import cocotb_introduction.validready as validready
-import cocotb_introduction.messages as messages
-import cocotb_introduction.queue as queue
 import cocotb_introduction.runner as runner
+import cocotb_introduction.analytics as analytics
+import cocotb_introduction.timing as timing
+import cocotb_introduction.stimulus as stimulus
+import cocotb_introduction.packed as packed
+import cocotb_introduction.clocking as clocking
+import cocotb_introduction.stream as stream
+import cocotb_introduction.scoreboard as scoreboard
+import cocotb_introduction.memory as memory
+import cocotb_introduction.watchdog as watchdog
+import functools
+import numpy as np
+import os
+import pathlib
 import typing
 
 
@@ -16,24 +25,9 @@ class ABData(typing.NamedTuple):
     b: int
 
 
-class ABDataHandle:
-    def __init__(self, a: handle.SimHandleBase, b: handle.SimHandleBase) -> None:
-        super().__init__()
-        self._a = a
-        self._b = b
-
-    @property
-    def integer(self) -> ABData:
-        return ABData(a=self._a.value.integer, b=self._b.value.integer)
-
-    @property
-    def value(self) -> typing.Self:
-        return self
-
-    @value.setter
-    def value(self, value: ABData) -> None:
-        self._a.value = value.a
-        self._b.value = value.b
+def adder_model(inputs: typing.List[ABData], mask: int) -> typing.List[int]:
+    """Predicts the sums of a batch of operands. Evaluated by the workers of the scoreboard, if any."""
+    return [(ab_data.a + ab_data.b) & mask for ab_data in inputs]
 
 
 class DUT_Testbench:
@@ -41,57 +35,57 @@ class DUT_Testbench:
         super().__init__()
         self.width: int = top.WIDTH.value
         self.mask = (1 << self.width) - 1
+        layout = packed.Layout({"a": len(top.a_data), "b": len(top.b_data)}, ABData)
         wr_interface = validready.ValidReadyInterface(
             clk=top.clk,
             rst=top.rst,
             valid=top.ab_valid,
             ready=top.ab_ready,
-            data=ABDataHandle(
-                a=top.a_data,
-                b=top.b_data))
+            data=packed.CompositeHandle(layout, {"a": top.a_data, "b": top.b_data}))
         rd_interface = validready.ValidReadyInterface(clk=top.clk,
             rst=top.rst,
             valid=top.r_valid,
             ready=top.r_ready,
             data=top.r_data)
-        self.wr_driver = validready.ValidReadyWriteDriver(**wr_interface)
+
+        # The write driver publishes the operands it got accepted, so the AB side isn't monitored.
+        self.beats = stream.BeatBuffer(
+            encode=layout.pack,
+            decode=layout.unpack,
+            dtype=np.uint64 if layout.width <= 64 else object)
+        wr_beats = self.beats.reader()
+        analyzer_beats = self.beats.reader()
+        self.wr_driver = validready.ValidReadyWriteDriver(**wr_interface, publish=self.beats)
         self.rd_driver = validready.ValidReadyReadDriver(**rd_interface)
 
-        wr_monitor = validready.ValidReadyMonitor(**wr_interface)
         rd_monitor = validready.ValidReadyMonitor(**rd_interface)
-        wr_msgs = queue.Queue[messages.WriteMessage]()
-        rd_msgs = queue.Queue[messages.WriteMessage]()
+        # Set SCOREBOARD_WORKERS to evaluate the model in a pool of processes.
+        self.scoreboard = scoreboard.PooledScoreboard(functools.partial(adder_model, mask=self.mask), name="check_data")
 
-        async def monitor_wr() -> None:
+        async def expect_data() -> None:
             while True:
-                await wr_monitor.event
-                wr_msgs.push(wr_monitor.message)
+                self.scoreboard.expect((await wr_beats.pop_wait()).data)
 
-        async def monitor_rd() -> None:
+        async def check_data() -> None:
             while True:
                 await rd_monitor.event
-                rd_msgs.push(rd_monitor.message)
+                self.scoreboard.actual(rd_monitor.message.data)
 
-        async def check_data() -> None:
-            log = cocotb.log.getChild("check_data")
-            while True:
-                while not wr_msgs.empty and not rd_msgs.empty:
-                    wr_msg = wr_msgs.pop()
-                    rd_msg = rd_msgs.pop()
-                    ab_data = typing.cast(ABData, wr_msg.data)
-                    exp = (ab_data.a + ab_data.b) & self.mask
-                    act = rd_msg.data
-                    log.info(f"Comparing expected {exp} against actual {act}...")
-                    assert exp == act
-                await triggers.First(wr_msgs.event, rd_msgs.event)
-
-
-        cocotb.start_soon(clock.Clock(top.clk, 10, "ns").start())
+
+        clocking.Clock(top, 10, "ns").start()
+        self.watchdog = watchdog.Watchdog(sim_time=100, wall_time=300, units="us").start()
+        self.memory = memory.Monitor().start()
         cocotb.start_soon(reset(top.clk, top.rst))
-        cocotb.start_soon(monitor_wr())
-        cocotb.start_soon(monitor_rd())
+        cocotb.start_soon(expect_data())
         cocotb.start_soon(check_data())
 
+        self.analyzer = analytics.StreamAnalyzer(
+            input=analyzer_beats,
+            output=rd_monitor,
+            stalls={
+                "ab_backpressure": ((top.ab_valid, top.ab_ready), lambda valid, ready: valid == 1 and ready == 0),
+                "r_backpressure": ((top.r_valid, top.r_ready), lambda valid, ready: valid == 1 and ready == 0)})
+
 
 @cocotb.test()
 async def basic_test(top: handle.SimHandleBase):
@@ -99,8 +93,8 @@ async def basic_test(top: handle.SimHandleBase):
 
     tb = DUT_Testbench(top)
     total = 16
-    a_data = [random.randint(0, tb.mask) for _ in range(total)]
-    b_data = [random.randint(0, tb.mask) for _ in range(total)]
+    a_data = stimulus.integers(total, tb.width, corner_weight=0.1).tolist()
+    b_data = stimulus.integers(total, tb.width, corner_weight=0.1).tolist()
 
     last_rd = None
     for a, b in zip(a_data, b_data):
@@ -109,6 +103,7 @@ async def basic_test(top: handle.SimHandleBase):
 
     await last_rd.processed_wait()
     await triggers.Timer(10, "ns")
+    tb.scoreboard.finish()
 
 
 @cocotb.test()
@@ -117,8 +112,8 @@ async def backpressure_test(top: handle.SimHandleBase):
 
     tb = DUT_Testbench(top)
     total = 16
-    a_data = [random.randint(0, tb.mask) for _ in range(total)]
-    b_data = [random.randint(0, tb.mask) for _ in range(total)]
+    a_data = stimulus.integers(total, tb.width, corner_weight=0.1).tolist()
+    b_data = stimulus.integers(total, tb.width, corner_weight=0.1).tolist()
 
     for a, b in zip(a_data, b_data):
         tb.wr_driver.write(ABData(a, b))
@@ -133,6 +128,7 @@ async def backpressure_test(top: handle.SimHandleBase):
 
     await last_rd.processed_wait()
     await triggers.Timer(10, "ns")
+    tb.scoreboard.finish()
 
 
 @cocotb.test()
@@ -140,49 +136,53 @@ async def random_test(top: handle.SimHandleBase):
     """Write data into adder at random intervals,
     while read result from adder at random intervals.
 
+    The intervals are precomputed in cycles and held off by the drivers.
+
     The rate at which data is written is faster than
     the rate which data is read."""
 
     tb = DUT_Testbench(top)
     total = 16
-    a_data = [random.randint(0, tb.mask) for _ in range(total)]
-    b_data = [random.randint(0, tb.mask) for _ in range(total)]
-
-    async def random_wait(max_time: float):
-        wait = random.randint(-50, max_time)
-        if wait > 0:
-            await triggers.Timer(wait, "ns")
-
-    async def write_data():
-        for a, b in zip(a_data, b_data):
-            msg = tb.wr_driver.write(ABData(a, b))
-            await random_wait(50)
-            await msg.started_wait()
-
-    async def read_data():
-        for _ in range(total):
-            msg = tb.rd_driver.read()
-            await random_wait(70)
-            await msg.started_wait()
-        await msg.processed_wait()
-        await triggers.Timer(10, "ns")
-
-    await triggers.Combine(
-        cocotb.start_soon(write_data()),
-        cocotb.start_soon(read_data()))
-
-
-def test_back_adder() -> None:
-    """Verifies the adder with back pressure."""
+    a_data = stimulus.integers(total, tb.width, corner_weight=0.1).tolist()
+    b_data = stimulus.integers(total, tb.width, corner_weight=0.1).tolist()
+
+    write_gaps = timing.gaps(total, -5, 5).tolist()
+    read_gaps = timing.gaps(total, -5, 7).tolist()
+
+    for a, b, gap in zip(a_data, b_data, write_gaps):
+        tb.wr_driver.write(ABData(a, b), delay=gap)
+    for gap in read_gaps:
+        last_rd = tb.rd_driver.read(delay=gap)
+
+    await last_rd.processed_wait()
+    await triggers.Timer(10, "ns")
+    tb.scoreboard.finish()
+    tb.analyzer.export(pathlib.Path(os.environ.get("WORK_DIR", "")) / analytics.PERFORMANCE_FILE)
+
+
+def runs() -> typing.Dict[str, runner.RunDict]:
+    """The runs of the sweep over the widths, by their stable ids, e.g. w16."""
     widths = (16, 32,)
-    for width in widths:
-        runner.run(
-            hdl_toplevel="back_adder",
+    source = clocking.write("clocked.harness", "back_adder", clocking.ADDER_GENERICS, clocking.BACK_ADDER_PORTS)
+    return {
+        runner.point_id({"WIDTH": width}, {"WIDTH": "w"}): runner.RunDict(
+            hdl_toplevel=clocking.toplevel("back_adder"),
             test_module="tests.test_back_adder",
             work=f"back_adder_tests_width_{width}",
-            parameters={"WIDTH": width})
+            parameters={"WIDTH": width},
+            sources=[source.resolve().as_posix()])
+        for width in widths}
+
+
+def pytest_generate_tests(metafunc) -> None:
+    runner.parametrize(metafunc, runs)
+
+
+def test_back_adder(arguments: runner.RunDict) -> None:
+    """Verifies the adder with back pressure."""
+    runner.run_point(arguments)
 
 
 if __name__ == "__main__":
-    test_back_adder()
+    runner.run_sweep(list(runs().values()))
     pass
\ No newline at end of file
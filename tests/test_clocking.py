@@ -0,0 +1,22 @@
+"""
+Verifies the parts of cocotb_introduction.clocking that don't need a simulator.
+"""
+import cocotb_introduction.clocking as clocking
+import cocotb_introduction.depends as depends
+import cocotb_introduction.runner as runner
+
+
+def test_clocking_write(tmp_path) -> None:
+    source = clocking.write(tmp_path, "back_adder", clocking.ADDER_GENERICS, clocking.BACK_ADDER_PORTS)
+    assert source.name == "back_adder_clocked.vhd"
+    text = source.read_text()
+    assert "entity back_adder_clocked is" in text
+    assert "clk : buffer std_logic" in text
+    assert "WIDTH => WIDTH" in text
+    assert "r_data : out std_logic_vector(WIDTH-1 downto 0)" in text
+    mtime = source.stat().st_mtime_ns
+    clocking.write(tmp_path, "back_adder", clocking.ADDER_GENERICS, clocking.BACK_ADDER_PORTS)
+    assert source.stat().st_mtime_ns == mtime
+    index = depends.Index(runner.vhdl_sources() + [source])
+    assert [path.name for path in index.sources(clocking.toplevel("back_adder"))] == [
+        "fifo.vhd", "simple_adder.vhd", "back_adder.vhd", "back_adder_clocked.vhd"]
@@ -0,0 +1,55 @@
+"""
+Verifies the parts of cocotb_introduction.closure that don't need a simulator.
+"""
+import typing
+import cocotb_coverage.coverage as coverage
+import pytest
+import cocotb_introduction.closure as closure
+import cocotb_introduction.stimulus as stimulus
+
+
+@pytest.fixture
+def sim_time(monkeypatch) -> typing.List[int]:
+    """The sim time, in steps of 1 ns, returned to the Closure."""
+    time = [0]
+    monkeypatch.setattr(closure.utils, "get_sim_steps", lambda period, units: period)
+    monkeypatch.setattr(closure.utils, "get_sim_time", lambda: time[0])
+    return time
+
+
+@coverage.CoverPoint("test_closure.covered.value", xf=lambda value: value, bins=list(range(4)))
+def sample_covered(value: int) -> None:
+    pass
+
+
+@coverage.CoverPoint("test_closure.expired.value", xf=lambda value: value, bins=list(range(4)))
+def sample_expired(value: int) -> None:
+    pass
+
+
+def test_closure_covered(sim_time) -> None:
+    tracker = closure.Closure(["test_closure.covered.value"], budget=1000)
+    stopped = []
+    for values, in stimulus.blocks(None, 1, lambda count: [len(stopped) % 4] * count, until=tracker.done):
+        sim_time[0] += 10
+        sample_covered(values[0])
+        stopped.extend(values)
+    # The coverage closed after the first 4 values, long before the budget ran out.
+    assert stopped == [0, 1, 2, 3]
+    assert tracker.covered and not tracker.expired
+    assert tracker.cycles == 4
+
+
+def test_closure_expired(sim_time) -> None:
+    sim_time[0] = 50
+    tracker = closure.Closure(["test_closure.expired.value"], target=100.0, budget=8)
+    stopped = []
+    for values, in stimulus.blocks(None, 1, lambda count: [0] * count, until=tracker.done):
+        sim_time[0] += 10
+        sample_expired(values[0])
+        stopped.extend(values)
+    # Only a single bin is ever hit, so the budget of cycles, counted from the creation of the Closure, ran out first.
+    assert len(stopped) == 8
+    assert tracker.expired and not tracker.covered
+    assert tracker.coverage == {"test_closure.expired.value": 25.0}
+    assert closure.Closure(["test_closure.expired.value"], target=25.0).done()
@@ -0,0 +1,442 @@
+"""
+Verifies cocotb_introduction.engine against the coroutine drivers and monitors it replaces, without a simulator.
+
+The Sim below steps in for the simulator and cocotb's scheduler, clock cycle by clock cycle.
+On each rising edge, the design model samples its inputs, the tasks awaiting the edge run, the registered outputs of the model update,
+and then the ReadWrite phases run until the writes of the tasks settle, as they would in cocotb.
+"""
+import collections
+import typing
+import cocotb
+import cocotb.triggers
+import cocotb.utils
+import pytest
+import cocotb_introduction.engine as engine
+import cocotb_introduction.fifo as fifo
+import cocotb_introduction.valid as valid
+import cocotb_introduction.validready as validready
+
+
+class Value(int):
+    @property
+    def integer(self) -> int:
+        return int(self)
+
+    @property
+    def binstr(self) -> str:
+        return format(int(self), "b")
+
+
+class Signal:
+    def __init__(self, sim: "Sim", name: str, value: int) -> None:
+        self._sim = sim
+        self._name = name
+        self._value = value
+
+    @property
+    def value(self) -> Value:
+        return Value(self._value)
+
+    @value.setter
+    def value(self, value: int) -> None:
+        self._sim.pending[self] = int(value)
+
+    def __repr__(self) -> str:
+        return self._name
+
+
+Model = typing.Callable[[int], typing.Dict[Signal, int]]
+"""Computes the registered outputs of the design on a rising edge from the inputs sampled before it, given the cycle."""
+
+
+class Sim:
+    def __init__(self) -> None:
+        self.cycle = 0
+        self.pending: typing.Dict[Signal, int] = {}
+        self.model: typing.Optional[Model] = None
+        self.resumes: typing.Dict[typing.Any, int] = collections.Counter()
+        self._ready: typing.Deque[typing.Any] = collections.deque()
+        self._waiting: typing.List[typing.Tuple[typing.Any, "Trigger"]] = []
+        self.clk = self.signal("clk")
+        self.rst = self.signal("rst")
+
+    def signal(self, name: str, value: int = 0) -> Signal:
+        return Signal(self, name, value)
+
+    def start_soon(self, coroutine: typing.Any) -> typing.Any:
+        self._ready.append(coroutine)
+        return coroutine
+
+    def fire(self, event: typing.Tuple[typing.Any, ...]) -> None:
+        waiting = self._waiting
+        self._waiting = []
+        for task, trigger in waiting:
+            if trigger.hit(event):
+                self._ready.append(task)
+            else:
+                self._waiting.append((task, trigger))
+
+    def _run(self) -> None:
+        while self._ready:
+            task = self._ready.popleft()
+            self.resumes[task] += 1
+            try:
+                trigger = task.send(None)
+            except StopIteration:
+                continue
+            if trigger.fired():
+                self._ready.append(task)
+            else:
+                self._waiting.append((task, trigger))
+
+    def _apply(self, writes: typing.Dict[Signal, int]) -> None:
+        for signal, value in writes.items():
+            previous = signal._value
+            if previous != value:
+                signal._value = value
+                self.fire(("edge", signal))
+                if (previous, value) == (0, 1):
+                    self.fire(("rising", signal))
+                elif (previous, value) == (1, 0):
+                    self.fire(("falling", signal))
+        self._run()
+
+    def _settle(self) -> None:
+        while True:
+            self.fire(("rw",))
+            self._run()
+            if not self.pending:
+                return
+            writes, self.pending = self.pending, {}
+            self._apply(writes)
+
+    def step(self, cycles: int = 1) -> None:
+        for _ in range(cycles):
+            self._run()
+            self.cycle += 1
+            outputs = {} if self.model is None else self.model(self.cycle)
+            self._apply({self.clk: 1})
+            self._apply(outputs)
+            self._settle()
+            self._apply({self.clk: 0})
+            self._settle()
+
+
+SIM = typing.cast(Sim, None)
+
+
+class Trigger:
+    def __await__(self) -> typing.Generator[typing.Any, None, None]:
+        yield self
+
+    def hit(self, event: typing.Tuple[typing.Any, ...]) -> bool:
+        return False
+
+    def fired(self) -> bool:
+        return False
+
+
+class RisingEdge(Trigger):
+    def __init__(self, signal: Signal) -> None:
+        self._event = ("rising", signal)
+
+    def hit(self, event: typing.Tuple[typing.Any, ...]) -> bool:
+        return event == self._event
+
+
+class FallingEdge(RisingEdge):
+    def __init__(self, signal: Signal) -> None:
+        self._event = ("falling", signal)
+
+
+class Edge(RisingEdge):
+    def __init__(self, signal: Signal) -> None:
+        self._event = ("edge", signal)
+
+
+class ReadWrite(RisingEdge):
+    def __init__(self) -> None:
+        self._event = ("rw",)
+
+
+class NullTrigger(Trigger):
+    def fired(self) -> bool:
+        return True
+
+
+class ClockCycles(Trigger):
+    def __init__(self, signal: Signal, num_cycles: int) -> None:
+        self._signal = signal
+        self._left = num_cycles
+
+    def hit(self, event: typing.Tuple[typing.Any, ...]) -> bool:
+        if event == ("rising", self._signal):
+            self._left -= 1
+        return self._left == 0
+
+
+class First(Trigger):
+    def __init__(self, *triggers: Trigger) -> None:
+        self._triggers = triggers
+
+    def hit(self, event: typing.Tuple[typing.Any, ...]) -> bool:
+        return any([trigger.hit(event) for trigger in self._triggers])
+
+    def fired(self) -> bool:
+        return any(trigger.fired() for trigger in self._triggers)
+
+
+class Event:
+    def __init__(self, name: typing.Optional[str] = None) -> None:
+        self._set = False
+
+    def set(self, data: typing.Any = None) -> None:
+        self._set = True
+        SIM.fire(("event", self))
+
+    def clear(self) -> None:
+        self._set = False
+
+    def is_set(self) -> bool:
+        return self._set
+
+    def wait(self) -> Trigger:
+        return _EventWait(self)
+
+
+class _EventWait(Trigger):
+    def __init__(self, event: Event) -> None:
+        self._event = event
+
+    def hit(self, event: typing.Tuple[typing.Any, ...]) -> bool:
+        return event == ("event", self._event)
+
+    def fired(self) -> bool:
+        return self._event._set
+
+
+@pytest.fixture
+def sims(monkeypatch) -> typing.Callable[[], Sim]:
+    """Returns a factory of Sims, the latest of which runs the tasks started and fires the Events."""
+    for trigger in (RisingEdge, FallingEdge, Edge, ReadWrite, NullTrigger, ClockCycles, First, Event):
+        monkeypatch.setattr(cocotb.triggers, trigger.__name__, trigger)
+    monkeypatch.setattr(cocotb, "start_soon", lambda coroutine: SIM.start_soon(coroutine))
+    monkeypatch.setattr(cocotb.utils, "get_sim_time", lambda: SIM.cycle)
+
+    def make() -> Sim:
+        global SIM
+        SIM = Sim()
+        return SIM
+
+    return make
+
+
+class Trace:
+    """Records the cycles each message starts and gets processed on, along with the data read,
+    and the values of signals sampled on each rising edge."""
+
+    def __init__(self, sim: Sim, signals: typing.Sequence[Signal]) -> None:
+        self._sim = sim
+        self.messages: typing.List[typing.List[typing.Any]] = []
+        self.samples: typing.List[typing.Tuple[int, ...]] = []
+        model = sim.model
+
+        def sample(cycle: int) -> typing.Dict[Signal, int]:
+            self.samples.append(tuple(signal._value for signal in signals))
+            return {} if model is None else model(cycle)
+
+        sim.model = sample
+
+    def track(self, message: typing.Any) -> None:
+        record = [None, None, None]
+        self.messages.append(record)
+        message.on_started(lambda _: record.__setitem__(0, self._sim.cycle))
+
+        def processed(message: typing.Any) -> None:
+            record[1] = self._sim.cycle
+            record[2] = message.data
+
+        message.on_processed(processed)
+
+
+DELAYS = [0, 0, 2, 1, 0, 3, 0, 0]
+
+
+def reset_model(sim: Sim, outputs: typing.Callable[[int], typing.Dict[Signal, int]]) -> Model:
+    """Holds rst for the first two cycles, then drives the outputs."""
+    def model(cycle: int) -> typing.Dict[Signal, int]:
+        return {sim.rst: int(cycle < 2), **outputs(cycle)}
+    return model
+
+
+def run_valid(sim: Sim, driver_type: str) -> Trace:
+    valid_sig, data = sim.signal("valid"), sim.signal("data")
+    sim.model = reset_model(sim, lambda cycle: {})
+    trace = Trace(sim, (valid_sig, data))
+    if driver_type == "engine":
+        driver = engine.ValidDriver(engine.ClockDomain(sim.clk, sim.rst), valid=valid_sig, data=data)
+    else:
+        driver = valid.ValidDriver(sim.clk, sim.rst, valid=valid_sig, data=data)
+    sim.step(3)
+    for value, delay in enumerate(DELAYS):
+        trace.track(driver.write(value + 1, delay=delay))
+    sim.step(20)
+    # A write submitted once the driver went idle holds off for its delay from the next edge on.
+    trace.track(driver.write(9, delay=2))
+    sim.step(6)
+    return trace
+
+
+def run_valid_ready_write(sim: Sim, driver_type: str) -> Trace:
+    valid_sig, ready, data = sim.signal("valid"), sim.signal("ready"), sim.signal("data")
+    pattern = [1, 0, 0, 1, 1, 0, 1]
+    sim.model = reset_model(sim, lambda cycle: {ready: pattern[cycle % len(pattern)]})
+    trace = Trace(sim, (valid_sig, ready, data))
+    if driver_type == "engine":
+        driver = engine.ValidReadyWriteDriver(engine.ClockDomain(sim.clk, sim.rst), valid=valid_sig, ready=ready, data=data)
+    else:
+        driver = validready.ValidReadyWriteDriver(sim.clk, sim.rst, valid=valid_sig, ready=ready, data=data)
+    sim.step(3)
+    for value, delay in enumerate(DELAYS):
+        trace.track(driver.write(value + 1, delay=delay))
+    sim.step(40)
+    return trace
+
+
+def run_valid_ready_read(sim: Sim, driver_type: str) -> Trace:
+    valid_sig, ready, data = sim.signal("valid"), sim.signal("ready"), sim.signal("data")
+    pattern = [0, 1, 1, 0, 1, 0, 0, 1]
+    sim.model = reset_model(sim, lambda cycle: {valid_sig: pattern[cycle % len(pattern)], data: cycle})
+    trace = Trace(sim, (valid_sig, ready))
+    if driver_type == "engine":
+        driver = engine.ValidReadyReadDriver(engine.ClockDomain(sim.clk, sim.rst), valid=valid_sig, ready=ready, data=data)
+    else:
+        driver = validready.ValidReadyReadDriver(sim.clk, sim.rst, valid=valid_sig, ready=ready, data=data)
+    sim.step(3)
+    for delay in DELAYS:
+        trace.track(driver.read(delay=delay))
+    sim.step(40)
+    return trace
+
+
+def run_fifo_write(sim: Sim, driver_type: str) -> Trace:
+    """The fifo holds 4 words and asserts almost_full from 2 words on. A word is popped every fourth cycle."""
+    almost_full, full, valid_sig, data_in = sim.signal("almost_full"), sim.signal("full"), sim.signal("valid"), sim.signal("data_in")
+    words = [0]
+
+    def outputs(cycle: int) -> typing.Dict[Signal, int]:
+        words[0] += valid_sig._value - int(cycle % 4 == 0 and words[0] > 0)
+        assert words[0] <= 4, "The fifo overflowed."
+        return {almost_full: int(words[0] >= 2), full: int(words[0] >= 4)}
+
+    sim.model = reset_model(sim, outputs)
+    trace = Trace(sim, (valid_sig, almost_full, data_in))
+    if driver_type == "engine":
+        driver = engine.FifoWriteDriver(
+            engine.ClockDomain(sim.clk, sim.rst), almost_full=almost_full, full=full, valid=valid_sig, data_in=data_in,
+            DEPTH=4, ALMOST_FULL_DEPTH=2)
+    else:
+        driver = fifo.FifoWriteDriver(
+            sim.clk, sim.rst, almost_full=almost_full, full=full, valid=valid_sig, data_in=data_in,
+            DEPTH=4, ALMOST_FULL_DEPTH=2)
+    sim.step(3)
+    for value, delay in enumerate(DELAYS + [0] * 8):
+        trace.track(driver.write(value + 1, delay=delay))
+    sim.step(60)
+    return trace
+
+
+def run_fifo_read(sim: Sim, driver_type: str) -> Trace:
+    """A word is pushed into the fifo every third cycle, and the words count up."""
+    empty, ack, data_out = sim.signal("empty", 1), sim.signal("ack"), sim.signal("data_out")
+    words = collections.deque()
+
+    def outputs(cycle: int) -> typing.Dict[Signal, int]:
+        if ack._value:
+            assert words, "The fifo underflowed."
+            words.popleft()
+        if cycle % 3 == 0:
+            words.append(cycle)
+        return {empty: int(not words), data_out: words[0] if words else 0}
+
+    sim.model = reset_model(sim, outputs)
+    trace = Trace(sim, (empty, ack))
+    if driver_type == "engine":
+        driver = engine.FifoReadDriver(engine.ClockDomain(sim.clk, sim.rst), empty=empty, ack=ack, data_out=data_out)
+    else:
+        driver = fifo.FifoReadDriver(sim.clk, sim.rst, empty=empty, ack=ack, data_out=data_out)
+    sim.step(3)
+    for delay in DELAYS:
+        trace.track(driver.read(delay=delay))
+    sim.step(40)
+    return trace
+
+
+@pytest.mark.parametrize("run", [run_valid, run_valid_ready_write, run_valid_ready_read, run_fifo_write, run_fifo_read])
+def test_driver_matches_coroutines(sims, run) -> None:
+    """The engine-driven driver holds off each message for its delay, and drives and samples the interface,
+    on the same cycles as the coroutine driver."""
+    coroutine = run(sims(), "coroutine")
+    driven = run(sims(), "engine")
+    assert all(record[1] is not None for record in coroutine.messages)
+    assert driven.messages == coroutine.messages
+    assert driven.samples == coroutine.samples
+
+
+async def collect(monitor: typing.Any, observed: typing.List[typing.Tuple[int, int]]) -> None:
+    while True:
+        await monitor.event
+        observed.append((monitor.message.time, monitor.message.data))
+
+
+def run_monitor(sim: Sim, monitor_type: str, handshake: bool) -> typing.List[typing.Tuple[int, int]]:
+    valid_sig, ready, data = sim.signal("valid"), sim.signal("ready"), sim.signal("data")
+    bursts = {5, 6, 7, 12, 20, 21, 22, 23, 40}
+    sim.model = reset_model(sim, lambda cycle: {valid_sig: int(cycle in bursts), ready: int(cycle % 3 != 0), data: cycle})
+    if handshake:
+        signals = dict(valid=valid_sig, ready=ready, data=data)
+        if monitor_type == "engine":
+            monitor = engine.ValidReadyMonitor(engine.ClockDomain(sim.clk, sim.rst), **signals)
+        else:
+            monitor = validready.ValidReadyMonitor(sim.clk, sim.rst, **signals)
+    elif monitor_type == "engine":
+        monitor = engine.ValidMonitor(engine.ClockDomain(sim.clk, sim.rst), valid=valid_sig, data=data)
+    else:
+        monitor = valid.ValidMonitor(sim.clk, sim.rst, valid=valid_sig, data=data)
+    observed: typing.List[typing.Tuple[int, int]] = []
+    cocotb.start_soon(collect(monitor, observed))
+    sim.step(45)
+    return observed
+
+
+@pytest.mark.parametrize("handshake", [False, True])
+def test_monitor_matches_coroutines(sims, handshake) -> None:
+    coroutine = run_monitor(sims(), "coroutine", handshake)
+    assert coroutine
+    assert run_monitor(sims(), "engine", handshake) == coroutine
+
+
+def test_domain_sleeps(sims) -> None:
+    sim = sims()
+    valid_sig, data = sim.signal("valid"), sim.signal("data")
+    sim.model = reset_model(sim, lambda cycle: {})
+    domain = engine.ClockDomain(sim.clk, sim.rst)
+    driver = engine.ValidDriver(domain, valid=valid_sig, data=data)
+    monitor = engine.ValidMonitor(domain, valid=valid_sig, data=data)
+    observed: typing.List[typing.Tuple[int, int]] = []
+    cocotb.start_soon(collect(monitor, observed))
+    sim.step(3)
+    driver.write(1)
+    driver.write(2, delay=2)
+    sim.step(8)
+    assert [value for _, value in observed] == [1, 2]
+    # Once the driver runs out of messages and the monitor observes nothing, the domain sleeps, and no task resumes at all.
+    assert domain.active == 0
+    resumes = sum(sim.resumes.values())
+    sim.step(20)
+    assert sum(sim.resumes.values()) == resumes
+    # A message wakes the domain, and the edge of valid wakes the monitor.
+    driver.write(3)
+    sim.step(3)
+    assert [value for _, value in observed] == [1, 2, 3]
+    assert domain.active == 0
@@ -4,7 +4,6 @@ Functional coverage is set up with cocotb_coverage, but only reporting.
 More information on cocotb_coverage can be found in their official documentation.
 """
 import cocotb
-import cocotb.clock as clock
 import cocotb.handle as handle
 import cocotb.triggers as triggers
 import cocotb_introduction
@@ -13,20 +12,33 @@ import cocotb_introduction.valid as valid
 import cocotb_introduction.messages as messages
 import cocotb_introduction.queue as queue
 import cocotb_introduction.runner as runner
+import cocotb_introduction.logger as logger
+import cocotb_introduction.recorder as recorder
+import cocotb_introduction.analytics as analytics
+import cocotb_introduction.timing as timing
+import cocotb_introduction.stimulus as stimulus
+import cocotb_introduction.closure as closure
+import cocotb_introduction.clocking as clocking
+import cocotb_introduction.stream as stream
+import cocotb_introduction.memory as memory
+import cocotb_introduction.watchdog as watchdog
 import cocotb_coverage.coverage as coverage
 import typing
-import random
 import os
 import pathlib
-import itertools
+
+
+COVERAGE_BUDGET = 20000
+"""Maximum number of cycles random_test runs for, if the coverage doesn't close sooner."""
 
 
 class DUT_Testbench:
     """Contains all the essentials of the fifo testbench,
     including setting up the cover groups for functional coverage reporting.
+    The transactions on the fifo's interfaces are recorded to record, if specified.
     """
 
-    def __init__(self, top: handle.SimHandleBase) -> None:
+    def __init__(self, top: handle.SimHandleBase, record: typing.Optional[recorder.Recorder] = None) -> None:
         super().__init__()
 
         #############################
@@ -36,6 +48,11 @@ class DUT_Testbench:
         self.width: int = top.WIDTH.value
         self.mask = (1 << self.width) - 1
 
+        # The write driver publishes the words it wrote, so the input side isn't monitored.
+        self.beats = stream.BeatBuffer()
+        wr_beats = self.beats.reader()
+        analyzer_beats = self.beats.reader()
+
         #########################################
         ## CREATE THE DRIVERS USED BY THE TESTS #
         #########################################
@@ -48,29 +65,27 @@ class DUT_Testbench:
             valid=top.valid,
             data_in=top.data_in,
             DEPTH=top.DEPTH.value,
-            ALMOST_FULL_DEPTH=top.ALMOST_FULL_DEPTH.value)
+            ALMOST_FULL_DEPTH=top.ALMOST_FULL_DEPTH.value,
+            record=None if record is None else record.channel("fifo_wr"),
+            publish=self.beats)
         self.fifo_rd = fifo.FifoReadDriver(
             clk=top.clk,
             rst=top.rst,
             empty=top.empty,
             ack=top.ack,
-            data_out=top.data_out)
+            data_out=top.data_out,
+            record=None if record is None else record.channel("fifo_rd"))
 
         ###################################
         ## VERIFY DATA-RELATED OPERATIONS #
         ###################################
 
-        wr_mon = valid.ValidMonitor(
-            clk=top.clk,
-            rst=top.rst,
-            valid=top.valid,
-            data=top.data_in)
         rd_mon = valid.ValidMonitor(
             clk=top.clk,
             rst=top.rst,
             valid=top.ack,
-            data=top.data_out)
-        wr_msgs = queue.Queue[messages.MonitorMessage]()
+            data=top.data_out,
+            record=None if record is None else record.channel("rd_mon"))
         rd_msgs = queue.Queue[messages.MonitorMessage]()
 
         async def observe(m: valid.ValidMonitor, q: queue.Queue[messages.MonitorMessage]) -> None:
@@ -81,16 +96,28 @@ class DUT_Testbench:
 
         async def check_data() -> None:
             log = cocotb.log.getChild("check_data")
+            logger.rate_limit(log)
             while True:
-                exp = (await wr_msgs.pop_wait()).data
+                exp = (await wr_beats.pop_wait()).data
                 act = (await rd_msgs.pop_wait()).data
-                log.info(f"Comparing expected {exp} against actual {act}...")
+                log.info("Comparing expected %d against actual %d...", exp, act)
                 assert exp == act
 
-        cocotb.start_soon(observe(wr_mon, wr_msgs))
         cocotb.start_soon(observe(rd_mon, rd_msgs))
         cocotb.start_soon(check_data())
 
+        ###################################
+        ## PERFORMANCE RELATED OPERATIONS #
+        ###################################
+
+        self.analyzer = analytics.StreamAnalyzer(
+            input=analyzer_beats,
+            output=rd_mon,
+            stalls={
+                "full": ((top.full,), lambda full: full == 1),
+                "almost_full": ((top.almost_full,), lambda almost_full: almost_full == 1),
+                "empty": ((top.empty,), lambda empty: empty == 1)})
+
         ################################
         ## COVERAGE RELATED OPERATIONS #
         ################################
@@ -180,7 +207,11 @@ class DUT_Testbench:
         ####################
 
         cocotb.start_soon(cocotb_introduction.reset(top.clk, top.rst))
-        cocotb.start_soon(clock.Clock(top.clk, 10, "ns").start())
+        clocking.Clock(top, 10, "ns").start()
+
+        # Twice the coverage budget, in cycles of 10 ns, leaves plenty of room for the fifo to drain.
+        self.watchdog = watchdog.Watchdog(sim_time=2 * COVERAGE_BUDGET * 10, wall_time=600).start()
+        self.memory = memory.Monitor().start()
 
 
 @cocotb.test()
@@ -189,7 +220,7 @@ async def basic_test(top: handle.SimHandleBase):
 
     tb = DUT_Testbench(top)
     total = 128
-    data = [value & tb.mask for value in range(total)]
+    data = stimulus.ramp(total, tb.width).tolist()
 
     for value in data:
         tb.fifo_wr.write(value)
@@ -205,7 +236,7 @@ async def backpressure_test(top: handle.SimHandleBase):
 
     tb = DUT_Testbench(top)
     total = 128
-    data = [value & tb.mask for value in range(total)]
+    data = stimulus.ramp(total, tb.width).tolist()
 
     for value in data:
         tb.fifo_wr.write(value)
@@ -224,37 +255,52 @@ async def backpressure_test(top: handle.SimHandleBase):
 @cocotb.test()
 async def random_test(top: handle.SimHandleBase):
     """Write data into fifo at random intervals,
-    while read data from fifo at random intervals.
+    while read data from fifo in random bursts.
+    The write intervals are precomputed in cycles and held off by the write driver,
+    whereas the read driver sinks the data through a bursty throttle, without any read messages.
 
     The rate at which data is written to faster than
-    the rate which data is read."""
-
-    tb = DUT_Testbench(top)
-    total = 512
-    data = [value & tb.mask for value in range(total)]
-
-    async def random_wait(max_time: float):
-        wait = random.randint(-50, max_time)
-        if wait > 0:
-            await triggers.Timer(wait, "ns")
-
-    async def write_data():
-        for value in data:
-            msg = tb.fifo_wr.write(value)
-            await random_wait(50)
-            await msg.started_wait()
-
-    async def read_data():
-        for _ in range(total):
-            msg = tb.fifo_rd.read()
-            await random_wait(70)
-            await msg.started_wait()
-        await msg.processed_wait()
-        await triggers.Timer(50, "ns")
+    the rate which data is read.
+
+    Rather than writing a fixed amount of data, the test continues until
+    the coverage closes, or until the budget of cycles runs out.
+
+    Set RECORD_ENABLE to record the transactions into the transactions directory of the work directory."""
+
+    record = None
+    if os.environ.get("RECORD_ENABLE", "0") in ("1", "true", "True", "TRUE"):
+        record = recorder.Recorder(pathlib.Path(os.environ.get("WORK_DIR", "")) / "transactions")
+    tb = DUT_Testbench(top, record)
+    block = 64
+    target = closure.Closure(items=("top",), target=100.0, budget=COVERAGE_BUDGET)
+
+    # The data and the gaps are generated a block at a time, only as the drivers catch up,
+    # and only until the coverage closes. The backlog is kept to a block, so the closure is checked often.
+    write_task = cocotb.start_soon(stimulus.feed(
+        tb.fifo_wr.write,
+        stimulus.blocks(
+            None, block,
+            lambda count: stimulus.integers(count, tb.width, corner_weight=0.1),
+            lambda count: timing.gaps(count, -5, 5),
+            until=target.done),
+        backlog=block))
+    # Reads are accepted in bursts averaging 4 cycles, separated by gaps averaging 5 cycles.
+    tb.fifo_rd.throttle = timing.markov(stop=0.25, start=0.2)
+    tb.fifo_rd.sink()
+    writes, last_wr = await write_task
+    assert last_wr is not None
+    await last_wr.processed_wait()
+
+    # The sink drains the fifo on its own. The status registers settle by the next edge.
+    await triggers.RisingEdge(top.clk)
+    while top.empty.value.binstr != "1":
+        await triggers.Edge(top.empty)
+    await triggers.Timer(50, "ns")
+    cocotb.log.info("Wrote %d words over %d cycles. Coverage: %s", writes, target.cycles, target.coverage)
 
-    await triggers.Combine(
-        cocotb.start_soon(write_data()),
-        cocotb.start_soon(read_data()))
+    if record is not None:
+        record.close()
+    tb.analyzer.export(pathlib.Path(os.environ.get("WORK_DIR", "")) / analytics.PERFORMANCE_FILE)
 
 
 @cocotb.test()
@@ -265,22 +311,44 @@ async def report_coverage(top: handle.SimHandleBase) -> None:
     coverage.coverage_db.export_to_yaml(coverage_path.as_posix())
 
 
-def test_fifo() -> None:
-    """Verifies the fifo. Includes functional coverage with cocotb_coverage."""
-    top_levels = ("fifo", "bfifo",)
-    widths = (4, 8,)
-    depths = (2, 32, 64,)
-    af_depths = (2, 16, 32,)
-    for top_level, width, depth, af_depth in itertools.product(top_levels, widths, depths, af_depths):
-        if af_depth > depth:
-            continue
-        runner.run(
-            hdl_toplevel=top_level,
+SWEEP = runner.Sweep(
+    parameters={
+        "top_level": ("fifo", "bfifo",),
+        "WIDTH": (4, 8,),
+        "DEPTH": (2, 32, 64,),
+        "ALMOST_FULL_DEPTH": (2, 16, 32,)},
+    constraints=(lambda point: point["ALMOST_FULL_DEPTH"] <= point["DEPTH"],))
+"""The sweep over the fifo's top levels and generics. Set SWEEP_STRENGTH=2 to only run a pairwise covering array."""
+
+
+def runs() -> typing.Dict[str, runner.RunDict]:
+    """The runs of the fifo's sweep, by their stable ids, e.g. fifo-w8-d64-af32."""
+    runs = {}
+    sources = {
+        top_level: clocking.write("clocked.harness", top_level, clocking.FIFO_GENERICS)
+        for top_level in {point["top_level"] for point in SWEEP.points()}}
+    for point in SWEEP.points():
+        top_level, width, depth, af_depth = point["top_level"], point["WIDTH"], point["DEPTH"], point["ALMOST_FULL_DEPTH"]
+        point_id = runner.point_id(point, {"top_level": "", "WIDTH": "w", "DEPTH": "d", "ALMOST_FULL_DEPTH": "af"})
+        runs[point_id] = runner.RunDict(
+            hdl_toplevel=clocking.toplevel(top_level),
             test_module="tests.test_fifo",
             work=f"{top_level}_tests_width_{width}_depth_{depth}_afdepth_{af_depth}",
-            parameters={"WIDTH": width, "DEPTH": depth, "ALMOST_FULL_DEPTH": af_depth})
+            parameters={"WIDTH": width, "DEPTH": depth, "ALMOST_FULL_DEPTH": af_depth},
+            sources=[sources[top_level].resolve().as_posix()])
+    return runs
+
+
+def pytest_generate_tests(metafunc) -> None:
+    runner.parametrize(metafunc, runs)
+
+
+def test_fifo(arguments: runner.RunDict) -> None:
+    """Verifies the fifo at a point of its sweep. Includes functional coverage with cocotb_coverage.
+    Run pytest with -n to run the points in parallel with pytest-xdist."""
+    runner.run_point(arguments)
 
 
 if __name__ == "__main__":
-    test_fifo()
+    runner.run_sweep(list(runs().values()))
     pass
\ No newline at end of file
@@ -0,0 +1,159 @@
+"""
+Contains the test that verifies every configuration of the fifo's sweep within a single simulation.
+The configurations are instantiated side by side in a harness generated by cocotb_introduction.harness.
+Each instance gets its own drivers, monitors, and scoreboard, and its results are reported separately in instances.yaml.
+The drivers and monitors of every instance are stepped from a single coroutine by a cocotb_introduction.engine.ClockDomain.
+"""
+import cocotb
+import cocotb.clock as clock
+import cocotb.handle as handle
+import cocotb.triggers as triggers
+import cocotb_introduction
+import cocotb_introduction.engine as engine
+import cocotb_introduction.messages as messages
+import cocotb_introduction.queue as queue
+import cocotb_introduction.runner as runner
+import cocotb_introduction.harness as harness
+import cocotb_introduction.timing as timing
+import cocotb_introduction.memory as memory
+import cocotb_introduction.watchdog as watchdog
+import cocotb_introduction.stimulus as stimulus
+import typing
+import os
+import pathlib
+import yaml
+from tests.test_fifo import SWEEP
+
+
+TOPLEVEL = "fifo_harness"
+RESULTS_FILE = "instances.yaml"
+TOTAL = 1024
+"""Number of words written to and read from each instance."""
+
+
+def instances() -> typing.List[harness.Instance]:
+    """The instances of the harness, one for each point of the fifo's sweep."""
+    return [
+        harness.Instance(
+            name=f"{point['top_level']}_w{point['WIDTH']}_d{point['DEPTH']}_af{point['ALMOST_FULL_DEPTH']}",
+            entity=point["top_level"],
+            generics={"WIDTH": point["WIDTH"], "DEPTH": point["DEPTH"], "ALMOST_FULL_DEPTH": point["ALMOST_FULL_DEPTH"]})
+        for point in SWEEP.points()]
+
+
+class Instance_Testbench:
+    """Contains the drivers, monitors, and scoreboard of a single instance of the harness.
+    Rather than failing the whole simulation, mismatches are counted, so every instance is reported."""
+
+    def __init__(self, top: handle.SimHandleBase, domain: engine.ClockDomain, instance: harness.Instance) -> None:
+        super().__init__()
+        self.instance = instance
+        self.width = instance.generics["WIDTH"]
+        self.compared = 0
+        self.mismatches = 0
+
+        def port(name: str) -> handle.SimHandleBase:
+            return getattr(top, instance.port(name))
+
+        self.fifo_wr = engine.FifoWriteDriver(
+            domain=domain,
+            almost_full=port("almost_full"),
+            full=port("full"),
+            valid=port("valid"),
+            data_in=port("data_in"),
+            DEPTH=instance.generics["DEPTH"],
+            ALMOST_FULL_DEPTH=instance.generics["ALMOST_FULL_DEPTH"])
+        self.fifo_rd = engine.FifoReadDriver(
+            domain=domain,
+            empty=port("empty"),
+            ack=port("ack"),
+            data_out=port("data_out"))
+
+        wr_mon = engine.ValidMonitor(domain=domain, valid=port("valid"), data=port("data_in"))
+        rd_mon = engine.ValidMonitor(domain=domain, valid=port("ack"), data=port("data_out"))
+        wr_msgs = queue.Queue[messages.MonitorMessage]()
+        rd_msgs = queue.Queue[messages.MonitorMessage]()
+
+        async def observe(m: engine.ValidMonitor, q: queue.Queue[messages.MonitorMessage]) -> None:
+            while True:
+                await m.event
+                q.push(m.message)
+
+        async def check_data() -> None:
+            log = cocotb.log.getChild(instance.name)
+            while True:
+                exp = (await wr_msgs.pop_wait()).data
+                act = (await rd_msgs.pop_wait()).data
+                self.compared += 1
+                if exp != act:
+                    self.mismatches += 1
+                    log.error("Expected %d but read %d.", exp, act)
+
+        cocotb.start_soon(observe(wr_mon, wr_msgs))
+        cocotb.start_soon(observe(rd_mon, rd_msgs))
+        cocotb.start_soon(check_data())
+
+    @property
+    def passed(self) -> bool:
+        """Indicates every word was read back as written."""
+        return self.mismatches == 0 and self.compared == TOTAL
+
+    def results(self) -> typing.Dict[str, typing.Any]:
+        """The results of the instance, as reported in the results file."""
+        return {
+            "entity": self.instance.entity,
+            "generics": dict(self.instance.generics),
+            "compared": self.compared,
+            "mismatches": self.mismatches,
+            "passed": self.passed}
+
+
+@cocotb.test()
+async def random_test(top: handle.SimHandleBase):
+    """Writes and reads random data at random intervals on every instance concurrently, under one clock.
+    The results of each instance are written to the results file of the work directory."""
+
+    domain = engine.ClockDomain(top.clk, top.rst)
+    benches = [Instance_Testbench(top, domain, instance) for instance in instances()]
+    cocotb.start_soon(cocotb_introduction.reset(top.clk, top.rst))
+    cocotb.start_soon(clock.Clock(top.clk, 10, "ns").start())
+    watchdog.Watchdog(sim_time=TOTAL * 20 * 10, wall_time=1800).start()
+    memory.Monitor().start()
+
+    last_msgs = []
+    for bench in benches:
+        data = stimulus.integers(TOTAL, bench.width, corner_weight=0.1).tolist()
+        write_gaps = timing.gaps(TOTAL, -5, 5).tolist()
+        read_gaps = timing.gaps(TOTAL, -5, 7).tolist()
+        for value, write_gap, read_gap in zip(data, write_gaps, read_gaps):
+            bench.fifo_wr.write(value, write_gap)
+            last_msg = bench.fifo_rd.read(read_gap)
+        last_msgs.append(last_msg)
+
+    for last_msg in last_msgs:
+        await last_msg.processed_wait()
+    await triggers.Timer(50, "ns")
+
+    results = {bench.instance.name: bench.results() for bench in benches}
+    with open(pathlib.Path(os.environ.get("WORK_DIR", "")) / RESULTS_FILE, "w") as file:
+        yaml.safe_dump(results, file)
+    failed = [name for name, result in results.items() if not result["passed"]]
+    assert not failed, f"Instances failed: {failed}"
+
+
+def test_fifo_harness() -> None:
+    """Verifies every configuration of the fifo's sweep within a single simulation.
+    Set SWEEP_STRENGTH=2 to only instantiate a pairwise covering array."""
+    work = f"{TOPLEVEL}_tests"
+    source = harness.write(f"{work}.harness", TOPLEVEL, instances())
+    runner.run_sweep([runner.RunDict(
+        hdl_toplevel=TOPLEVEL,
+        test_module="tests.test_fifo_harness",
+        work=work,
+        parameters=None,
+        sources=[source.resolve().as_posix()])])
+
+
+if __name__ == "__main__":
+    test_fifo_harness()
+    pass
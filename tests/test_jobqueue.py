@@ -0,0 +1,96 @@
+"""
+Verifies the JobQueue of cocotb_introduction.jobqueue with several local workers, without a simulator.
+"""
+import cocotb_introduction.jobqueue as jobqueue
+import cocotb_introduction.runner as runner
+import cocotb_introduction.history as history
+import cocotb_introduction.depends as depends
+import os
+import pytest
+import shutil
+import time
+
+
+def fake_execute(arguments: runner.RunDict) -> float:
+    """Stands in for the simulation, failing the runs whose work starts with fail."""
+    time.sleep(0.05)
+    assert not arguments["work"].startswith("fail"), "failed on purpose"
+    return float(os.getpid())
+
+
+def make_runs(count: int) -> list[runner.RunDict]:
+    return [
+        runner.RunDict(hdl_toplevel="fifo", test_module="tests.test_fifo", work=f"{'fail' if index == 3 else 'pass'}_{index}", parameters={"WIDTH": index})
+        for index in range(count)]
+
+
+def test_jobqueue_workers(tmp_path) -> None:
+    queue = jobqueue.JobQueue(tmp_path, lease=10.0)
+    results = queue.run(make_runs(8), workers=3, poll=0.05, execute=fake_execute)
+    assert sorted(results) == sorted(run["work"] for run in make_runs(8))
+    assert [work for work, result in results.items() if not result["passed"]] == ["fail_3"]
+    assert "failed on purpose" in results["fail_3"]["error"]
+    assert (tmp_path / jobqueue.FAILED / "fail_3.yaml").exists()
+    assert not (tmp_path / jobqueue.DONE / "fail_3.yaml").exists()
+    assert len({result["seconds"] for result in results.values() if result["passed"]}) > 1, "Expected several workers to run jobs."
+    assert queue.idle()
+
+
+def test_jobqueue_expire(tmp_path) -> None:
+    queue = jobqueue.JobQueue(tmp_path, lease=1.0, max_attempts=2)
+    queue.submit(make_runs(2))
+    claimed = queue.claim()
+    assert claimed is not None
+    job, arguments = claimed
+    assert job.work == "pass_0" and arguments["parameters"] == {"WIDTH": 0}
+    assert queue.expire() == 0
+    assert queue.expire(now=time.time() + 2.0) == 1
+    assert not queue.heartbeat(job)
+    job, _ = queue.claim()
+    assert job.work == "pass_0" and job.attempt == 2
+    assert queue.expire(now=time.time() + 2.0) == 1
+    assert queue.results(["pass_0"])["pass_0"]["passed"] is False
+    assert jobqueue.work(tmp_path, lease=1.0, max_attempts=2, poll=0.05, execute=fake_execute) == 1
+    assert queue.results(["pass_1"])["pass_1"]["passed"]
+
+
+def test_jobqueue_execute_fails(tmp_path, fake_runs, monkeypatch) -> None:
+    # Outside of pytest, the cocotb runner returns the results of a failing run rather than raising.
+    monkeypatch.delenv("PYTEST_CURRENT_TEST")
+    queue = jobqueue.JobQueue(tmp_path / "queue")
+    queue.submit([fake_runs("pass"), fake_runs("fail", fail=True)])
+    assert jobqueue.work(tmp_path / "queue", poll=0.05) == 2
+    results = queue.results(["pass", "fail"])
+    assert [result["passed"] for result in results.values()] == [True, False]
+    assert "1 test(s) failed." in results["fail"]["error"]
+    assert (tmp_path / "queue" / jobqueue.FAILED / "fail.yaml").exists()
+
+
+def test_jobqueue_sweep_fails(tmp_path, fake_runs, monkeypatch) -> None:
+    monkeypatch.delenv("PYTEST_CURRENT_TEST")
+    passing, failing = fake_runs("pass"), fake_runs("fail", fail=True)
+    with pytest.raises(jobqueue.JobFailed, match="1 test\\(s\\) failed."):
+        runner.run_sweep([passing, failing], jobs=1, changed_only=False, queue=tmp_path / "queue")
+    # The failing point is recorded in neither the History nor its digest, so the next sweep runs it again.
+    assert history.History().expected(["pass", "fail"]) == {"pass": 1.5, "fail": 1.5}
+    assert not depends.changed("pass.work", runner._digest(passing))
+    assert depends.changed("fail.work", runner._digest(failing))
+    shutil.rmtree(tmp_path / "queue")
+    with pytest.raises(jobqueue.JobFailed):
+        runner.run_sweep([passing, failing], jobs=1, changed_only=True, queue=tmp_path / "queue")
+    assert list(jobqueue.JobQueue(tmp_path / "queue").results(["pass", "fail"])) == ["fail"]
+
+
+def test_jobqueue_resubmit(tmp_path) -> None:
+    # A crashed coordinator left a job pending, and another claimed, whose worker crashed too.
+    queue = jobqueue.JobQueue(tmp_path, lease=0.5)
+    queue.submit(make_runs(3))
+    stale, _ = queue.claim()
+    assert stale.work == "pass_0"
+    start = time.time()
+    queue.submit(make_runs(2), poll=0.05)
+    # The claimed job was waited on until its lease expired, and neither it nor the pending job got queued twice.
+    assert time.time() - start > 0.5
+    assert sorted(job.work for job in queue._jobs(jobqueue.PENDING)) == ["pass_0", "pass_1", "pass_2"]
+    assert [job.attempt for job in queue._jobs(jobqueue.PENDING)] == [1, 1, 1]
+    assert not queue._jobs(jobqueue.CLAIMED)
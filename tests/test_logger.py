@@ -0,0 +1,57 @@
+"""
+Verifies the parts of cocotb_introduction.logger that don't need a simulator.
+"""
+import logging
+import cocotb.log
+import cocotb_introduction.logger as logger
+
+
+def _record(message: str) -> logging.LogRecord:
+    return logging.LogRecord("check_data", logging.INFO, __file__, 0, message, None, None)
+
+
+def test_rate_limit(monkeypatch) -> None:
+    stamp = [0.0]
+    monkeypatch.setattr(logger.time, "monotonic", lambda: stamp[0])
+    limit = logger.RateLimit(rate=10.0, burst=2)
+    assert [limit.filter(_record("burst")) for _ in range(3)] == [True, True, False]
+    assert limit.dropped == 1
+    # A tenth of a second refills a single token, and the dropped record is reported by the next record passing.
+    stamp[0] = 0.1
+    record = _record("refilled")
+    assert limit.filter(record)
+    assert record.msg == "(1 records dropped) refilled"
+    assert not limit.filter(_record("empty"))
+    # The bucket never holds more than burst tokens, however long it refills for.
+    stamp[0] = 100.0
+    assert [limit.filter(_record("burst")) for _ in range(3)] == [True, True, False]
+
+
+def test_rate_limit_once() -> None:
+    log = logging.getLogger("test_logger.once")
+    first = logger.rate_limit(log)
+    assert logger.rate_limit(log) is first
+    assert log.filters == [first]
+
+
+def test_setup_flushes_on_shutdown(tmp_path, monkeypatch) -> None:
+    monkeypatch.setattr(cocotb.log, "get_sim_time", lambda: 0)
+    path = tmp_path / "sim.log"
+    root = logging.getLogger()
+    handlers = list(root.handlers)
+    level = root.level
+    root.setLevel(logging.INFO)
+    logger.setup(path)
+    try:
+        logger.setup(path)  # Has no effect.
+        assert len(root.handlers) == 1
+        log = logging.getLogger("test_logger.setup")
+        for value in range(100):
+            log.info("Comparing expected %d against actual %d...", value, value)
+    finally:
+        logger.shutdown()
+        root.setLevel(level)
+    assert root.handlers == handlers
+    lines = path.read_text().splitlines()
+    assert len(lines) == 100
+    assert lines[-1].endswith("Comparing expected 99 against actual 99...")
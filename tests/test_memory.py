@@ -0,0 +1,56 @@
+"""
+Verifies the parts of cocotb_introduction.memory that don't need a simulator.
+"""
+import tracemalloc
+import yaml
+import cocotb_introduction.memory as memory
+import cocotb_introduction.queue as queue
+import cocotb_introduction.watchdog as watchdog
+
+
+class Driver:
+    def __init__(self) -> None:
+        self._messages = queue.Queue[int]()
+        watchdog.register(self, "memory_driver")
+
+
+def test_high_water() -> None:
+    driver = Driver()
+    loose = queue.Queue[int]()
+    watchdog.register(loose, "memory_loose")
+    for value in range(3):
+        driver._messages.push(value)
+    driver._messages.pop()
+    driver._messages.push(3)
+    loose.push(0)
+    assert driver._messages.high_water == 3
+    marks = memory.high_water()
+    assert marks["memory_driver._messages"] == 3
+    assert marks["memory_loose"] == 1
+    assert not any(name.startswith("Queue@") and mark == 3 for name, mark in marks.items())
+
+
+def test_snapshot(tmp_path, monkeypatch) -> None:
+    monkeypatch.setenv("WORK_DIR", tmp_path.as_posix())
+    monkeypatch.setattr(memory.utils, "get_sim_time", lambda units: 100.0)
+    monkeypatch.setattr(memory, "_snapshots", {})
+    driver = Driver()
+    driver._messages.push(0)
+    tracemalloc.start()
+    try:
+        retained = [bytearray(4096) for _ in range(64)]
+        snapshot = memory.Monitor(top=3).snapshot()
+        driver._messages.push(1)
+        memory.Monitor().snapshot()
+    finally:
+        tracemalloc.stop()
+    assert snapshot["sim_time_ns"] == 100.0
+    assert snapshot["traced_bytes"] >= 64 * 4096
+    assert len(snapshot["sites"]) <= 3
+    assert "test_memory.py" in snapshot["sites"][0]["site"]
+    with open(memory.write()) as file:
+        report = yaml.safe_load(file)
+    assert list(report) == ["setup"]
+    assert report["setup"]["high_water"]["memory_driver._messages"] == 2
+    assert len(report["setup"]["snapshots"]) == 2
+    del retained
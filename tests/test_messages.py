@@ -0,0 +1,21 @@
+"""
+Verifies the parts of cocotb_introduction.messages that don't need a simulator.
+"""
+import cocotb_introduction.messages as messages
+import pytest
+
+
+def test_callbacks() -> None:
+    calls = []
+    msg = messages.ReadMessage(delay=3)
+    msg.on_started(lambda m: calls.append(("started", m.started)))
+    msg.on_processed(lambda m: calls.append(("processed", m.data)))
+    with pytest.raises(messages.ReadNoData):
+        msg.data
+    assert msg._hold() == 3 and msg.delay == 0
+    msg._start()
+    assert calls == [("started", True)]
+    msg._process(5)
+    assert calls == [("started", True), ("processed", 5)]
+    msg.on_processed(lambda m: calls.append(("late", m.data)))
+    assert calls[-1] == ("late", 5)
@@ -0,0 +1,150 @@
+"""
+Verifies the parts of cocotb_introduction.packed that don't need a simulator.
+"""
+import cocotb
+import cocotb.handle as handle
+import cocotb_introduction.packed as packed
+import pytest
+import types
+import typing
+
+
+class ABData(typing.NamedTuple):
+    a: int
+    b: int
+
+
+def test_layout_pack() -> None:
+    layout = packed.Layout({"a": 4, "b": 8}, ABData)
+    assert layout.width == 12
+    assert layout.pack(ABData(0x3, 0xA5)) == 0xA53
+    assert layout.unpack(0xA53) == ABData(0x3, 0xA5)
+    assert layout.from_bytes(layout.to_bytes(0xA53)) == 0xA53
+
+
+def test_layout_pack_many() -> None:
+    for width in (16, 1024):
+        layout = packed.Layout({"a": width, "b": width})
+        mask = (1 << width) - 1
+        a = [0, 1, mask, mask >> 1]
+        b = [mask, 2, 0, 12345]
+        words = layout.pack_many(a, b)
+        assert [int(word) for word in words] == [layout.pack((x, y)) for x, y in zip(a, b)]
+        columns = layout.unpack_many(words)
+        assert [int(value) for value in columns[0]] == a
+        assert [int(value) for value in columns[1]] == b
+
+
+class GpiHandle:
+    """Stands in for the simulator object behind a simulation handle, holding the value as a binary string."""
+
+    def __init__(self, name: str, width: int) -> None:
+        self.name = name
+        self.binstr = "0" * width
+        self.writes = 0
+
+    def get_name_string(self) -> str:
+        return self.name
+
+    def get_type_string(self) -> str:
+        return "GPI_LOGIC_ARRAY"
+
+    def get_definition_name(self) -> str:
+        return ""
+
+    def get_definition_file(self) -> str:
+        return ""
+
+    def get_num_elems(self) -> int:
+        return len(self.binstr)
+
+    def get_range(self) -> typing.Tuple[int, int]:
+        return len(self.binstr) - 1, 0
+
+    def get_signal_val_binstr(self) -> str:
+        return self.binstr
+
+    def set_signal_val_binstr(self, action: int, binstr: str) -> None:
+        assert len(binstr) == len(self.binstr)
+        self.binstr = binstr
+        self.writes += 1
+
+    def set_signal_val_int(self, action: int, value: int) -> None:
+        self.set_signal_val_binstr(action, format(value & ((1 << len(self.binstr)) - 1), f"0{len(self.binstr)}b"))
+
+
+class Scheduler:
+    """Stands in for cocotb's scheduler, which applies the writes right away."""
+
+    def _schedule_write(self, signal: typing.Any, write: typing.Callable[..., None], *args: typing.Any) -> None:
+        write(*args)
+
+
+@pytest.fixture
+def signal(monkeypatch) -> typing.Callable[[str, int], handle.ModifiableObject]:
+    """Returns a factory of simulation handles of the given name and width."""
+    monkeypatch.setattr(cocotb, "scheduler", Scheduler())
+    return lambda name, width: handle.ModifiableObject(GpiHandle(name, width), name)
+
+
+@pytest.mark.parametrize("width", [8, 32, 33, 1024])
+def test_read_write(signal, width) -> None:
+    data = signal("data", width)
+    mask = (1 << width) - 1
+    for value in (0, 1, mask, mask >> 1):
+        packed.write(data, value)
+        assert packed.read(data) == value == data.value.integer
+    # Negative values are written in two's complement, whatever the width, like handle.value.
+    packed.write(data, -1)
+    assert packed.read(data) == mask
+    packed.write(data, -(1 << (width - 1)))
+    assert packed.read(data) == 1 << (width - 1)
+    for value in (1 << width, -(1 << (width - 1)) - 1):
+        with pytest.raises(OverflowError):
+            packed.write(data, value)
+    data._handle.binstr = "x" * width
+    with pytest.raises(ValueError):
+        packed.read(data)
+
+
+class OtherGpiHandle(GpiHandle):
+    """Stands in for the simulator object of a cocotb release without the binary string accessors."""
+    get_signal_val_binstr = None
+    set_signal_val_binstr = None
+
+
+class OtherHandle(handle.ModifiableObject):
+    """Stands in for the simulation handle of that release, which holds the value itself."""
+    _stored = 0
+
+    @property
+    def value(self) -> types.SimpleNamespace:
+        return types.SimpleNamespace(integer=self._stored)
+
+    @value.setter
+    def value(self, value: int) -> None:
+        self._stored = value
+
+
+def test_read_write_fallback(signal) -> None:
+    data = OtherHandle(OtherGpiHandle("data", 64), "data")
+    packed.write(data, 5)
+    assert data._stored == 5
+    assert packed.read(data) == 5
+
+
+def test_composite_handle(signal) -> None:
+    layout = packed.Layout({"a": 4, "b": 40}, ABData)
+    a, b = signal("a", 4), signal("b", 40)
+    split = packed.CompositeHandle(layout, {"b": b, "a": a})
+    packed.write(split, ABData(0x3, 0xA5_0000_0000))
+    assert a.value.integer == 0x3 and b.value.integer == 0xA5_0000_0000
+    assert packed.read(split) == ABData(0x3, 0xA5_0000_0000)
+    assert split.value.integer == ABData(0x3, 0xA5_0000_0000)
+    ab = signal("ab", layout.width)
+    whole = packed.CompositeHandle(layout, ab)
+    whole.value = ABData(0xF, 1)
+    assert ab.value.integer == 0x1F
+    assert packed.read(whole) == ABData(0xF, 1)
+    with pytest.raises(AssertionError):
+        packed.CompositeHandle(layout, {"a": a})
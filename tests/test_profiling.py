@@ -0,0 +1,43 @@
+"""
+Verifies the parts of cocotb_introduction.profiling that don't need a simulator.
+"""
+import os
+import sys
+import threading
+import time
+import cocotb
+import cocotb_introduction.profiling as profiling
+
+
+def test_profiling_categorize() -> None:
+    assert profiling.categorize(None) == "simulator"
+    assert profiling.categorize(os.path.join(os.path.dirname(cocotb.__file__), "handle.py")) == "gpi"
+    assert profiling.categorize(os.path.join(os.path.dirname(cocotb.__file__), "scheduler.py")) == "cocotb"
+    assert profiling.categorize(__file__) == "testbench"
+
+
+def test_profiling_sampler(tmp_path) -> None:
+    sampler = profiling.Sampler(threading.get_ident())
+    frame = sys._getframe()
+    assert profiling.collapse(frame).endswith(f"test_profiling_sampler (test_profiling.py:{frame.f_code.co_firstlineno})")
+    sampler.record("test_fifo", frame, 0.003)
+    sampler.record("test_fifo", None, 0.001)
+    sampler.record("test_fifo", None, 0.001)
+    assert sampler.summary() == {"test_fifo": {
+        "wall_s": 0.005, "simulator_s": 0.002, "gpi_s": 0.0, "cocotb_s": 0.0, "testbench_s": 0.003}}
+    path, = sampler.write(tmp_path)
+    assert path.name == "test_fifo.folded"
+    lines = path.read_text().splitlines()
+    assert f"{profiling.SIMULATOR_FRAME} 2000" in lines
+    assert any(line.endswith(" 3000") and "test_profiling_sampler" in line for line in lines)
+
+
+def test_profiling_sampler_thread() -> None:
+    sampler = profiling.Sampler(threading.get_ident()).start()
+    deadline = time.perf_counter() + 0.05
+    while time.perf_counter() < deadline:
+        pass
+    sampler.stop()
+    split = sampler.summary()["setup"]
+    assert split["testbench_s"] > 0
+    assert split["wall_s"] > 0.04
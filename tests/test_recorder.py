@@ -0,0 +1,59 @@
+"""
+Verifies the parts of cocotb_introduction.recorder that don't need a simulator.
+"""
+import typing
+import numpy as np
+import pytest
+import cocotb_introduction.recorder as recorder
+
+
+@pytest.fixture
+def sim_time(monkeypatch) -> typing.List[int]:
+    """The sim time, in steps of 1 ns, returned to the Recorder."""
+    time = [0]
+    monkeypatch.setattr(recorder.utils, "get_sim_steps", lambda period, units: period)
+    monkeypatch.setattr(recorder.utils, "get_sim_time", lambda: time[0])
+    return time
+
+
+def test_round_trip(tmp_path, sim_time) -> None:
+    path = tmp_path / "transactions"
+    rec = recorder.Recorder(path, period=10, block=4)
+    wr, rd = rec.channel("wr_drv"), rec.channel("rd_mon")
+    for value in range(5):
+        sim_time[0] = 10 * value
+        wr.started(value)
+        wr.processed(value)
+    # The first two blocks got flushed, growing the files past their initial capacity of a block,
+    # whereas the last two records are still buffered, so they're yet to be loaded.
+    assert rec.count == 10
+    assert len(recorder.load(path).columns["event"]) == 8
+    assert (path / "data.bin").stat().st_size == 8 * 8
+    sim_time[0] = 55
+    rd.observed((1 << 64) + 7)
+    rec.close()
+    rec.close()  # Has no effect.
+
+    loaded = recorder.load(path)
+    assert loaded.interfaces == ["wr_drv", "rd_mon"]
+    assert loaded.period == 10
+    columns = loaded.columns
+    assert len(columns["event"]) == 11
+    # The preallocated tails are trimmed off the files.
+    assert (path / "data.bin").stat().st_size == 11 * 8
+    assert columns["interface"].tolist() == [0] * 10 + [1]
+    assert columns["event"].tolist() == [recorder.STARTED, recorder.PROCESSED] * 5 + [recorder.OBSERVED]
+    assert columns["time"].tolist() == [10 * (index // 2) for index in range(10)] + [55]
+    assert columns["cycle"].tolist() == [index // 2 for index in range(10)] + [5]
+    # Only the lower 64 bits of the data are recorded.
+    assert columns["data"].tolist() == [index // 2 for index in range(10)] + [7]
+    assert isinstance(columns["data"], np.memmap)
+
+
+def test_empty(tmp_path, sim_time) -> None:
+    rec = recorder.Recorder(tmp_path, block=4)
+    rec.channel("wr_drv")
+    rec.close()
+    loaded = recorder.load(tmp_path)
+    assert loaded.interfaces == ["wr_drv"]
+    assert all(len(column) == 0 for column in loaded.columns.values())
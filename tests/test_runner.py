@@ -0,0 +1,138 @@
+"""
+Verifies the parts of cocotb_introduction.runner that don't need a simulator.
+"""
+import cocotb_introduction.runner as runner
+import cocotb_introduction.history as history
+import cocotb_introduction.depends as depends
+import cocotb_introduction.config as config
+import cocotb_introduction.workdir as workdir
+import itertools
+import pathlib
+import pytest
+
+
+SWEEP = runner.Sweep(
+    parameters={
+        "top_level": ("fifo", "bfifo",),
+        "WIDTH": (4, 8,),
+        "DEPTH": (2, 32, 64,),
+        "ALMOST_FULL_DEPTH": (2, 16, 32,)},
+    constraints=(lambda point: point["ALMOST_FULL_DEPTH"] <= point["DEPTH"],))
+
+
+def test_sweep_exhaustive() -> None:
+    points = SWEEP.exhaustive()
+    assert len(points) == 28
+    assert all(point["ALMOST_FULL_DEPTH"] <= point["DEPTH"] for point in points)
+
+
+def test_sweep_covering() -> None:
+    valid = SWEEP.exhaustive()
+    for strength in (1, 2, 3):
+        points = SWEEP.covering(strength)
+        assert len(points) < len(valid)
+        assert all(SWEEP.valid(point) for point in points)
+        for names in itertools.combinations(valid[0], strength):
+            required = {tuple(point[name] for name in names) for point in valid}
+            covered = {tuple(point[name] for name in names) for point in points}
+            assert required == covered
+
+
+def test_sweep_covering_large(monkeypatch) -> None:
+    sweep = runner.Sweep(
+        parameters={f"P{index}": tuple(range(4)) for index in range(12)},
+        constraints=(lambda point: point["P0"] <= point["P1"],))
+    # The product of the space holds 4**12 points, so the covering array must be built without enumerating them.
+    monkeypatch.setattr(sweep, "exhaustive", lambda: pytest.fail("The valid points got enumerated."))
+    points = sweep.covering(2)
+    assert len(points) < 64
+    assert all(sweep.valid(point) for point in points)
+    for names in itertools.combinations([f"P{index}" for index in range(12)], 2):
+        required = {values for values in itertools.product(range(4), repeat=2) if names != ("P0", "P1") or values[0] <= values[1]}
+        covered = {tuple(point[name] for name in names) for point in points}
+        assert required == covered
+    assert sweep.covering(2) == points
+
+
+def test_history_order(tmp_path) -> None:
+    database = history.History(tmp_path / "history.sqlite")
+    database.update("short", 1.0)
+    database.update("long", 10.0)
+    database.update("long", 20.0)
+    expected = database.expected(["short", "long", "unknown"])
+    assert expected["long"] == 15.0
+    assert expected["unknown"] == (1.0 + 15.0) / 2
+    assert database.order(["short", "unknown", "long"]) == ["long", "unknown", "short"]
+
+
+def test_history_results_time(tmp_path) -> None:
+    results = tmp_path / "results.xml"
+    results.write_text(
+        "<testsuites><testsuite>"
+        "<testcase name=\"a\" time=\"1.5\"/><testcase name=\"b\" time=\"2.5\"/>"
+        "</testsuite></testsuites>")
+    assert history.results_time(results) == 4.0
+
+
+def test_depends_sources() -> None:
+    index = depends.Index(runner.vhdl_sources())
+    assert [path.name for path in index.sources("back_adder")] == ["fifo.vhd", "simple_adder.vhd", "back_adder.vhd"]
+    assert [path.name for path in index.sources("fifo")] == ["fifo.vhd"]
+    assert [path.name for path in index.sources("simulation_handle_example")] == ["delta_example.vhd", "simulation_handle_example.vhd"]
+
+
+def test_depends_changed(tmp_path) -> None:
+    index = depends.Index(runner.vhdl_sources())
+    digest = index.digest("fifo", "tests.test_fifo")
+    assert digest == index.digest("fifo", "tests.test_fifo")
+    assert digest != index.digest("back_adder", "tests.test_fifo")
+    assert depends.changed(tmp_path, digest)
+    depends.record(tmp_path, digest)
+    assert not depends.changed(tmp_path, digest)
+    assert depends.changed(tmp_path, index.digest("fifo", "tests.test_adder"))
+
+
+def test_run_fails(fake_runs, monkeypatch) -> None:
+    # Outside of pytest, the cocotb runner returns the results of a failing run rather than raising.
+    monkeypatch.delenv("PYTEST_CURRENT_TEST")
+    passing, failing = fake_runs("pass"), fake_runs("fail", fail=True)
+    with pytest.raises(AssertionError, match="1 test\\(s\\) failed."):
+        runner.run(**failing)
+    with pytest.raises(AssertionError):
+        runner.run_sweep([passing, failing], jobs=1, changed_only=False)
+    # Only the passing run is recorded, so the failing run is expected to take the mean of the recorded runs rather than its own time,
+    # and it isn't skipped as unchanged.
+    assert history.History().expected([passing["work"], failing["work"]]) == {passing["work"]: 1.5, failing["work"]: 1.5}
+    assert not depends.changed(passing["work"] + ".work", runner._digest(passing))
+    assert depends.changed(failing["work"] + ".work", runner._digest(failing))
+    assert not (pathlib.Path(failing["work"] + ".work") / depends.DIGEST_FILE).exists()
+
+
+@pytest.mark.parametrize("scratch", [False, True])
+def test_run_keeps_results(scratch, fake_runs, tmp_path, monkeypatch) -> None:
+    if scratch:
+        monkeypatch.setenv(workdir.SCRATCH_ENV, (tmp_path / "scratch").as_posix())
+    # Under pytest, the cocotb runner names the results file after the test, e.g. test_run_keeps_results[True].None.
+    results = runner.run(**fake_runs("pass"))
+    assert results.name.endswith(".None")
+    assert sorted(entry.name for entry in pathlib.Path("pass.work").iterdir()) == [results.name]
+    assert history.results_time(results) == 1.5
+    runner.run_point(fake_runs("point"), changed_only=False)
+    assert history.History().expected(["point"]) == {"point": 1.5}
+    with pytest.raises(SystemExit):
+        runner.run(**fake_runs("fail", fail=True))
+    assert sorted(entry.name for entry in pathlib.Path("fail.work").iterdir()) == [workdir.ARCHIVE, results.name]
+
+
+def test_select_profile(monkeypatch) -> None:
+    monkeypatch.delenv("SIM_PROFILE", raising=False)
+    assert runner.select_profile() == runner.select_profile(config.CONFIG["profile"])
+    assert runner.select_profile("debug")["waves"]
+    monkeypatch.setenv("SIM_PROFILE", "fast")
+    assert not runner.select_profile("debug")["waves"]
+
+
+def test_point_id() -> None:
+    point = SWEEP.points(0)[-1]
+    assert runner.point_id(point, {"top_level": "", "WIDTH": "w", "DEPTH": "d", "ALMOST_FULL_DEPTH": "af"}) == "bfifo-w8-d64-af32"
+    assert runner.point_id({"WIDTH": 8}, {}) == "width8"
@@ -0,0 +1,57 @@
+"""
+Verifies cocotb_introduction.scoreboard outside of a simulation.
+"""
+import pytest
+import cocotb_introduction.logger as logger
+import cocotb_introduction.scoreboard as scoreboard
+
+
+def double(inputs):
+    return [2 * value for value in inputs]
+
+
+def test_pooled_scoreboard_inline() -> None:
+    board = scoreboard.PooledScoreboard(double, batch=4, workers=0)
+    for value in range(6):
+        board.expect(value)
+    # The first batch is predicted, and the second batch is only submitted once an output needs it.
+    assert board.pending == 6
+    for value in range(5):
+        board.actual(2 * value)
+    assert board.compared == 5
+    with pytest.raises(AssertionError):
+        board.finish()
+    with pytest.raises(AssertionError, match="Output 5: expected 10 but got 11."):
+        board.actual(11)
+
+
+def test_pooled_scoreboard_workers() -> None:
+    board = scoreboard.PooledScoreboard(double, batch=8, window=2, workers=2)
+    try:
+        for value in range(100):
+            board.expect(value)
+            if value >= 10:
+                board.actual(2 * (value - 10))
+        for value in range(90, 100):
+            board.actual(2 * value)
+        board.finish()
+        assert board.compared == 100
+    finally:
+        scoreboard.shutdown()
+
+
+def test_pooled_scoreboard_keeps_log(tmp_path, monkeypatch) -> None:
+    # The workers inherit the environment of the simulation, including the log file requested by runner.run.
+    log = tmp_path / "sim.log"
+    log.write_text("0.00ns INFO     cocotb   Running on nvc\n")
+    monkeypatch.setenv(logger.LOG_FILE_ENV, log.as_posix())
+    scoreboard.shutdown()
+    board = scoreboard.PooledScoreboard(double, batch=4, workers=1)
+    try:
+        for value in range(8):
+            board.expect(value)
+            board.actual(2 * value)
+        board.finish()
+    finally:
+        scoreboard.shutdown()
+    assert log.read_text() == "0.00ns INFO     cocotb   Running on nvc\n"
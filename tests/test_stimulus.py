@@ -0,0 +1,79 @@
+"""
+Verifies the parts of cocotb_introduction.stimulus that don't need a simulator.
+"""
+import asyncio
+import typing
+import numpy as np
+import cocotb_introduction.stimulus as stimulus
+
+
+def test_integers_bounds() -> None:
+    rng = np.random.default_rng(0)
+    values = stimulus.integers(10000, 8, rng=rng)
+    assert values.dtype == np.uint64
+    assert values.min() == 0 and values.max() == 255
+    values = stimulus.integers(10000, 8, low=16, high=31, rng=rng)
+    assert values.min() == 16 and values.max() == 31
+    values = stimulus.integers(1000, 64, rng=rng)
+    assert values.dtype == np.uint64 and int(values.max()) >= 1 << 63
+
+
+def test_integers_wide() -> None:
+    values = stimulus.integers(1000, 130, rng=np.random.default_rng(0))
+    assert values.dtype == object
+    assert all(isinstance(value, int) and 0 <= value < 1 << 130 for value in values)
+    # Every word of the values is random, up to the top bits.
+    assert max(value.bit_length() for value in values) == 130
+    assert len({value & ((1 << 64) - 1) for value in values}) == 1000
+    assert len({(value >> 64) & ((1 << 64) - 1) for value in values}) == 1000
+
+
+def test_integers_corners() -> None:
+    rng = np.random.default_rng(0)
+    values = stimulus.integers(10000, 8, low=1, high=254, corner_weight=1.0, rng=rng)
+    assert set(values.tolist()) == {1, 254}
+    values = stimulus.integers(10000, 16, corners=(0xAAAA,), corner_weight=0.25, rng=rng)
+    assert 0.2 < np.count_nonzero(values == 0xAAAA) / len(values) < 0.3
+    values = stimulus.integers(1000, 100, corner_weight=0.5, rng=rng)
+    assert 0.4 < sum(value in (0, (1 << 100) - 1) for value in values) / len(values) < 0.6
+
+
+def test_ramp() -> None:
+    assert stimulus.ramp(6, 2, start=1).tolist() == [1, 2, 3, 0, 1, 2]
+
+
+def test_blocks() -> None:
+    generated = list(stimulus.blocks(10, 4, lambda count: stimulus.ramp(count, 8), lambda count: ["x"] * count))
+    assert [len(a) for a, _ in generated] == [4, 4, 2]
+    assert all(isinstance(value, int) for a, _ in generated for value in a)
+    # Open-ended generation stops once until returns True, checked before each block.
+    counted = []
+    for a, in stimulus.blocks(None, 3, lambda count: stimulus.ramp(count, 8), until=lambda: len(counted) >= 7):
+        counted.extend(a)
+    assert len(counted) == 9
+
+
+class Message:
+    def __init__(self, index: int, waited: typing.List[int]) -> None:
+        self.index = index
+        self._waited = waited
+
+    async def started_wait(self) -> None:
+        self._waited.append(self.index)
+
+
+def test_feed_backlog() -> None:
+    submitted: typing.List[typing.Tuple[int, int]] = []
+    waited: typing.List[int] = []
+
+    def submit(a: int, b: int) -> Message:
+        submitted.append((a, b))
+        return Message(len(submitted) - 1, waited)
+
+    stimulus_blocks = stimulus.blocks(20, 4, lambda count: stimulus.ramp(count, 8), lambda count: [0] * count)
+    count, last = asyncio.run(stimulus.feed(submit, stimulus_blocks, backlog=6))
+    assert count == 20 and last.index == 19
+    assert len(submitted) == 20
+    # Once a block leaves more than backlog messages outstanding, the feed waits for the oldest message to be left outstanding to start.
+    assert waited == [1, 5, 9, 13]
+    assert asyncio.run(stimulus.feed(submit, [])) == (0, None)
@@ -0,0 +1,61 @@
+"""
+Verifies the parts of cocotb_introduction.stream that don't need a simulator.
+"""
+import typing
+import numpy as np
+import pytest
+import cocotb_introduction.packed as packed
+import cocotb_introduction.stream as stream
+
+
+class ABData(typing.NamedTuple):
+    a: int
+    b: int
+
+
+@pytest.fixture
+def sim_time(monkeypatch) -> typing.List[int]:
+    """The sim time, in steps of 1 ns, returned to the BeatBuffer."""
+    time = [0]
+    monkeypatch.setattr(stream.utils, "get_sim_steps", lambda period, units: period)
+    monkeypatch.setattr(stream.utils, "get_sim_time", lambda: time[0])
+    return time
+
+
+def test_beat_buffer(sim_time) -> None:
+    buffer = stream.BeatBuffer(capacity=4)
+    fast, slow = buffer.reader(), buffer.reader()
+    for value in range(6):
+        sim_time[0] = 10 * value + 5
+        assert buffer.publish(100 + value) == value
+        assert fast.pop() == stream.Beat(sequence=value, time=10 * value + 5, cycle=value, data=100 + value)
+    # The slow reader fell behind by more than the capacity, so the buffer grew rather than overwrite its beats.
+    assert buffer.capacity == 8
+    assert len(slow) == 6 and len(buffer) == 6
+    sequence, times, cycles, data = slow.pending()
+    assert sequence == 0
+    assert cycles.tolist() == [0, 1, 2, 3, 4, 5]
+    assert data.tolist() == [100, 101, 102, 103, 104, 105]
+    slow.release(4)
+    assert slow.pop().sequence == 4
+    assert len(buffer) == 1
+    with pytest.raises(stream.BeatEmpty):
+        fast.pop()
+
+
+def test_beat_buffer_wraps(sim_time) -> None:
+    layout = packed.Layout({"a": 16, "b": 16}, ABData)
+    buffer = stream.BeatBuffer(capacity=4, encode=layout.pack, decode=layout.unpack)
+    reader = buffer.reader()
+    for value in range(10):
+        buffer.publish(ABData(value, 2 * value))
+        assert reader.pop().data == ABData(value, 2 * value)
+    assert buffer.capacity == 4
+    for value in range(3):
+        buffer.publish(ABData(value, value))
+    sequence, _, _, data = reader.pending()
+    assert sequence == 10
+    assert len(data) == 2  # Up to the end of the ring.
+    assert isinstance(data, np.ndarray) and data.base is not None
+    reader.release(len(data))
+    assert reader.pop() == stream.Beat(sequence=12, time=0, cycle=0, data=ABData(2, 2))
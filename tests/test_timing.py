@@ -0,0 +1,20 @@
+"""
+Verifies the parts of cocotb_introduction.timing that don't need a simulator.
+"""
+import cocotb_introduction.timing as timing
+import numpy as np
+
+
+def test_mask() -> None:
+    repeated = timing.mask([True, False, False])
+    assert [repeated.next() for _ in range(6)] == [True, False, False, True, False, False]
+    once = timing.mask([False, True], repeat=False)
+    assert [once.next() for _ in range(4)] == [False, True, True, True]
+
+
+def test_markov() -> None:
+    throttle = timing.markov(stop=0.25, start=0.2, rng=np.random.default_rng(0))
+    decisions = np.array([throttle.next() for _ in range(100000)])
+    assert abs(decisions.mean() - 0.2 / (0.2 + 0.25)) < 0.02
+    bursts = np.diff(np.flatnonzero(np.diff(decisions.astype(int)) != 0))
+    assert abs(bursts.mean() - (4 + 5) / 2) < 0.5
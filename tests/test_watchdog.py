@@ -0,0 +1,50 @@
+"""
+Verifies the parts of cocotb_introduction.watchdog that don't need a simulator.
+"""
+import cocotb_introduction.watchdog as watchdog
+import cocotb_introduction.messages as messages
+import cocotb_introduction.queue as queue
+import cocotb_introduction.fifo as fifo
+import gc
+import yaml
+
+
+class Driver:
+    def __init__(self) -> None:
+        self._messages = queue.Queue[messages.WriteMessage]()
+        self._busy = True
+        self._handle = object()
+        watchdog.register(self, "driver")
+
+
+def test_state(tmp_path, monkeypatch) -> None:
+    driver = Driver()
+    driver._messages.push(messages.WriteMessage(5, delay=2))
+    state = watchdog.state()["driver"]
+    assert state == {
+        "_messages": {"depth": 1, "high_water": 1, "head": {"type": "WriteMessage", "delay": 2, "started": False, "processed": False, "data": 5}},
+        "_busy": True}
+    monkeypatch.setenv("WORK_DIR", tmp_path.as_posix())
+    with open(watchdog.dump("expired", 10.0)) as file:
+        assert yaml.safe_load(file)["objects"]["driver"] == state
+    del driver, state
+    gc.collect()
+    assert "driver" not in watchdog.state()
+
+
+def test_state_in_flight(monkeypatch) -> None:
+    # The coroutines of the driver can't run without a simulator, so the test steps in for them.
+    monkeypatch.setattr(fifo.cocotb, "start_soon", lambda coroutine: coroutine.close())
+    handle = object()
+    driver = fifo.FifoWriteDriver(handle, handle, handle, handle, handle, handle, DEPTH=8, ALMOST_FULL_DEPTH=6)
+    driver.write(0x5A)
+    driver.write(0xA5, delay=3)
+    name = f"FifoWriteDriver@{id(driver):x}"
+    assert "_msg" not in watchdog.state()[name]  # Nothing is in flight yet.
+    driver._msg = driver._messages.pop()
+    driver._msg._start()
+    driver._cnt = 2
+    state = watchdog.state()[name]
+    assert state["_msg"] == {"type": "WriteMessage", "delay": 0, "started": True, "processed": False, "data": 0x5A}
+    assert state["_messages"]["head"]["data"] == 0xA5
+    assert state["_cnt"] == 2 and state["_cnt_end"] == 2
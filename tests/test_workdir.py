@@ -0,0 +1,72 @@
+"""
+Verifies cocotb_introduction.workdir.
+"""
+import os
+import tarfile
+import time
+import cocotb_introduction.workdir as workdir
+
+
+def _build(run_path) -> None:
+    (run_path / "results.xml").write_text("<testsuites/>")
+    (run_path / "coverage.yaml").write_text("{}")
+    (run_path / "waveform.vcd").write_text("$end")
+    (run_path / "transactions").mkdir()
+    (run_path / "top").mkdir()
+    (run_path / "top" / "_top.so").write_bytes(bytes(1024))
+
+
+def test_workdir_in_place(tmp_path, monkeypatch) -> None:
+    monkeypatch.delenv(workdir.SCRATCH_ENV, raising=False)
+    monkeypatch.delenv(workdir.PERSIST_ENV, raising=False)
+    work_path = tmp_path / "fifo.work"
+    run_path = workdir.prepare(work_path)
+    assert run_path == work_path
+    _build(run_path)
+    workdir.persist(work_path, run_path, passed=True)
+    assert sorted(entry.name for entry in work_path.iterdir()) == ["coverage.yaml", "results.xml"]
+
+
+def test_workdir_scratch(tmp_path, monkeypatch) -> None:
+    monkeypatch.setenv(workdir.SCRATCH_ENV, (tmp_path / "scratch").as_posix())
+    monkeypatch.delenv(workdir.PERSIST_ENV, raising=False)
+    work_path = tmp_path / "fifo.work"
+    run_path = workdir.prepare(work_path)
+    assert run_path.parent == tmp_path / "scratch"
+    _build(run_path)
+    workdir.persist(work_path, run_path, passed=False)
+    assert not run_path.exists()
+    assert sorted(entry.name for entry in work_path.iterdir()) == [workdir.ARCHIVE, "coverage.yaml", "results.xml"]
+    with tarfile.open(work_path / workdir.ARCHIVE) as archive:
+        assert "fifo.work/top/_top.so" in archive.getnames()
+        assert "fifo.work/waveform.vcd" in archive.getnames()
+
+    monkeypatch.setenv(workdir.PERSIST_ENV, "all")
+    run_path = workdir.prepare(work_path)
+    _build(run_path)
+    workdir.persist(work_path, run_path, passed=True)
+    assert not run_path.exists()
+    assert sorted(entry.name for entry in work_path.iterdir()) == ["coverage.yaml", "results.xml", "top", "transactions", "waveform.vcd"]
+
+
+def test_workdir_artifacts(tmp_path, monkeypatch) -> None:
+    # The artifacts of a passing run are only kept on request.
+    monkeypatch.delenv(workdir.SCRATCH_ENV, raising=False)
+    monkeypatch.setenv(workdir.PERSIST_ENV, "artifacts")
+    work_path = tmp_path / "fifo.work"
+    run_path = workdir.prepare(work_path)
+    _build(run_path)
+    workdir.persist(work_path, run_path, passed=True)
+    assert sorted(entry.name for entry in work_path.iterdir()) == ["coverage.yaml", "results.xml", "transactions", "waveform.vcd"]
+
+
+def test_workdir_retain(tmp_path) -> None:
+    now = time.time()
+    for index, name in enumerate(("new", "old", "oldest")):
+        path = tmp_path / f"{name}.work"
+        path.mkdir()
+        (path / "build").write_bytes(bytes(1000))
+        os.utime(path, (now - index * 3600, now - index * 3600))
+    assert workdir.retain(tmp_path, max_bytes=2500) == [tmp_path / "oldest.work"]
+    assert workdir.retain(tmp_path, max_age=1800) == [tmp_path / "old.work"]
+    assert [path.name for path in tmp_path.iterdir()] == ["new.work"]